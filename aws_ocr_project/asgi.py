@@ -0,0 +1,18 @@
+"""
+ASGI config for myproject project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server to get real concurrency from the async views,
+e.g. ``gunicorn aws_ocr_project.asgi:application -k uvicorn.workers.UvicornWorker``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'aws_ocr_project.settings')
+
+application = get_asgi_application()
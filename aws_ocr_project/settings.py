@@ -13,6 +13,8 @@ DEBUG = True
 ALLOWED_HOSTS = []
 
 ROOT_URLCONF = 'aws_ocr_project.urls'
+WSGI_APPLICATION = 'aws_ocr_project.wsgi.application'
+ASGI_APPLICATION = 'aws_ocr_project.asgi.application'
 
 
 INSTALLED_APPS = [
@@ -64,3 +66,152 @@ AWS_REGION = os.getenv("AWS_REGION")
 AWS_S3_BUCKET = os.getenv("AWS_S3_BUCKET")
 
 STATIC_URL = '/static/'
+
+# Background OCR workers (python manage.py ocr_worker)
+OCR_WORKER_CONCURRENCY = int(os.getenv("OCR_WORKER_CONCURRENCY", "8"))
+OCR_WORKER_POLL_INTERVAL = float(os.getenv("OCR_WORKER_POLL_INTERVAL", "1"))
+OCR_JOB_MAX_ATTEMPTS = int(os.getenv("OCR_JOB_MAX_ATTEMPTS", "3"))
+OCR_JOB_LEASE_SECONDS = int(os.getenv("OCR_JOB_LEASE_SECONDS", "600"))
+# Textract jobs are recorded on the document; a retried or recovered
+# document reattaches to jobs started up to this many hours ago instead of
+# paying for new ones (Textract keeps results for 7 days).
+TEXTRACT_JOB_RESUME_HOURS = float(os.getenv("TEXTRACT_JOB_RESUME_HOURS", "144"))
+
+# OCR result cache (duplicate uploads skip S3 + Textract)
+OCR_RESULT_CACHE_TTL_DAYS = int(os.getenv("OCR_RESULT_CACHE_TTL_DAYS", "90"))
+OCR_RESULT_CACHE_MAX_ENTRIES = int(os.getenv("OCR_RESULT_CACHE_MAX_ENTRIES", "100000"))
+
+# Textract polling: first check after MIN_DELAY + SECONDS_PER_PAGE * pages,
+# then exponential backoff (with jitter) up to MAX_DELAY
+TEXTRACT_POLL_MIN_DELAY = float(os.getenv("TEXTRACT_POLL_MIN_DELAY", "2"))
+TEXTRACT_POLL_MAX_DELAY = float(os.getenv("TEXTRACT_POLL_MAX_DELAY", "30"))
+TEXTRACT_POLL_SECONDS_PER_PAGE = float(os.getenv("TEXTRACT_POLL_SECONDS_PER_PAGE", "0.5"))
+TEXTRACT_POLL_BACKOFF = float(os.getenv("TEXTRACT_POLL_BACKOFF", "1.6"))
+
+# Completion notifications: "" (poll only), "sqs" (SNS topic -> SQS queue)
+# or "local" (in-process stand-in, see poller.LocalNotificationSource)
+TEXTRACT_NOTIFICATIONS = os.getenv("TEXTRACT_NOTIFICATIONS", "")
+TEXTRACT_SNS_TOPIC_ARN = os.getenv("TEXTRACT_SNS_TOPIC_ARN")
+TEXTRACT_SNS_ROLE_ARN = os.getenv("TEXTRACT_SNS_ROLE_ARN")
+TEXTRACT_SQS_QUEUE_URL = os.getenv("TEXTRACT_SQS_QUEUE_URL")
+
+# OCR backends tried in order for each upload (see ocr_app/backends.py).
+# text_layer and textract_sync run in-process; textract_async queues the job.
+OCR_BACKENDS = os.getenv("OCR_BACKENDS", "text_layer,textract_sync,textract_async").split(",")
+OCR_TEXT_LAYER_MIN_CHARS_PER_PAGE = int(os.getenv("OCR_TEXT_LAYER_MIN_CHARS_PER_PAGE", "40"))
+OCR_TEXT_LAYER_MAX_PAGES = int(os.getenv("OCR_TEXT_LAYER_MAX_PAGES", "200"))
+
+# Batch uploads (POST /api/batches/): many files or one ZIP per request.
+# Uploads are fanned out to S3/backends OCR_BATCH_CONCURRENCY at a time;
+# ZIP members are spooled one by one (in memory up to OCR_BATCH_SPOOL_BYTES);
+# archives expanding to more than OCR_BATCH_MAX_BYTES are rejected.
+OCR_BATCH_CONCURRENCY = int(os.getenv("OCR_BATCH_CONCURRENCY", "8"))
+OCR_BATCH_MAX_FILES = int(os.getenv("OCR_BATCH_MAX_FILES", "5000"))
+OCR_BATCH_MAX_BYTES = int(os.getenv("OCR_BATCH_MAX_BYTES", str(10 * 1024 ** 3)))
+OCR_BATCH_SPOOL_BYTES = int(os.getenv("OCR_BATCH_SPOOL_BYTES", str(10 * 1024 * 1024)))
+DATA_UPLOAD_MAX_NUMBER_FILES = OCR_BATCH_MAX_FILES
+
+# S3 transfers: shared TransferConfig for upload_fileobj, and uploads of at
+# least S3_STREAMING_UPLOAD_MIN_BYTES are streamed to S3 in multipart parts
+# while the request body is still being received (see ocr_app/uploads.py)
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE", str(8 * 1024 * 1024)))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "10"))
+S3_STREAMING_UPLOAD_MIN_BYTES = int(os.getenv("S3_STREAMING_UPLOAD_MIN_BYTES", str(S3_MULTIPART_THRESHOLD)))
+
+# Shared boto3 clients (see ocr_app/aws.py): one connection pool per client
+# and process, sized for worker + batch + multipart concurrency
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))
+AWS_RETRY_MODE = os.getenv("AWS_RETRY_MODE", "adaptive")
+AWS_MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", "8"))
+AWS_CONNECT_TIMEOUT = float(os.getenv("AWS_CONNECT_TIMEOUT", "5"))
+AWS_READ_TIMEOUT = float(os.getenv("AWS_READ_TIMEOUT", "60"))
+
+# Page-level parallel OCR: PDFs with at least TEXTRACT_SPLIT_MIN_PAGES pages
+# (0 = off, requires pypdf) run as parallel Textract jobs over
+# TEXTRACT_SPLIT_CHUNK_PAGES-page chunks.
+TEXTRACT_SPLIT_MIN_PAGES = int(os.getenv("TEXTRACT_SPLIT_MIN_PAGES", "0"))
+TEXTRACT_SPLIT_CHUNK_PAGES = int(os.getenv("TEXTRACT_SPLIT_CHUNK_PAGES", "20"))
+TEXTRACT_SPLIT_MAX_PARALLEL = int(os.getenv("TEXTRACT_SPLIT_MAX_PARALLEL", "8"))
+
+# Textract scheduler (ocr_app/scheduler.py), shared by every worker process
+# through the database: at most TEXTRACT_MAX_CONCURRENT_JOBS async jobs in
+# progress (keep it below the account quota), Start / Get / Detect calls per
+# second (0 = unlimited), and retries with backoff for throttled calls.
+# Synchronous detection waits at most TEXTRACT_SYNC_MAX_WAIT seconds for a
+# token before the upload is queued for the workers instead.
+TEXTRACT_MAX_CONCURRENT_JOBS = int(os.getenv("TEXTRACT_MAX_CONCURRENT_JOBS", "20"))
+TEXTRACT_SLOT_LEASE_SECONDS = int(os.getenv("TEXTRACT_SLOT_LEASE_SECONDS", "300"))
+TEXTRACT_START_TPS = float(os.getenv("TEXTRACT_START_TPS", "5"))
+TEXTRACT_GET_TPS = float(os.getenv("TEXTRACT_GET_TPS", "10"))
+TEXTRACT_DETECT_TPS = float(os.getenv("TEXTRACT_DETECT_TPS", "5"))
+TEXTRACT_SYNC_MAX_WAIT = float(os.getenv("TEXTRACT_SYNC_MAX_WAIT", "2"))
+TEXTRACT_THROTTLE_RETRIES = int(os.getenv("TEXTRACT_THROTTLE_RETRIES", "6"))
+TEXTRACT_THROTTLE_BASE_DELAY = float(os.getenv("TEXTRACT_THROTTLE_BASE_DELAY", "1"))
+TEXTRACT_THROTTLE_MAX_DELAY = float(os.getenv("TEXTRACT_THROTTLE_MAX_DELAY", "30"))
+
+# Raw Textract output (ocr_app/raw_output.py): "local" keeps gzipped JSON
+# lines of every async job's responses under TEXTRACT_RAW_DIR, "s3" under
+# TEXTRACT_RAW_PREFIX in AWS_S3_BUCKET; empty disables it.
+TEXTRACT_RAW_STORE = os.getenv("TEXTRACT_RAW_STORE", "")
+TEXTRACT_RAW_DIR = os.getenv("TEXTRACT_RAW_DIR", str(BASE_DIR / "textract_raw"))
+TEXTRACT_RAW_PREFIX = os.getenv("TEXTRACT_RAW_PREFIX", "textract-raw/")
+
+# Rebuild the Officers / Shareholder(s) tables from Textract LINE bounding
+# boxes (ocr_app/layout.py) instead of the text regexes when geometry is
+# available: async Textract jobs and, with TEXTRACT_RAW_STORE, re-parses.
+OCR_LAYOUT_ROWS = os.getenv("OCR_LAYOUT_ROWS", "0") == "1"
+
+# Threads shared by the async API for its short blocking steps (S3 upload,
+# Textract start / result calls, DB saves, entity parsing); Textract jobs
+# themselves are awaited without one.
+OCR_ASYNC_IO_THREADS = int(os.getenv("OCR_ASYNC_IO_THREADS", "32"))
+
+# Compressed storage of OCR text and entities (ocr_app/compression.py):
+# "zlib", "zstd" (requires zstandard, else zlib) or empty for uncompressed.
+# Applies to new writes; `manage.py compress_documents` rewrites existing
+# rows and --compare reports size / CPU per codec. LEVEL 0 = codec default.
+OCR_STORAGE_COMPRESSION = os.getenv("OCR_STORAGE_COMPRESSION", "")
+OCR_STORAGE_COMPRESSION_LEVEL = int(os.getenv("OCR_STORAGE_COMPRESSION_LEVEL", "0"))
+
+# Django cache: per-process memory unless DJANGO_CACHE_BACKEND /
+# DJANGO_CACHE_LOCATION point at a shared one (e.g. Redis or Memcached).
+# Rendered result pages and detail JSON of done documents are kept there
+# for OCR_RENDER_CACHE_SECONDS (0 = off, see ocr_app/http_cache.py).
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", "ocr-app"),
+    }
+}
+OCR_RENDER_CACHE_SECONDS = int(os.getenv("OCR_RENDER_CACHE_SECONDS", "3600"))
+
+# Offline AWS stand-ins for load tests (ocr_app/fake_aws.py, `manage.py
+# loadtest`): AWS_FAKE_SERVICES=s3,textract swaps those clients for fakes.
+# Fake S3 objects live under AWS_FAKE_S3_DIR; fake Textract jobs finish
+# after BASE_SECONDS + SECONDS_PER_PAGE * pages, every call takes
+# CALL_LATENCY seconds, and THROTTLE_RATE / FAILURE_RATE of calls / jobs
+# are throttled / fail.
+AWS_FAKE_SERVICES = [s.strip() for s in os.getenv("AWS_FAKE_SERVICES", "").split(",") if s.strip()]
+AWS_FAKE_S3_DIR = os.getenv("AWS_FAKE_S3_DIR", str(BASE_DIR / "fake_s3"))
+AWS_FAKE_S3_LATENCY = float(os.getenv("AWS_FAKE_S3_LATENCY", "0.02"))
+AWS_FAKE_TEXTRACT_BASE_SECONDS = float(os.getenv("AWS_FAKE_TEXTRACT_BASE_SECONDS", "2"))
+AWS_FAKE_TEXTRACT_SECONDS_PER_PAGE = float(os.getenv("AWS_FAKE_TEXTRACT_SECONDS_PER_PAGE", "0.3"))
+AWS_FAKE_TEXTRACT_CALL_LATENCY = float(os.getenv("AWS_FAKE_TEXTRACT_CALL_LATENCY", "0.05"))
+AWS_FAKE_TEXTRACT_THROTTLE_RATE = float(os.getenv("AWS_FAKE_TEXTRACT_THROTTLE_RATE", "0"))
+AWS_FAKE_TEXTRACT_FAILURE_RATE = float(os.getenv("AWS_FAKE_TEXTRACT_FAILURE_RATE", "0"))
+
+# Per-stage timing events (one JSON object per line, see ocr_app/metrics.py)
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"metrics": {"format": "%(message)s"}},
+    "handlers": {"metrics": {"class": "logging.StreamHandler", "formatter": "metrics"}},
+    "loggers": {
+        "ocr_app.metrics": {
+            "handlers": ["metrics"],
+            "level": os.getenv("OCR_METRICS_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
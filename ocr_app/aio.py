@@ -0,0 +1,46 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+# ===============================
+# Blocking work from async views
+# ===============================
+# Async code never calls boto3 or the ORM directly: short blocking steps
+# (an S3 upload, a start call, a DB save, entity parsing) run on a bounded
+# per-process thread pool and the long waits (Textract jobs, slot queues,
+# rate limits) are awaited without holding a thread at all.
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.OCR_ASYNC_IO_THREADS, thread_name_prefix="ocr-async-io"
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _call(fn, args, kwargs):
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        # Same connection handling as the end of a sync request
+        close_old_connections()
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run ``fn`` on the shared I/O pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(_call, fn, args, kwargs))
@@ -0,0 +1,130 @@
+import asyncio
+import time
+import traceback
+
+from botocore.exceptions import ClientError
+
+from .aio import run_blocking
+from .aws import get_client
+from .jobs import enqueue, release, retry_or_fail
+from .metrics import elapsed_ms, record
+from .pipeline import (
+    SUCCESS_STATUSES,
+    complete_textract,
+    fail_missing_object,
+    fetch_textract_result,
+    is_missing_object,
+    job_finished,
+    remember_job,
+    should_split,
+    textract_start_args,
+)
+from .poller import get_poller
+from .scheduler import call_async, job_slot_async
+
+
+# ===============================
+# Async Textract pipeline (ASGI)
+# ===============================
+# The async extraction API runs a document's Textract job inside the
+# request without tying up a thread for it: slot and rate-limit waits are
+# asyncio sleeps and the job itself is awaited through the shared poller's
+# completion callback. Only short blocking steps (start call, result fetch,
+# DB saves and the CPU-bound entity parsing) borrow a thread from the
+# aio.py pool, so one process can hold hundreds of jobs in flight. The job
+# is recorded on the document like in the worker path, so if the request
+# is cancelled or the process dies, the worker that takes the document
+# over reattaches to it.
+
+
+async def wait_for_job(textract, job_id, page_count=None, heartbeat=None, heartbeat_interval=60):
+    """
+    Await the terminal status of ``job_id`` on the shared poller, awaiting
+    ``heartbeat()`` every ``heartbeat_interval`` seconds meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def finished(status_):
+        # Called from the poller thread
+        loop.call_soon_threadsafe(lambda: done.done() or done.set_result(status_))
+
+    poller = get_poller(textract)
+    poller.watch(job_id, finished, page_count=page_count)
+    try:
+        while True:
+            try:
+                return await asyncio.wait_for(asyncio.shield(done), heartbeat_interval)
+            except asyncio.TimeoutError:
+                if heartbeat:
+                    await heartbeat()
+    finally:
+        poller.forget(job_id)
+
+
+async def textract_single_async(doc):
+    """Async ``pipeline.textract_single``; returns ``(text, lines)``."""
+    textract = get_client("textract")
+    timings = {}
+    await run_blocking(doc.set_stage, "textract_start")
+
+    async def lease():
+        # textract_start while queued for a slot, textract_wait afterwards
+        await run_blocking(doc.set_stage, doc.stage)
+
+    clock = time.perf_counter()
+    async with job_slot_async(heartbeat=lease) as touch_slot:
+        timings["textract_slot_ms"] = elapsed_ms(clock)
+        clock = time.perf_counter()
+        start_job = await call_async(
+            "start", textract.start_document_text_detection, stats=timings, **textract_start_args(doc.s3_key)
+        )
+        job_id = start_job["JobId"]
+        timings["textract_start_ms"] = elapsed_ms(clock)
+        print(f"Textract job started: {job_id}")
+        await run_blocking(remember_job, doc, doc.s3_key, job_id)
+        await run_blocking(doc.set_stage, "textract_wait")
+
+        async def keep_alive():
+            await run_blocking(touch_slot)
+            await lease()
+
+        clock = time.perf_counter()
+        status_ = await wait_for_job(textract, job_id, page_count=doc.page_count, heartbeat=keep_alive)
+        timings["textract_wait_ms"] = elapsed_ms(clock)
+    await run_blocking(job_finished, doc, doc.s3_key, status_)
+    print(f"Textract status: {status_}")
+    record(doc, **timings)
+    if status_ not in SUCCESS_STATUSES:
+        return None, None
+    return await run_blocking(fetch_textract_result, doc, job_id)
+
+
+async def extract_async(doc):
+    """
+    Finish a document claimed with ``submit_upload(inline=True)``. PDFs
+    that would be split into chunks are handed to the workers, and so is a
+    document whose job fails unexpectedly or whose request is cancelled.
+    """
+    if should_split(doc):
+        return await run_blocking(enqueue, doc)
+    try:
+        extracted_text, lines = await textract_single_async(doc)
+    except asyncio.CancelledError:
+        await asyncio.shield(run_blocking(enqueue, doc))
+        raise
+    except ClientError as exc:
+        if is_missing_object(exc):
+            await run_blocking(fail_missing_object, doc)
+            await run_blocking(release, doc)
+            return doc
+        traceback.print_exc()
+        await run_blocking(retry_or_fail, doc, exc)
+        return doc
+    except Exception as exc:
+        traceback.print_exc()
+        await run_blocking(retry_or_fail, doc, exc)
+        return doc
+    await run_blocking(complete_textract, doc, extracted_text, lines)
+    await run_blocking(release, doc)
+    return doc
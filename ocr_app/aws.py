@@ -0,0 +1,120 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+
+
+# ===============================
+# Shared AWS clients
+# ===============================
+# Clients are created on first use in each process (never at import time,
+# never inherited across a fork) and shared by all threads of that process;
+# boto3 clients are thread-safe. The connection pool, retry mode and
+# timeouts come from settings so concurrent workers are not squeezed through
+# botocore's default 10-connection pool.
+
+_clients = {}
+_clients_pid = None
+_clients_lock = threading.Lock()
+
+
+def client_config():
+    return Config(
+        max_pool_connections=settings.AWS_MAX_POOL_CONNECTIONS,
+        connect_timeout=settings.AWS_CONNECT_TIMEOUT,
+        read_timeout=settings.AWS_READ_TIMEOUT,
+        retries={"mode": settings.AWS_RETRY_MODE, "total_max_attempts": settings.AWS_MAX_ATTEMPTS},
+    )
+
+
+def get_client(service):
+    """Return this process's shared boto3 client for ``service``."""
+    global _clients_pid
+    pid = os.getpid()
+    if _clients_pid == pid and service in _clients:
+        return _clients[service][0]
+
+    with _clients_lock:
+        if _clients_pid != pid:
+            # Forked (e.g. gunicorn --preload): sockets are not ours to reuse
+            _clients.clear()
+            _clients_pid = pid
+        if service not in _clients:
+            if service in settings.AWS_FAKE_SERVICES:
+                from .fake_aws import build_client  # offline stand-ins, see fake_aws.py
+
+                client = build_client(service)
+            else:
+                client = boto3.client(
+                    service,
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    region_name=settings.AWS_REGION,
+                    config=client_config(),
+                )
+            _clients[service] = (client, PoolMetrics(client))
+        return _clients[service][0]
+
+
+# ===============================
+# Pool utilization metrics
+# ===============================
+class PoolMetrics:
+    """
+    Counts API calls in flight on a client through botocore's
+    before-call / after-call events. Calls beyond the pool size open extra
+    connections that urllib3 discards afterwards, so ``over_capacity``
+    going up means AWS_MAX_POOL_CONNECTIONS is too small.
+    """
+
+    def __init__(self, client):
+        self.pool_size = client.meta.config.max_pool_connections
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.over_capacity = 0
+        self._lock = threading.Lock()
+
+        events = client.meta.events
+        events.register("before-call.*.*", self._started)
+        events.register("after-call.*.*", self._finished)
+        events.register("after-call-error.*.*", self._finished)
+
+    def _started(self, context=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.in_flight > self.pool_size:
+                self.over_capacity += 1
+        if context is not None:
+            context["pool_metrics_counted"] = True
+
+    def _finished(self, context=None, http_response=None, **kwargs):
+        failed = http_response is None or http_response.status_code >= 300
+        if context is not None and context.pop("pool_metrics_counted", False):
+            with self._lock:
+                self.in_flight -= 1
+                self.errors += failed
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "pool_size": self.pool_size,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "utilization": round(self.in_flight / self.pool_size, 3) if self.pool_size else None,
+                "calls": self.calls,
+                "errors": self.errors,
+                "over_capacity": self.over_capacity,
+            }
+
+
+def pool_stats():
+    """Per-service pool metrics for the clients created in this process."""
+    if _clients_pid != os.getpid():
+        return {}
+    return {service: metrics.snapshot() for service, (_, metrics) in list(_clients.items())}
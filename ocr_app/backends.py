@@ -0,0 +1,165 @@
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+
+from .scheduler import acquire_token, is_throttle_error
+
+try:
+    from pypdf import PdfReader
+    from pypdf.errors import PyPdfError
+except ImportError:  # optional: without pypdf every PDF goes to Textract
+    PdfReader = None
+    PyPdfError = Exception
+
+
+# ===============================
+# Pluggable OCR backends
+# ===============================
+# Each backend decides whether it can handle an upload and, for in-process
+# backends, returns the LINE text directly. ``pipeline.submit_upload`` tries
+# the backends listed in settings.OCR_BACKENDS in order; a local backend that
+# returns None (e.g. a PDF without a usable text layer) falls through to the
+# next one, and the async Textract backend accepts everything.
+
+TEXTRACT_SYNC_MAX_BYTES = 10 * 1024 * 1024  # AWS limit for Document.Bytes
+
+PDF_MAGIC = b"%PDF"
+IMAGE_MAGIC = (
+    (b"\x89PNG", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+
+def sniff_content_type(upload):
+    """Detect PDF / image uploads from their magic bytes (rewinds the file)."""
+    head = upload.read(8)
+    upload.seek(0)
+    if head.startswith(PDF_MAGIC):
+        return "application/pdf"
+    for magic, content_type in IMAGE_MAGIC:
+        if head.startswith(magic):
+            return content_type
+    return "application/octet-stream"
+
+
+def join_lines(lines):
+    """Normalize backend output to Textract-style LINE text."""
+    return "\n".join(line.strip() for line in lines if line and line.strip())
+
+
+class OCRBackend:
+    name = None
+    is_async = False
+
+    def accepts(self, upload, content_type, page_count):
+        raise NotImplementedError
+
+    def extract_text(self, upload):
+        """Return the document's LINE text, or None to fall through."""
+        raise NotImplementedError
+
+
+class TextLayerBackend(OCRBackend):
+    """
+    Reads the embedded text layer of born-digital PDFs (e.g. ACRA extracts)
+    with pypdf. Scanned PDFs have no usable text layer and fall through.
+    """
+
+    name = "text_layer"
+
+    def accepts(self, upload, content_type, page_count):
+        if PdfReader is None or content_type != "application/pdf":
+            return False
+        return page_count is None or page_count <= settings.OCR_TEXT_LAYER_MAX_PAGES
+
+    def extract_text(self, upload):
+        try:
+            reader = PdfReader(upload)
+            if len(reader.pages) > settings.OCR_TEXT_LAYER_MAX_PAGES:
+                return None
+            lines = []
+            for page in reader.pages:
+                page_text = page.extract_text() or ""
+                # A single image-only page means the document needs real OCR
+                if len(page_text.strip()) < settings.OCR_TEXT_LAYER_MIN_CHARS_PER_PAGE:
+                    return None
+                lines.extend(page_text.splitlines())
+        except Exception as exc:
+            # pypdf raises more than PyPdfError on malformed files
+            # (ValueError, KeyError, RecursionError, ...): let Textract try
+            print(f"Text layer extraction failed, falling back: {type(exc).__name__}: {exc}")
+            return None
+        finally:
+            upload.seek(0)
+        return join_lines(lines)
+
+
+class TextractSyncBackend(OCRBackend):
+    """
+    Synchronous ``detect_document_text`` for single-page PDFs and images,
+    which answers in one API call without S3 or job polling. When the
+    shared "detect" rate is exhausted or the call fails (throttled or
+    not), the upload falls through to the async backend and is queued.
+    """
+
+    name = "textract_sync"
+
+    def __init__(self, client):
+        self.client = client
+
+    def accepts(self, upload, content_type, page_count):
+        if upload.size > TEXTRACT_SYNC_MAX_BYTES:
+            return False
+        if content_type == "application/pdf":
+            return page_count == 1
+        return content_type.startswith("image/")
+
+    def extract_text(self, upload):
+        if not acquire_token("detect", timeout=settings.TEXTRACT_SYNC_MAX_WAIT):
+            print("Textract detect rate limit reached, queueing instead")
+            return None
+        data = upload.read()
+        upload.seek(0)
+        try:
+            resp = self.client.detect_document_text(Document={"Bytes": data})
+        except ClientError as exc:
+            if is_throttle_error(exc):
+                print(f"Textract detect throttled, queueing instead: {exc}")
+            else:
+                # e.g. UnsupportedDocumentException / BadDocumentException:
+                # the async job may still read it, and fails the document if not
+                print(f"Textract detect failed, queueing instead: {exc}")
+            return None
+        except BotoCoreError as exc:
+            print(f"Textract detect failed, queueing instead: {exc}")
+            return None
+        return join_lines(b["Text"] for b in resp["Blocks"] if b["BlockType"] == "LINE")
+
+
+class TextractAsyncBackend(OCRBackend):
+    """
+    Default path: S3 upload + asynchronous Textract job, run by the workers
+    (see ``pipeline.process_pdf_s3``).
+    """
+
+    name = "textract_async"
+    is_async = True
+
+    def accepts(self, upload, content_type, page_count):
+        return True
+
+
+def build_backends(textract_client, names=None):
+    """Instantiate the backends named in settings.OCR_BACKENDS, in order."""
+    available = {
+        TextLayerBackend.name: TextLayerBackend,
+        TextractSyncBackend.name: lambda: TextractSyncBackend(textract_client),
+        TextractAsyncBackend.name: TextractAsyncBackend,
+    }
+    names = settings.OCR_BACKENDS if names is None else names
+    backends = [available[name.strip()]() for name in names if name.strip()]
+    # The async path is the only one that handles every document
+    if not any(b.is_async for b in backends):
+        backends.append(TextractAsyncBackend())
+    return backends
@@ -0,0 +1,228 @@
+import os
+import shutil
+import tempfile
+import threading
+import traceback
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count
+
+from .models import Document
+from .pipeline import submit_upload
+
+
+# ===============================
+# Batch uploads
+# ===============================
+# A batch fans many uploads out through ``submit_upload`` with at most
+# OCR_BATCH_CONCURRENCY in flight (hash + cache lookup + local backend or S3
+# upload). The fan-out runs on a background thread (``start_batch``), so
+# the request returns as soon as the batch exists and clients can watch it
+# go from "submitting" to "submitted" (or "failed"). Textract itself runs
+# in the workers as for single uploads.
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+# Raised by zipfile / zlib for a corrupt member (bad header, CRC, stream)
+MEMBER_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError, RuntimeError)
+
+
+class BatchError(ValueError):
+    pass
+
+
+def zip_members(archive):
+    """
+    Validate a ZIP upload and return an iterator over the files inside it.
+    Only the central directory is read up front; each member is decompressed
+    into its own spooled temp file when it is reached, so the archive is
+    never fully buffered in memory.
+    """
+    try:
+        zf = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile as exc:
+        raise BatchError(f"Not a valid ZIP archive: {exc}")
+
+    members = [
+        info for info in zf.infolist()
+        if not info.is_dir()
+        and not info.filename.startswith("__MACOSX/")
+        and not os.path.basename(info.filename).startswith(".")
+    ]
+    if not members:
+        zf.close()
+        raise BatchError("Archive contains no files")
+    if len(members) > settings.OCR_BATCH_MAX_FILES:
+        zf.close()
+        raise BatchError(f"Archive holds {len(members)} files, the limit is {settings.OCR_BATCH_MAX_FILES}")
+    # zipfile never inflates a member past its declared size, so this bounds
+    # what can land in the spool files (ZIP bombs)
+    total_size = sum(info.file_size for info in members)
+    if total_size > settings.OCR_BATCH_MAX_BYTES:
+        zf.close()
+        raise BatchError(
+            f"Archive expands to {total_size} bytes, the limit is {settings.OCR_BATCH_MAX_BYTES}"
+        )
+    return _spool_members(zf, members)
+
+
+class BadMember:
+    """A ZIP member that could not be read; recorded as a failed document."""
+
+    def __init__(self, name, error):
+        self.name = name
+        self.error = error
+
+    def close(self):
+        pass
+
+
+def _spool_members(zf, members):
+    with zf:
+        for info in members:
+            name = os.path.basename(info.filename)
+            spool = tempfile.SpooledTemporaryFile(max_size=settings.OCR_BATCH_SPOOL_BYTES)
+            try:
+                with zf.open(info) as member:
+                    shutil.copyfileobj(member, spool, SPOOL_CHUNK_SIZE)
+            except MEMBER_ERRORS as exc:
+                spool.close()
+                yield BadMember(name, f"Unreadable ZIP member: {type(exc).__name__}: {exc}")
+                continue
+            spool.seek(0)
+            upload = File(spool, name=name)
+            upload.size = info.file_size
+            yield upload
+
+
+def _submit_one(batch, upload, force):
+    try:
+        if isinstance(upload, BadMember):
+            doc = Document.objects.create(file_name=upload.name, batch=batch, status="failed", error=upload.error)
+        else:
+            doc, _ = submit_upload(upload, force=force, batch=batch)
+    except Exception as exc:
+        # Keep the failure visible in the batch instead of aborting it
+        traceback.print_exc()
+        doc = Document.objects.create(
+            file_name=upload.name,
+            batch=batch,
+            status="failed",
+            error=f"{type(exc).__name__}: {exc}",
+        )
+    finally:
+        upload.close()
+        # Pool threads each hold their own connection
+        connection.close()
+    return doc.pk
+
+
+def submit_batch(batch, uploads, force=False, concurrency=None):
+    """
+    Submit every upload in ``uploads`` (any iterable of file objects, e.g.
+    ``request.FILES.getlist`` or ``zip_members``) as part of ``batch``.
+    The iterable is consumed lazily: a new upload is only pulled once a
+    slot is free, which bounds the number of spooled ZIP members too.
+    """
+    concurrency = concurrency or settings.OCR_BATCH_CONCURRENCY
+    slots = threading.BoundedSemaphore(concurrency)
+    futures = []
+    error = None
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ocr-batch") as pool:
+        iterator = iter(uploads)
+        while True:
+            slots.acquire()
+            try:
+                upload = next(iterator, None)
+            except Exception as exc:
+                # The files already pulled still finish; the rest are lost
+                traceback.print_exc()
+                error = f"{type(exc).__name__}: {exc}"
+                upload = None
+            if upload is None:
+                slots.release()
+                break
+            future = pool.submit(_submit_one, batch, upload, force)
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+
+    batch.total = len(futures)
+    batch.status = "failed" if error else "submitted"
+    batch.error = error
+    batch.save(update_fields=["total", "status", "error", "updated_at"])
+    print(f"📦 Batch {batch.pk}: {batch.total} document(s) submitted" + (f", stopped by {error}" if error else ""))
+    return batch
+
+
+def _run_batch(batch, uploads, force, closing):
+    close_old_connections()
+    try:
+        submit_batch(batch, uploads, force=force)
+    except Exception as exc:
+        traceback.print_exc()
+        batch.status = "failed"
+        batch.error = f"{type(exc).__name__}: {exc}"
+        batch.save(update_fields=["status", "error", "updated_at"])
+    finally:
+        for f in closing:
+            f.close()
+        connection.close()
+
+
+def start_batch(batch, uploads, force=False, closing=()):
+    """
+    Run ``submit_batch`` on a background thread once the current
+    transaction commits. ``closing`` are the request's upload files, which
+    the caller has detached from the request (see ``detach_files``) so they
+    outlive the response; they are closed when the fan-out ends. The thread
+    is not a daemon, so a graceful shutdown lets it finish.
+    """
+    def start():
+        threading.Thread(
+            target=_run_batch, args=(batch, uploads, force, list(closing)), name=f"ocr-batch-{batch.pk}",
+        ).start()
+
+    transaction.on_commit(start)
+
+
+def detach_files(request_files, field):
+    """
+    Take the uploads of ``field`` out of ``request.FILES``: Django closes
+    (and deletes the temp files of) every upload left there once the
+    response is sent.
+    """
+    files = request_files.getlist(field)
+    if field in request_files:
+        del request_files[field]
+    return files
+
+
+def batch_progress(batch):
+    """
+    Aggregate document statuses of ``batch`` into a progress summary.
+    The batch is "done" once every document is either done or failed; a
+    batch whose submission broke off stays "failed".
+    """
+    counts = dict(
+        batch.documents.order_by().values_list("status").annotate(n=Count("id"))
+    )
+    total = sum(counts.values())
+    finished = counts.get("done", 0) + counts.get("failed", 0)
+    if batch.status in ("submitting", "failed"):
+        state = batch.status
+    else:
+        state = "done" if finished == total else "processing"
+    return {
+        "status": state,
+        "total": total,
+        "queued": counts.get("queued", 0),
+        "processing": counts.get("processing", 0),
+        "done": counts.get("done", 0),
+        "failed": counts.get("failed", 0),
+        "percent": round(100 * finished / total, 1) if total else 100.0,
+    }
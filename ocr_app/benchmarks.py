@@ -0,0 +1,361 @@
+import json
+import multiprocessing
+import random
+import time
+from pathlib import Path
+
+from .layout import Line
+from .utils import (
+    extract_abbreviations_section,
+    extract_capital_section,
+    extract_entities,
+    extract_officers_section,
+    extract_shareholders_section,
+)
+
+
+# ===============================
+# Extractor benchmark suite
+# ===============================
+# Everything here runs offline against synthetic ACRA business-profile text
+# shaped like Textract LINE output (one line per detected text line, page
+# footers included). Used by ``manage.py benchmark_extractors``.
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "benchmark_golden"
+
+EXTRACTORS = {
+    "extract_entities": extract_entities,
+    "extract_capital_section": extract_capital_section,
+    "extract_officers_section": extract_officers_section,
+    "extract_shareholders_section": extract_shareholders_section,
+    "extract_abbreviations_section": extract_abbreviations_section,
+}
+
+FIRST_NAMES = ["JOHN", "MARY", "TAN", "LIM", "ANAND", "SITI", "WEI", "RAJESH", "NUR", "KELVIN"]
+LAST_NAMES = ["TAN AH KOW", "LEE MEI LING", "KUMAR", "BINTE AHMAD", "CHEN", "WONG", "ONG", "PILLAI"]
+STREETS = ["UBI ROAD 1", "ORCHARD ROAD", "TAMPINES AVENUE 5", "JURONG WEST STREET 42",
+           "BUKIT TIMAH LANE", "CLEMENTI DRIVE", "MARINE CRESCENT", "SENGKANG EAST LOOP"]
+NATIONALITIES = ["SINGAPORE CITIZEN", "MALAYSIAN", "INDIAN", "CHINESE"]
+
+
+def _address(rng):
+    return [
+        f"{rng.randint(1, 999)} {rng.choice(STREETS)}",
+        f"#{rng.randint(1, 20):02d}-{rng.randint(1, 99):02d}",
+        f"SINGAPORE ({rng.randint(100000, 999999)})",
+    ]
+
+
+def _person_id(rng):
+    return f"S{rng.randint(1000000, 9999999)}{rng.choice('ABCDEFGHIJZ')}"
+
+
+def _footer(page, pages, seed):
+    return [f"Page {page + 1} of {pages}", f"Authentication No. : T{seed:04d}{page:05d}"]
+
+
+TAIL_LINES = [
+    "Abbreviation",
+    "UL - Local Entity not registered with ACRA",
+    "UF - Foreign Entity not",
+    "registered with ACRA",
+    "Note :",
+    "This is a computer generated document.",
+    "FOR REGISTRAR OF COMPANIES",
+]
+
+
+def _head_lines(rng):
+    return [
+        "The Following Are The Brief Particulars of :",
+        f"Registration No. : 2019{rng.randint(10000, 99999)}K",
+        "Company Name. : ACME HOLDINGS PTE. LTD.",
+        "Former Name if any : ",
+        "Incorporation Date. : 01/02/2019",
+        "Company Type : EXEMPT PRIVATE COMPANY LIMITED BY SHARES",
+        "Status : Live Company",
+        "Status Date : 01/02/2019",
+        "Principal Activities",
+        "Activities (I) : 62011",
+        "Description : DEVELOPMENT OF SOFTWARE",
+        "Activities (II) : 70201",
+        "Description : MANAGEMENT CONSULTANCY SERVICES",
+        "Capital",
+        "Issued Share Capital", "(AMOUNT) 100,000", "Number of Shares", "100000",
+        "Currency", "SINGAPORE, DOLLARS", "Share Type", "ORDINARY",
+        "Paid-Up Capital", "(AMOUNT) 100,000",
+        "Currency", "SINGAPORE, DOLLARS", "Share Type", "ORDINARY",
+        "COMPANY HAS THE FOLLOWING TREASURY SHARES", "Number Of Shares", "—", "Currency", "—",
+        "Registered Office Address : 62 UBI ROAD 1", "#06-26", "SINGAPORE (408734)",
+        "Date of Address : 01/02/2019",
+        "Date of Last AGM : 01/02/2023",
+        "Date of Last AR : 01/03/2023",
+        "FYE As At Date of Last AR : 31/12/2022",
+        "Audit Firms", "Name", "ABC LLP",
+    ]
+
+
+def synthetic_profile(officers=3, shareholders=3, pages=3, seed=0, ordinary_label="Ordinary(Number)"):
+    """
+    Build a deterministic ACRA business-profile text with the given number
+    of officers and shareholders, split into ``pages`` pages with the
+    "Page x of y" / "Authentication No." footers Textract picks up.
+    """
+    rng = random.Random(seed)
+    lines = _head_lines(rng) + [
+        "Officers/Authorised Representative(s)",
+        "Name", "ID", "Nationality/Citizenship", "Source of Address",
+        "Date of Appointment", "Address", "Position Held",
+    ]
+    for _ in range(officers):
+        street, unit, postal = _address(rng)
+        lines += [
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            _person_id(rng),
+            rng.choice(NATIONALITIES),
+            "ACRA",
+            f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/20{rng.randint(10, 23)}",
+            street,
+            rng.choice(["Director", "Secretary"]),
+            unit,
+            postal,
+        ]
+    lines += [
+        "Shareholder(s)",
+        "Name", "ID", "Nationality/Citizenship/Place of Incorporation",
+        "Source of Address", "Address", ordinary_label, "Currency",
+    ]
+    for _ in range(shareholders):
+        lines += [
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            _person_id(rng),
+            "SINGAPORE",
+            "ACRA",
+            *_address(rng),
+            f"{ordinary_label} {rng.randint(1, 100000)} Currency SINGAPORE, DOLLARS",
+        ]
+    lines += TAIL_LINES
+
+    # Spread page footers evenly, the way Textract emits them inline
+    pages = max(1, pages)
+    per_page = max(1, len(lines) // pages)
+    text_lines = []
+    for page in range(pages):
+        chunk = lines[page * per_page:] if page == pages - 1 else lines[page * per_page:(page + 1) * per_page]
+        text_lines += chunk
+        text_lines += _footer(page, pages, seed)
+    return "\n".join(text_lines)
+
+
+# ---------- table geometry ----------
+# Column x positions of the two tables, as laid out on ACRA profiles. Cells
+# wrap onto continuation rows without an ID, like real Textract LINEs.
+OFFICER_TABLE = [
+    (0.05, "Name"), (0.21, "ID"), (0.32, "Nationality/Citizenship"), (0.46, "Source of Address"),
+    (0.56, "Address"), (0.76, "Position Held"), (0.87, "Date of Appointment"),
+]
+SHAREHOLDER_TABLE = [
+    (0.05, "Name"), (0.21, "ID"), (0.32, "Nationality/Citizenship/Place of Incorporation"),
+    (0.48, "Source of Address"), (0.58, "Address"), (0.78, "Ordinary(Number)"), (0.88, "Currency"),
+]
+PAGE_TOP, PAGE_BOTTOM = 0.05, 0.9
+
+
+def _table_row(table, cells):
+    """``[(left, width, text)]`` for the non-empty ``cells`` of one row."""
+    row = []
+    for i, ((left, _), text) in enumerate(zip(table, cells)):
+        right = table[i + 1][0] if i + 1 < len(table) else 0.98
+        if text:
+            row.append((left, right - left - 0.01, text))
+    return row
+
+
+def synthetic_layout(officers=3, shareholders=3, pages=3, seed=0):
+    """
+    ``(text, lines)`` of a deterministic business profile whose Officers and
+    Shareholder(s) tables are laid out in columns: ``lines`` are
+    ``layout.Line`` tuples spread over ``pages`` pages (table headers
+    repeated after each page break, footers at the bottom) and ``text``
+    is their reading order, as Textract would join them.
+    """
+    rng = random.Random(seed)
+    rows = [(None, [(0.05, 0.9, line)]) for line in _head_lines(rng)]
+
+    rows.append((None, [(0.05, 0.9, "Officers/Authorised Representative(s)")]))
+    header = _table_row(OFFICER_TABLE, [title for _, title in OFFICER_TABLE])
+    rows.append((header, header))
+    for _ in range(officers):
+        street, unit, postal = _address(rng)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        date = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/20{rng.randint(10, 23)}"
+        position = rng.choice(["Director", "Secretary"])
+        rows.append((header, _table_row(OFFICER_TABLE, [
+            first, _person_id(rng), rng.choice(NATIONALITIES), "ACRA", street, position, date,
+        ])))
+        rows.append((header, _table_row(OFFICER_TABLE, [last, "", "", "", unit, "", ""])))
+        rows.append((header, _table_row(OFFICER_TABLE, ["", "", "", "", postal, "", ""])))
+
+    rows.append((None, [(0.05, 0.9, "Shareholder(s)")]))
+    header = _table_row(SHAREHOLDER_TABLE, [title for _, title in SHAREHOLDER_TABLE])
+    rows.append((header, header))
+    for _ in range(shareholders):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        street, unit, postal = _address(rng)
+        rows.append((header, _table_row(SHAREHOLDER_TABLE, [
+            name, _person_id(rng), "SINGAPORE", "ACRA", street, str(rng.randint(1, 100000)), "SINGAPORE,",
+        ])))
+        rows.append((header, _table_row(SHAREHOLDER_TABLE, ["", "", "", "", unit, "", "DOLLARS"])))
+        rows.append((header, _table_row(SHAREHOLDER_TABLE, ["", "", "", "", postal, "", ""])))
+    rows += [(None, [(0.05, 0.9, line)]) for line in TAIL_LINES]
+
+    pages = max(1, pages)
+    per_page = -(-len(rows) // pages)
+    step = (PAGE_BOTTOM - PAGE_TOP) / (per_page + 1)  # + a repeated header
+    lines = []
+    for page in range(pages):
+        chunk = rows[page * per_page:(page + 1) * per_page]
+        if page and chunk and chunk[0][0] is not None and chunk[0][0] is not chunk[0][1]:
+            chunk = [(None, chunk[0][0])] + chunk
+        for i, (_, cells) in enumerate(chunk):
+            top = PAGE_TOP + i * step
+            lines += [Line(page + 1, top, left, width, step * 0.6, text) for left, width, text in cells]
+        for i, text in enumerate(_footer(page, pages, seed)):
+            lines.append(Line(page + 1, 0.94 + 0.025 * i, 0.05, 0.5, 0.015, text))
+    text = "\n".join(line.text for line in sorted(lines, key=lambda l: (l.page, l.top, l.left)))
+    return text, lines
+
+
+# ---------- timings ----------
+def time_extractors(texts, repeat=3, extractors=None):
+    """
+    Best-of-``repeat`` wall time per extractor over all ``texts``.
+    Returns ``{name: {"seconds", "per_doc_ms", "docs_per_sec"}}``.
+    """
+    results = {}
+    for name, fn in (extractors or EXTRACTORS).items():
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for text in texts:
+                fn(text)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = {
+            "seconds": best,
+            "per_doc_ms": best * 1000 / len(texts),
+            "docs_per_sec": len(texts) / best if best else float("inf"),
+        }
+    return results
+
+
+# ---------- catastrophic backtracking ----------
+def _uppercase_run(lines):
+    return [f"ALPHA BETA GAMMA {'X' * (i % 7)}" for i in range(lines)]
+
+
+def worst_case_inputs(size=400):
+    """
+    Adversarial documents that used to trigger super-linear regex
+    backtracking. ``size`` scales the number of records / lines.
+    """
+    return {
+        "shareholders_without_ordinary_tail": (
+            "extract_shareholders_section",
+            synthetic_profile(officers=5, shareholders=size, pages=size // 20 + 1,
+                              ordinary_label="Ordinary (Number)"),
+        ),
+        "shareholders_uppercase_run": (
+            "extract_shareholders_section",
+            "\n".join(["Shareholder(s)"] + _uppercase_run(size * 2)
+                      + ["Ordinary(Number) 100 Currency SINGAPORE, DOLLARS"]),
+        ),
+        "officers_uppercase_run": (
+            "extract_officers_section",
+            "\n".join(["Officers/Authorised Representative(s)"] + _uppercase_run(size * 2) + ["S1234567A"]),
+        ),
+        "unterminated_sections": (
+            "extract_entities",
+            "\n".join(["Capital", "Issued Share Capital", "Registered Office Address :"]
+                      + _uppercase_run(size * 2) + ["Abbreviation"] + _uppercase_run(size)),
+        ),
+        "large_profile": (
+            "extract_entities",
+            synthetic_profile(officers=size, shareholders=size, pages=size // 10 + 1),
+        ),
+    }
+
+
+def _run_extractor(name, text, conn):
+    started = time.perf_counter()
+    EXTRACTORS[name](text)
+    conn.send(time.perf_counter() - started)
+
+
+def check_worst_case(size=400, budget=2.0):
+    """
+    Run each adversarial input in a child process and kill it after
+    ``budget`` seconds. Returns ``{case: seconds or None}`` where None
+    means the extractor blew the budget.
+    """
+    results = {}
+    ctx = multiprocessing.get_context("fork")
+    for case, (extractor, text) in worst_case_inputs(size).items():
+        parent, child = ctx.Pipe(duplex=False)
+        proc = ctx.Process(target=_run_extractor, args=(extractor, text, child))
+        proc.start()
+        proc.join(budget)
+        if proc.is_alive():
+            proc.terminate()
+            proc.join()
+            results[case] = None
+        else:
+            results[case] = parent.recv() if parent.poll() else None
+    return results
+
+
+# ---------- golden outputs ----------
+GOLDEN_CASES = {
+    "small_profile": dict(officers=2, shareholders=2, pages=2, seed=1),
+    "medium_profile": dict(officers=12, shareholders=25, pages=5, seed=2),
+    "large_profile": dict(officers=60, shareholders=150, pages=20, seed=3),
+    "no_shareholders": dict(officers=3, shareholders=0, pages=1, seed=4),
+}
+# Cases with LINE geometry (synthetic_layout): the tables come from layout.py
+GOLDEN_LAYOUT_CASES = {
+    "layout_profile": dict(officers=5, shareholders=8, pages=3, seed=5),
+}
+
+
+def write_golden():
+    """Regenerate the golden fixtures from the current extractors."""
+    GOLDEN_DIR.mkdir(exist_ok=True)
+    written = []
+    cases = [(case, params, synthetic_profile(**params), None) for case, params in GOLDEN_CASES.items()]
+    cases += [(case, params, *synthetic_layout(**params)) for case, params in GOLDEN_LAYOUT_CASES.items()]
+    for case, params, text, lines in cases:
+        golden = {"params": params, "text": text, "entities": extract_entities(text, lines=lines)}
+        if lines is not None:
+            golden["lines"] = [list(line) for line in lines]
+        path = GOLDEN_DIR / f"{case}.json"
+        path.write_text(json.dumps(golden, indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+        written.append(path)
+    return written
+
+
+def check_golden():
+    """
+    Compare extract_entities() (with the fixture's LINE geometry, if any)
+    against every golden fixture.
+    Returns ``{case: [differing top-level sections]}`` (empty list = match).
+    """
+    results = {}
+    for path in sorted(GOLDEN_DIR.glob("*.json")):
+        golden = json.loads(path.read_text(encoding="utf-8"))
+        lines = [Line(*line) for line in golden["lines"]] if "lines" in golden else None
+        actual = extract_entities(golden["text"], lines=lines)
+        results[path.stem] = [
+            section for section in golden["entities"]
+            if actual.get(section) != golden["entities"][section]
+        ]
+    return results
@@ -0,0 +1,176 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import raw_output
+from .models import Document, OCRResult
+from .utils import EXTRACTOR_VERSION, refresh_entities
+
+
+# ===============================
+# Content-hash OCR result cache
+# ===============================
+# Identical uploads (same bytes) produce identical Textract output, so the
+# result of the first run is stored under sha256(content) + EXTRACTOR_VERSION
+# and every later duplicate is answered from the table instead of paying for
+# another S3 upload and Textract job. Bumping EXTRACTOR_VERSION invalidates
+# the parsed entities but not the OCR text (see ``lookup``).
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_upload(fileobj):
+    """
+    Stream ``fileobj`` through SHA-256 chunk by chunk and rewind it so it can
+    be uploaded afterwards. Works with Django UploadedFile and plain files.
+    """
+    digest = hashlib.sha256()
+    if hasattr(fileobj, "chunks"):
+        for chunk in fileobj.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    else:
+        for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def _fresh_after():
+    return timezone.now() - timedelta(days=settings.OCR_RESULT_CACHE_TTL_DAYS)
+
+
+def lookup(content_hash):
+    """
+    Return the cached OCRResult for ``content_hash`` or None on a miss.
+    Expired entries are treated as misses and left for ``prune``.
+
+    When the same bytes were only cached by an older extractor version the
+    stale sections are re-parsed from the stored OCR text (and, with
+    OCR_LAYOUT_ROWS, the stored LINE geometry of an earlier run), so
+    bumping a section version never costs another Textract job.
+    """
+    if not content_hash:
+        return None
+    fresh = OCRResult.objects.filter(content_hash=content_hash, created_at__gte=_fresh_after())
+    entry = fresh.filter(extractor_version=EXTRACTOR_VERSION).first()
+    if entry is None:
+        older = fresh.order_by("-created_at").first()
+        if older is None:
+            return None
+        text = older.extracted_text or ""
+        entities, versions, failed = None, None, []
+        if text.strip():
+            entities, versions, failed = refresh_entities(
+                text, older.entities, older.entity_versions, lines=_stored_lines(content_hash)
+            )
+        if failed:
+            # Serve the partial refresh, but keep it out of the current
+            # version so the next duplicate tries again; the failed sections
+            # keep their old versions, so reextract_entities retries them too
+            _touch(older)
+            return OCRResult(
+                content_hash=content_hash,
+                extractor_version=older.extractor_version,
+                s3_key=older.s3_key,
+                extracted_text=older.extracted_text,
+                entities=entities,
+                entity_versions=versions,
+            )
+        entry, _ = OCRResult.objects.get_or_create(
+            content_hash=content_hash,
+            extractor_version=EXTRACTOR_VERSION,
+            defaults={
+                "s3_key": older.s3_key,
+                "extracted_text": older.extracted_text,
+                "entities": entities,
+                "entity_versions": versions,
+            },
+        )
+
+    _touch(entry)
+    return entry
+
+
+def _touch(entry):
+    entry.hit_count += 1
+    entry.last_used_at = timezone.now()
+    entry.save(update_fields=["hit_count", "last_used_at"])
+
+
+def _stored_lines(content_hash):
+    """LINE geometry of an earlier Textract run of the same bytes, or None."""
+    if not (settings.OCR_LAYOUT_ROWS and raw_output.enabled()):
+        return None
+    key = (
+        Document.objects.filter(content_hash=content_hash).exclude(textract_output="")
+        .order_by("-id").values_list("textract_output", flat=True).first()
+    )
+    if not key:
+        return None
+    try:
+        return raw_output.layout_lines(key)
+    except Exception as exc:
+        print(f"Could not load raw Textract output {key}, using text: {exc}")
+        return None
+
+
+def store(doc):
+    """Remember the result of a successfully processed document."""
+    if not doc.content_hash or doc.status != "done":
+        return None
+    entry, _ = OCRResult.objects.update_or_create(
+        content_hash=doc.content_hash,
+        extractor_version=EXTRACTOR_VERSION,
+        defaults={
+            "s3_key": doc.s3_key,
+            "extracted_text": doc.extracted_text,
+            "entities": doc.entities,
+            "entity_versions": doc.entity_versions,
+            "created_at": timezone.now(),
+            "last_used_at": timezone.now(),
+        },
+    )
+    return entry
+
+
+def apply(doc, entry):
+    """Fill ``doc`` from a cache entry and mark it done."""
+    doc.s3_key = entry.s3_key
+    doc.extracted_text = entry.extracted_text
+    doc.entities = entry.entities
+    doc.entity_versions = entry.entity_versions
+    doc.status = "done"
+    doc.stage = ""
+    return doc
+
+
+def prune(ttl_days=None, max_entries=None):
+    """
+    Evict entries older than the TTL, entries from older extractor versions
+    that have already been re-parsed, and the least recently used entries
+    beyond ``max_entries``. Returns the number of deleted rows.
+    """
+    ttl_days = settings.OCR_RESULT_CACHE_TTL_DAYS if ttl_days is None else ttl_days
+    max_entries = settings.OCR_RESULT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+
+    expired_before = timezone.now() - timedelta(days=ttl_days)
+    deleted, _ = OCRResult.objects.filter(created_at__lt=expired_before).delete()
+    current = OCRResult.objects.filter(extractor_version=EXTRACTOR_VERSION).values("content_hash")
+    superseded, _ = (
+        OCRResult.objects.exclude(extractor_version=EXTRACTOR_VERSION)
+        .filter(content_hash__in=current)
+        .delete()
+    )
+    deleted += superseded
+
+    overflow = OCRResult.objects.count() - max_entries
+    if overflow > 0:
+        lru_ids = list(
+            OCRResult.objects.order_by("last_used_at").values_list("id", flat=True)[:overflow]
+        )
+        trimmed, _ = OCRResult.objects.filter(id__in=lru_ids).delete()
+        deleted += trimmed
+
+    return deleted
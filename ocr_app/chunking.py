@@ -0,0 +1,37 @@
+import io
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # optional: without pypdf large PDFs run as a single Textract job
+    PdfReader = None
+    PdfWriter = None
+
+
+# ===============================
+# Page-range chunking for Textract
+# ===============================
+# Textract processes one async job end to end, so a long filing's latency
+# grows with its page count. Splitting it into page-range PDFs lets the
+# chunks run as parallel jobs (see ``pipeline.textract_chunked``); the LINE
+# text is stitched back together in chunk order, i.e. page order.
+
+def can_split():
+    return PdfReader is not None
+
+
+def split_pdf(fileobj, pages_per_chunk):
+    """
+    Yield ``(first_page, last_page, pdf_bytes)`` for consecutive page
+    ranges of ``pages_per_chunk`` pages (1-based, inclusive). Chunks are
+    produced one at a time so only one is held in memory.
+    """
+    reader = PdfReader(fileobj)
+    total = len(reader.pages)
+    for start in range(0, total, pages_per_chunk):
+        end = min(start + pages_per_chunk, total)
+        writer = PdfWriter()
+        for page in reader.pages[start:end]:
+            writer.add_page(page)
+        buf = io.BytesIO()
+        writer.write(buf)
+        yield start + 1, end, buf.getvalue()
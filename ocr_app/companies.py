@@ -0,0 +1,129 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Company, Officer, Shareholder
+
+
+# ===============================
+# Normalized companies / officers / shareholders
+# ===============================
+# ``Document.entities`` is a JSON blob per filing; answering "where is this
+# NRIC a director or shareholder?" from it means decoding every document.
+# Each parsed document is therefore also written to indexed Company /
+# Officer / Shareholder rows (bulk inserts, one transaction per batch).
+
+PARTICULARS = "The Following Are The Brief Particulars of :"
+OFFICERS = "Officers / Authorised Representative(s)"
+SHAREHOLDERS = "Shareholder(s)"
+
+EMPTY_VALUES = ("", "—")
+
+
+def normalize_name(value):
+    """Upper-case, single-spaced form used for storage and name lookups."""
+    return " ".join(str(value or "").split()).upper()
+
+
+def normalize_id(value):
+    return "".join(str(value or "").split()).upper()
+
+
+def _value(value):
+    value = " ".join(str(value or "").split())
+    return "" if value in EMPTY_VALUES else value
+
+
+def _shares(value):
+    digits = _value(value).replace(",", "")
+    return int(digits) if digits.isdigit() else None
+
+
+def _rows(entities, key):
+    rows = (entities or {}).get(key)
+    return [row for row in rows if isinstance(row, dict)] if isinstance(rows, list) else []
+
+
+def registration_no(entities):
+    particulars = (entities or {}).get(PARTICULARS) or {}
+    return normalize_id(_value(particulars.get("Registration No.")))
+
+
+def _upsert_companies(docs):
+    """Create/refresh one Company per registration number; newest document wins."""
+    latest = {}
+    for doc in docs:
+        reg_no = registration_no(doc.entities)
+        if reg_no and (reg_no not in latest or doc.pk > latest[reg_no].pk):
+            latest[reg_no] = doc
+    if not latest:
+        return {}
+
+    Company.objects.bulk_create(
+        [Company(registration_no=reg_no) for reg_no in latest],
+        ignore_conflicts=True,
+    )
+    companies = Company.objects.in_bulk(list(latest), field_name="registration_no")
+    changed = []
+    for reg_no, doc in latest.items():
+        company = companies[reg_no]
+        if company.document_id is not None and company.document_id > doc.pk:
+            continue  # an older filing must not overwrite a newer one
+        particulars = doc.entities.get(PARTICULARS) or {}
+        company.name = normalize_name(_value(particulars.get("Company Name.")))[:255]
+        company.company_type = _value(particulars.get("Company Type"))[:255]
+        company.status = _value(particulars.get("Status"))[:100]
+        company.incorporation_date = _value(particulars.get("Incorporation Date."))[:20]
+        company.document_id = doc.pk
+        company.updated_at = timezone.now()
+        changed.append(company)
+    Company.objects.bulk_update(
+        changed, ["name", "company_type", "status", "incorporation_date", "document", "updated_at"]
+    )
+    return companies
+
+
+def sync_documents(docs):
+    """
+    Replace the normalized rows of ``docs`` (saved Documents with parsed
+    entities) in bulk. Returns ``(officers, shareholders)`` row counts.
+    """
+    docs = [doc for doc in docs if doc.pk]
+    if not docs:
+        return 0, 0
+
+    with transaction.atomic():
+        doc_ids = [doc.pk for doc in docs]
+        Officer.objects.filter(document_id__in=doc_ids).delete()
+        Shareholder.objects.filter(document_id__in=doc_ids).delete()
+        companies = _upsert_companies([doc for doc in docs if doc.entities])
+
+        officers, shareholders = [], []
+        for doc in docs:
+            company = companies.get(registration_no(doc.entities))
+            for row in _rows(doc.entities, OFFICERS):
+                officers.append(Officer(
+                    document_id=doc.pk,
+                    company=company,
+                    name=normalize_name(_value(row.get("Name")))[:255],
+                    person_id=normalize_id(_value(row.get("ID")))[:50],
+                    nationality=_value(row.get("Nationality / Citizenship"))[:255],
+                    source_of_address=_value(row.get("Source of Address"))[:50],
+                    address=_value(row.get("Address")),
+                    position=_value(row.get("Position Held"))[:100],
+                    appointment_date=_value(row.get("Date of Appointment"))[:20],
+                ))
+            for row in _rows(doc.entities, SHAREHOLDERS):
+                shareholders.append(Shareholder(
+                    document_id=doc.pk,
+                    company=company,
+                    name=normalize_name(_value(row.get("Name")))[:255],
+                    person_id=normalize_id(_value(row.get("ID")))[:50],
+                    nationality=_value(row.get("Nationality / Citizenship / Place of Incorporation"))[:255],
+                    source_of_address=_value(row.get("Source of Address"))[:50],
+                    address=_value(row.get("Address")),
+                    shares=_shares(row.get("Ordinary (Number)")),
+                    currency=_value(row.get("Currency"))[:255],
+                ))
+        Officer.objects.bulk_create(officers, batch_size=1000)
+        Shareholder.objects.bulk_create(shareholders, batch_size=1000)
+    return len(officers), len(shareholders)
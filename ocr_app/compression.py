@@ -0,0 +1,136 @@
+import json
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+try:
+    import zstandard
+except ImportError:  # optional: without zstandard "zstd" falls back to zlib
+    zstandard = None
+
+
+# ===============================
+# Compressed text / JSON columns
+# ===============================
+# OCR text and entities are the bulk of the documents table: whole filings
+# of Textract LINE text plus entities JSON repeating keys like
+# "Nationality / Citizenship / Place of Incorporation" on every row. They
+# are stored in binary columns as one codec byte followed by the payload,
+# so the model (and everything built on it: serializers, templates, the
+# cache) sees plain ``str`` / ``dict`` values.
+#
+# OCR_STORAGE_COMPRESSION picks the codec for new writes; every row keeps
+# the codec it was written with and is decoded by its marker, so the
+# setting can be changed at any time (``manage.py compress_documents``
+# rewrites existing rows).
+
+PLAIN, ZLIB, ZSTD = b"\x00", b"\x01", b"\x02"
+CODECS = {"": PLAIN, "zlib": ZLIB, "zstd": ZSTD}
+NAMES = {marker: name or "plain" for name, marker in CODECS.items()}
+MIN_BYTES = 256  # smaller payloads gain nothing and are stored as is
+
+_warned = False
+
+
+def codec():
+    """The codec name new values are written with."""
+    global _warned
+    name = settings.OCR_STORAGE_COMPRESSION
+    if name not in CODECS:
+        raise ValueError(f"Unknown OCR_STORAGE_COMPRESSION {name!r} (use '', 'zlib' or 'zstd')")
+    if name == "zstd" and zstandard is None:
+        if not _warned:
+            print("OCR_STORAGE_COMPRESSION=zstd but zstandard is not installed, using zlib")
+            _warned = True
+        return "zlib"
+    return name
+
+
+def compress(data, name=None, level=None):
+    """``data`` (bytes) as a codec-prefixed blob."""
+    name = codec() if name is None else name
+    level = level or settings.OCR_STORAGE_COMPRESSION_LEVEL
+    if not name or len(data) < MIN_BYTES:
+        return PLAIN + data
+    if name == "zstd":
+        return ZSTD + zstandard.ZstdCompressor(level=level or 3).compress(data)
+    return ZLIB + zlib.compress(data, level or 6)
+
+
+def decompress(blob):
+    """The bytes stored in a codec-prefixed ``blob``."""
+    blob = bytes(blob)  # memoryview on PostgreSQL
+    marker, payload = blob[:1], blob[1:]
+    if marker == PLAIN:
+        return payload
+    if marker == ZLIB:
+        return zlib.decompress(payload)
+    if marker == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Value is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    raise ValueError(f"Unknown compression marker {marker!r}")
+
+
+def codec_of(blob):
+    """Codec name of a stored blob ("plain", "zlib" or "zstd")."""
+    return NAMES.get(bytes(blob[:1]), "unknown")
+
+
+def dump_json(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class CompressedTextField(models.BinaryField):
+    """A text column stored compressed; reads and writes ``str``."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("editable", True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        # BinaryField defaults to editable=False; this field defaults to True
+        if kwargs.pop("editable", None) is None:
+            kwargs["editable"] = False
+        return name, path, args, kwargs
+
+    def encode(self, value):
+        return value.encode("utf-8")
+
+    def decode(self, data):
+        return data.decode("utf-8")
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else self.decode(decompress(value))
+
+    def to_python(self, value):
+        # Fixtures and forms hand over the serialized (text) form
+        if value is None or not isinstance(value, (bytes, memoryview)):
+            return value
+        return self.decode(decompress(value))
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        return super().get_db_prep_value(compress(self.encode(value)), connection, prepared)
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        return None if value is None else self.encode(value).decode("utf-8")
+
+
+class CompressedJSONField(CompressedTextField):
+    """A JSON column stored compressed; reads and writes Python objects."""
+
+    def encode(self, value):
+        return dump_json(value)
+
+    def decode(self, data):
+        return json.loads(data)
+
+    def to_python(self, value):
+        if isinstance(value, str):
+            return json.loads(value)
+        return super().to_python(value)
@@ -0,0 +1,280 @@
+import io
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+from functools import lru_cache
+from types import SimpleNamespace
+
+from botocore.exceptions import ClientError
+from botocore.hooks import HierarchicalEmitter
+from django.conf import settings
+
+from .pdf import count_pages
+
+
+# ===============================
+# Offline AWS stand-ins
+# ===============================
+# For load tests without AWS (see the ``loadtest`` command): with
+# AWS_FAKE_SERVICES=s3,textract, ``aws.get_client`` returns these instead
+# of boto3 clients. They implement only the calls the pipeline makes.
+#
+# - FakeS3 keeps objects as files under AWS_FAKE_S3_DIR, so the web and
+#   worker processes see the same bucket.
+# - FakeTextract finishes a job AWS_FAKE_TEXTRACT_BASE_SECONDS plus
+#   AWS_FAKE_TEXTRACT_SECONDS_PER_PAGE per page after it was started and
+#   serves synthetic ACRA profile LINE blocks (benchmarks.synthetic_layout),
+#   paginated by MaxResults. The job id carries the page count, due time and
+#   outcome, so any process can answer for it. A fraction of calls is
+#   throttled (AWS_FAKE_TEXTRACT_THROTTLE_RATE) and of jobs fails
+#   (AWS_FAKE_TEXTRACT_FAILURE_RATE).
+#
+# Both emit botocore's before-call / after-call events, so the pool metrics
+# (aws.PoolMetrics) count their calls like real clients.
+
+FAKE_SERVICES = ("s3", "textract")
+
+
+def client_error(code, operation, message=""):
+    return ClientError({"Error": {"Code": code, "Message": message or code}}, operation)
+
+
+class FakeClient:
+    service = None
+
+    def __init__(self):
+        self.meta = SimpleNamespace(
+            events=HierarchicalEmitter(),
+            config=SimpleNamespace(max_pool_connections=settings.AWS_MAX_POOL_CONNECTIONS),
+        )
+
+    def _call(self, operation, latency, fn, *args, **kwargs):
+        context = {}
+        events = self.meta.events
+        events.emit(f"before-call.{self.service}.{operation}", context=context)
+        try:
+            if latency:
+                time.sleep(latency)
+            result = fn(*args, **kwargs)
+        except ClientError:
+            events.emit(
+                f"after-call.{self.service}.{operation}",
+                context=context,
+                http_response=SimpleNamespace(status_code=400),
+            )
+            raise
+        except Exception:
+            events.emit(f"after-call-error.{self.service}.{operation}", context=context)
+            raise
+        events.emit(
+            f"after-call.{self.service}.{operation}",
+            context=context,
+            http_response=SimpleNamespace(status_code=200),
+        )
+        return result
+
+
+# ---------- S3 ----------
+class FakeS3(FakeClient):
+    """Bucket objects as files under AWS_FAKE_S3_DIR/<bucket>/<key>."""
+
+    service = "s3"
+
+    def _path(self, bucket, key):
+        return os.path.join(settings.AWS_FAKE_S3_DIR, bucket or "bucket", key)
+
+    def _write(self, path, fileobj):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as out:
+            shutil.copyfileobj(fileobj, out)
+        os.replace(tmp, path)
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None, Config=None, Callback=None):
+        self._call("PutObject", settings.AWS_FAKE_S3_LATENCY, self._write, self._path(Bucket, Key), Fileobj)
+
+    def download_fileobj(self, Bucket, Key, Fileobj, ExtraArgs=None, Config=None, Callback=None):
+        def download():
+            try:
+                with open(self._path(Bucket, Key), "rb") as src:
+                    shutil.copyfileobj(src, Fileobj)
+            except FileNotFoundError:
+                raise client_error("404", "HeadObject", "Not Found")
+        self._call("GetObject", settings.AWS_FAKE_S3_LATENCY, download)
+
+    def delete_object(self, Bucket, Key):
+        def delete():
+            try:
+                os.remove(self._path(Bucket, Key))
+            except FileNotFoundError:
+                pass
+            return {}
+        return self._call("DeleteObject", settings.AWS_FAKE_S3_LATENCY, delete)
+
+    def delete_objects(self, Bucket, Delete):
+        def delete():
+            for obj in Delete["Objects"]:
+                try:
+                    os.remove(self._path(Bucket, obj["Key"]))
+                except FileNotFoundError:
+                    pass
+            return {"Deleted": [] if Delete.get("Quiet") else Delete["Objects"]}
+        return self._call("DeleteObjects", settings.AWS_FAKE_S3_LATENCY, delete)
+
+    def _parts_dir(self, bucket, upload_id):
+        return self._path(bucket, f".multipart/{upload_id}")
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        def create():
+            upload_id = uuid.uuid4().hex
+            os.makedirs(self._parts_dir(Bucket, upload_id))
+            return {"Bucket": Bucket, "Key": Key, "UploadId": upload_id}
+        return self._call("CreateMultipartUpload", settings.AWS_FAKE_S3_LATENCY, create)
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        path = os.path.join(self._parts_dir(Bucket, UploadId), f"{PartNumber:05d}")
+        self._call("UploadPart", settings.AWS_FAKE_S3_LATENCY, self._write, path, io.BytesIO(Body))
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        def complete():
+            parts_dir = self._parts_dir(Bucket, UploadId)
+            with io.BytesIO() as combined:
+                for part in sorted(MultipartUpload["Parts"], key=lambda p: p["PartNumber"]):
+                    with open(os.path.join(parts_dir, f"{part['PartNumber']:05d}"), "rb") as src:
+                        shutil.copyfileobj(src, combined)
+                combined.seek(0)
+                self._write(self._path(Bucket, Key), combined)
+            shutil.rmtree(parts_dir, ignore_errors=True)
+            return {"Bucket": Bucket, "Key": Key}
+        return self._call("CompleteMultipartUpload", settings.AWS_FAKE_S3_LATENCY, complete)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        shutil.rmtree(self._parts_dir(Bucket, UploadId), ignore_errors=True)
+        return {}
+
+
+# ---------- Textract ----------
+@lru_cache(maxsize=64)
+def canned_blocks(pages):
+    """
+    PAGE and LINE blocks of a synthetic ``pages``-page business profile,
+    with its tables laid out in columns (so OCR_LAYOUT_ROWS has geometry
+    to work with), in reading order.
+    """
+    from .benchmarks import synthetic_layout  # imports the extractors; only needed here
+
+    _, lines = synthetic_layout(officers=2 * pages, shareholders=3 * pages, pages=pages, seed=pages)
+    blocks = [{"BlockType": "PAGE", "Id": f"page-{page}", "Page": page} for page in range(1, pages + 1)]
+    for i, line in enumerate(sorted(lines, key=lambda l: (l.page, l.top, l.left))):
+        blocks.append({
+            "BlockType": "LINE",
+            "Id": f"line-{i}",
+            "Page": line.page,
+            "Text": line.text,
+            "Confidence": 99.0,
+            "Geometry": {"BoundingBox": {
+                "Top": line.top, "Left": line.left, "Width": line.width, "Height": line.height,
+            }},
+        })
+    return blocks
+
+
+class FakeTextract(FakeClient):
+    service = "textract"
+
+    def _throttle(self, operation):
+        if random.random() < settings.AWS_FAKE_TEXTRACT_THROTTLE_RATE:
+            raise client_error("ThrottlingException", operation, "Rate exceeded")
+
+    def _document_pages(self, location):
+        from .aws import get_client
+
+        s3_object = location["S3Object"]
+        with io.BytesIO() as pdf:
+            get_client("s3").download_fileobj(s3_object["Bucket"], s3_object["Name"], pdf)
+            pdf.seek(0)
+            return count_pages(pdf) or 1
+
+    def start_document_text_detection(self, DocumentLocation, NotificationChannel=None, **kwargs):
+        def start():
+            self._throttle("StartDocumentTextDetection")
+            pages = self._document_pages(DocumentLocation)
+            delay = settings.AWS_FAKE_TEXTRACT_BASE_SECONDS + settings.AWS_FAKE_TEXTRACT_SECONDS_PER_PAGE * pages
+            outcome = "F" if random.random() < settings.AWS_FAKE_TEXTRACT_FAILURE_RATE else "S"
+            job_id = f"fake-{pages}-{int((time.time() + delay) * 1000)}-{outcome}-{uuid.uuid4().hex[:12]}"
+            if settings.TEXTRACT_NOTIFICATIONS == "local":
+                from .poller import local_notifications
+
+                status = "FAILED" if outcome == "F" else "SUCCEEDED"
+                timer = threading.Timer(delay, local_notifications.publish, (job_id, status))
+                timer.daemon = True
+                timer.start()
+            return {"JobId": job_id}
+        return self._call("StartDocumentTextDetection", settings.AWS_FAKE_TEXTRACT_CALL_LATENCY, start)
+
+    def get_document_text_detection(self, JobId, MaxResults=1000, NextToken=None):
+        def get():
+            self._throttle("GetDocumentTextDetection")
+            try:
+                _, pages, due_ms, outcome, _ = JobId.split("-")
+                pages, due_ms = int(pages), int(due_ms)
+            except ValueError:
+                raise client_error("InvalidJobIdException", "GetDocumentTextDetection", "Invalid JobId")
+            if time.time() * 1000 < due_ms:
+                return {"JobStatus": "IN_PROGRESS"}
+            if outcome == "F":
+                return {"JobStatus": "FAILED", "StatusMessage": "Simulated failure"}
+            blocks = canned_blocks(pages)
+            start = int(NextToken or 0)
+            resp = {
+                "DocumentMetadata": {"Pages": pages},
+                "JobStatus": "SUCCEEDED",
+                "Blocks": blocks[start:start + MaxResults],
+            }
+            if start + MaxResults < len(blocks):
+                resp["NextToken"] = str(start + MaxResults)
+            return resp
+        return self._call("GetDocumentTextDetection", settings.AWS_FAKE_TEXTRACT_CALL_LATENCY, get)
+
+    def detect_document_text(self, Document):
+        def detect():
+            self._throttle("DetectDocumentText")
+            time.sleep(settings.AWS_FAKE_TEXTRACT_SECONDS_PER_PAGE)
+            return {"DocumentMetadata": {"Pages": 1}, "Blocks": canned_blocks(1)}
+        return self._call("DetectDocumentText", settings.AWS_FAKE_TEXTRACT_CALL_LATENCY, detect)
+
+
+def build_client(service):
+    return {"s3": FakeS3, "textract": FakeTextract}[service]()
+
+
+# ---------- load-test inputs ----------
+def synthetic_pdf(pages, tag=None):
+    """
+    A minimal ``pages``-page PDF (blank pages). ``tag`` goes into the
+    trailer ID so every generated file has its own content hash.
+    """
+    tag = tag or uuid.uuid4().hex
+    kids = " ".join(f"{i} 0 R" for i in range(3, pages + 3))
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>",
+    ] + ["<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >>"] * pages
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /ID [<{tag}> <{tag}>] >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return bytes(out)
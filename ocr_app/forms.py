@@ -2,3 +2,4 @@ from django import forms
 
 class UploadPDFForm(forms.Form):
     pdf_file = forms.FileField(label="Select a PDF file")
+    force_reprocess = forms.BooleanField(required=False, label="Ignore cached result and reprocess")
@@ -0,0 +1,77 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Document
+from .utils import EXTRACTOR_VERSION
+
+
+# ===============================
+# Conditional responses + rendered results
+# ===============================
+# A document only changes through saves that bump ``updated_at`` (status /
+# stage changes, a finished run, re-extraction), so (id, status,
+# updated_at) plus the extractor version is a complete validator for its
+# result page and API views: ``document_etag`` / ``document_last_modified``
+# feed Django's ``condition`` decorator, which answers 304 Not Modified
+# after one small query that never touches the OCR text.
+#
+# The rendered result page and detail JSON of done documents are kept in
+# the default cache for OCR_RENDER_CACHE_SECONDS under their ETag, so a
+# repeat view by another client skips loading, decoding and rendering the
+# text. A stale entry never matches the current ETag; ``invalidate`` drops
+# them right away when a document is reprocessed.
+
+RENDER_KINDS = ("html", "json")
+
+
+def document_version(request, pk):
+    """``(status, updated_at)`` of document ``pk`` (None if missing), once per request."""
+    cached = getattr(request, "_ocr_document_version", None)
+    if cached is None or cached[0] != pk:
+        row = Document.objects.filter(pk=pk).values_list("status", "updated_at").first()
+        cached = (pk, row)
+        request._ocr_document_version = cached
+    return cached[1]
+
+
+def document_etag(request, pk, **kwargs):
+    row = document_version(request, pk)
+    if row is None:
+        return None
+    status, updated_at = row
+    return hashlib.sha1(f"{pk}:{status}:{updated_at.isoformat()}:{EXTRACTOR_VERSION}".encode()).hexdigest()
+
+
+def document_last_modified(request, pk, **kwargs):
+    row = document_version(request, pk)
+    return row[1] if row else None
+
+
+def _key(kind, pk):
+    return f"ocr:rendered:{kind}:{pk}"
+
+
+def cached_render(kind, request, pk, build):
+    """
+    ``build()`` for document ``pk``, reused from the cache while the
+    document is done and its ETag unchanged.
+    """
+    row = document_version(request, pk)
+    timeout = settings.OCR_RENDER_CACHE_SECONDS
+    if not timeout or row is None or row[0] != "done":
+        return build()
+    etag = document_etag(request, pk)
+    cache = caches["default"]
+    hit = cache.get(_key(kind, pk))
+    if hit is not None and hit[0] == etag:
+        return hit[1]
+    payload = build()
+    cache.set(_key(kind, pk), (etag, payload), timeout)
+    return payload
+
+
+def invalidate(pk):
+    """Drop the rendered results of document ``pk``."""
+    caches["default"].delete_many([_key(kind, pk) for kind in RENDER_KINDS])
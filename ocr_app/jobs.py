@@ -0,0 +1,243 @@
+import os
+import socket
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Document
+
+
+# ===============================
+# DB-backed job queue
+# ===============================
+# Documents double as queue entries: an upload creates a row with
+# status="queued", a worker claims it (status="processing" + lease) and
+# ``process_pdf_s3`` finishes it as "done" or "failed". A lease that is not
+# refreshed within OCR_JOB_LEASE_SECONDS is treated as abandoned (worker
+# crashed or was killed) and the row becomes claimable again. Leases held
+# by dead processes of this host are released at once by
+# ``recover_orphans``; either way the document reattaches to the Textract
+# jobs recorded on it (see pipeline.remember_job).
+
+RECOVERY_INTERVAL = 60  # seconds between orphan sweeps of an idle worker
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(doc):
+    """Put a freshly created document on the queue."""
+    doc.status = "queued"
+    doc.stage = ""
+    doc.error = None
+    doc.locked_by = ""
+    doc.locked_at = None
+    doc.save()
+    return doc
+
+
+def claim_inline(doc, worker_id=None):
+    """
+    Save a new document as already claimed by this process (the async API
+    runs its Textract job in-request). If the process dies, the lease goes
+    stale and a worker picks the document up like any other.
+    """
+    doc.status = "processing"
+    doc.stage = "claimed"
+    doc.error = None
+    doc.attempts = 1
+    doc.locked_by = worker_id or worker_name()
+    doc.locked_at = timezone.now()
+    doc.save()
+    return doc
+
+
+def claim_next(worker_id):
+    """
+    Atomically claim the oldest claimable document for ``worker_id``.
+    Returns the claimed Document or None when the queue is empty.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.OCR_JOB_LEASE_SECONDS)
+    claimable = Q(status="queued") | Q(status="processing", locked_at__lt=stale_before)
+
+    with transaction.atomic():
+        candidate = (
+            Document.objects.select_for_update(skip_locked=True)
+            .filter(claimable)
+            .order_by("id")
+            .only("id")
+            .first()
+        )
+        if candidate is None:
+            return None
+
+        # Conditional update: two workers never claim the same row, even on
+        # backends without SELECT ... FOR UPDATE SKIP LOCKED. SQLite still
+        # allows a single writer, so a busy database can raise "database is
+        # locked" here; run_worker backs off and retries.
+        claimed = Document.objects.filter(pk=candidate.pk).filter(claimable).update(
+            status="processing",
+            stage="claimed",
+            locked_by=worker_id,
+            locked_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+    if not claimed:
+        return None
+    return Document.objects.get(pk=candidate.pk)
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    return True
+
+
+def recover_orphans(log=print):
+    """
+    Requeue processing documents leased by processes of this host that no
+    longer exist (a killed or recycled worker / ASGI process) instead of
+    waiting for their lease to expire. Returns the number requeued.
+    """
+    host = socket.gethostname()
+    leases = Document.objects.filter(status="processing", locked_by__startswith=f"{host}:").values_list(
+        "id", "locked_by"
+    )
+    recovered = 0
+    for doc_id, locked_by in leases:
+        try:
+            pid = int(locked_by.rsplit(":", 1)[1])
+        except ValueError:
+            continue
+        if pid == os.getpid() or _process_alive(pid):
+            continue
+        recovered += Document.objects.filter(pk=doc_id, status="processing", locked_by=locked_by).update(
+            status="queued", stage="", locked_by="", locked_at=None, updated_at=timezone.now()
+        )
+    if recovered:
+        log(f"Requeued {recovered} document(s) of dead processes on {host}")
+    return recovered
+
+
+def run_job(doc_id):
+    """
+    Process one claimed document. Failures are retried until
+    OCR_JOB_MAX_ATTEMPTS is reached, after which the document is failed.
+    """
+    from .pipeline import process_pdf_s3
+
+    close_old_connections()
+    try:
+        doc = Document.objects.get(pk=doc_id)
+        doc.attempts += 1
+        doc.save(update_fields=["attempts", "updated_at"])
+        try:
+            process_pdf_s3(doc)
+        except Exception as exc:
+            traceback.print_exc()
+            retry_or_fail(doc, exc)
+        else:
+            release(doc)
+        return doc.status
+    finally:
+        # Worker threads each hold their own connection
+        connection.close()
+
+
+def release(doc):
+    """Drop the lease of a processed document."""
+    doc.stage = ""
+    doc.locked_by = ""
+    doc.locked_at = None
+    doc.save(update_fields=["stage", "locked_by", "locked_at", "updated_at"])
+
+
+def retry_or_fail(doc, exc):
+    """Requeue ``doc`` after ``exc`` until OCR_JOB_MAX_ATTEMPTS, then fail it."""
+    retry = doc.attempts < settings.OCR_JOB_MAX_ATTEMPTS
+    doc.status = "queued" if retry else "failed"
+    doc.stage = ""
+    doc.error = f"{type(exc).__name__}: {exc}"
+    doc.locked_by = ""
+    doc.locked_at = None
+    doc.save(update_fields=["status", "stage", "error", "locked_by", "locked_at", "timings", "updated_at"])
+
+
+def _database_error(log, action, exc, poll_interval):
+    log(f"{action} failed, retrying in {poll_interval}s: {type(exc).__name__}: {exc}")
+    close_old_connections()
+    time.sleep(poll_interval)
+
+
+def _recover(log, poll_interval):
+    try:
+        recover_orphans(log)
+    except DatabaseError as exc:
+        _database_error(log, "Orphan recovery", exc, poll_interval)
+
+
+def run_worker(concurrency=None, poll_interval=None, once=False, log=print):
+    """
+    Claim queued documents and drive up to ``concurrency`` of them through
+    Textract at the same time. Each job spends most of its life waiting on
+    Textract, so a thread pool is enough to keep many jobs in flight.
+
+    With ``once=True`` the worker exits as soon as the queue is drained.
+    """
+    concurrency = concurrency or settings.OCR_WORKER_CONCURRENCY
+    poll_interval = poll_interval or settings.OCR_WORKER_POLL_INTERVAL
+    worker_id = worker_name()
+    log(f"OCR worker {worker_id} started with {concurrency} slots")
+    _recover(log, poll_interval)
+    last_recovery = time.monotonic()
+
+    running = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ocr-job") as pool:
+        try:
+            while True:
+                # Fill free slots
+                claimed_any = False
+                try:
+                    while len(running) < concurrency:
+                        doc = claim_next(worker_id)
+                        if doc is None:
+                            break
+                        claimed_any = True
+                        log(f"Claimed document {doc.pk} ({doc.file_name})")
+                        running[pool.submit(run_job, doc.pk)] = doc.pk
+                except DatabaseError as exc:
+                    # Locked / unreachable database: keep the running jobs
+                    # and try again instead of taking the worker down
+                    _database_error(log, "Claiming", exc, poll_interval)
+                    continue
+
+                if once and not running and not claimed_any:
+                    break
+                if not claimed_any and time.monotonic() - last_recovery >= RECOVERY_INTERVAL:
+                    _recover(log, poll_interval)
+                    last_recovery = time.monotonic()
+
+                if running:
+                    done, _ = wait(list(running), timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        doc_id = running.pop(future)
+                        try:
+                            log(f"Document {doc_id} finished: {future.result()}")
+                        except Exception as exc:
+                            log(f"Document {doc_id} crashed: {exc}")
+                else:
+                    time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            log(f"Shutting down, waiting for {len(running)} running job(s)")
+    log(f"OCR worker {worker_id} stopped")
@@ -0,0 +1,229 @@
+import re
+from collections import namedtuple
+
+
+# ===============================
+# Geometry-aware table rows
+# ===============================
+# Textract LINE output order breaks table cells apart: an officer's address
+# lines end up interleaved with the next column, so the text extractors in
+# utils.py need wide multi-line regexes and clean-up passes. When LINE
+# bounding boxes are available (streamed from the job or loaded from the
+# raw output store) the Officers and Shareholder(s) tables are rebuilt from
+# geometry instead: lines are grouped into rows by vertical position,
+# assigned to columns by the x position of the header cells, and a record
+# starts at every row with a value in the ID column. One sort plus a linear
+# pass; no regex runs over more than a single cell.
+#
+# Both extractors return None when the table cannot be recognised, and the
+# text extractor is used instead.
+
+Line = namedtuple("Line", ["page", "top", "left", "width", "height", "text"])
+
+COLUMN_SLACK = 0.01  # page widths a cell may start left of its header
+ID_RE = re.compile(r"^[A-Z0-9]{8,}$")
+DATE_RE = re.compile(r"\d{2}/\d{2}/\d{4}")
+NUMBER_RE = re.compile(r"\d[\d,]*")
+CURRENCY_RE = re.compile(r"Currency\s*(.*)$", re.I)
+FOOTER_RE = re.compile(r"^(?:Page\s*\d+\s*of\s*\d+|Authentication No\..*)$", re.I)
+SECTION_END = ("abbreviation", "note:", "forregistrar")  # compared space-free
+
+OFFICER_COLUMNS = {
+    "name": "Name",
+    "id": "ID",
+    "nationality/citizenship": "Nationality / Citizenship",
+    "sourceofaddress": "Source of Address",
+    "address": "Address",
+    "positionheld": "Position Held",
+    "dateofappointment": "Date of Appointment",
+}
+SHAREHOLDER_COLUMNS = {
+    "name": "Name",
+    "id": "ID",
+    "nationality/citizenship/placeofincorporation": "Nationality / Citizenship / Place of Incorporation",
+    "sourceofaddress": "Source of Address",
+    "address": "Address",
+    "ordinary(number)": "Ordinary (Number)",
+    "currency": "Currency",
+}
+
+
+def _key(text):
+    return "".join(text.split()).lower()
+
+
+# ---------- building lines ----------
+def lines_from_response(resp, page_offset=0):
+    """``Line`` tuples for the LINE blocks of one Textract response."""
+    lines = []
+    for block in resp.get("Blocks", []):
+        if block["BlockType"] != "LINE":
+            continue
+        box = block.get("Geometry", {}).get("BoundingBox")
+        if not box:
+            continue
+        lines.append(Line(
+            block.get("Page", 1) + page_offset,
+            box["Top"], box["Left"], box["Width"], box["Height"],
+            block["Text"],
+        ))
+    return lines
+
+
+def lines_from_responses(responses):
+    """``Line`` tuples of stored responses (see raw_output.iter_responses)."""
+    lines = []
+    for resp in responses:
+        lines.extend(lines_from_response(resp, resp.get("PageOffset", 0)))
+    return lines
+
+
+class LineCollector:
+    """
+    ``iter_textract_lines`` sink that keeps only the LINE geometry of each
+    response page.
+    """
+
+    def __init__(self, page_offset=0):
+        self.page_offset = page_offset
+        self.lines = []
+
+    def write(self, resp):
+        self.lines.extend(lines_from_response(resp, self.page_offset))
+
+
+# ---------- rows / tables ----------
+def group_rows(lines):
+    """
+    Group lines into rows (lists sorted left to right), top to bottom and
+    page by page. A line joins the current row when its vertical centre
+    lies within the row's first line.
+    """
+    rows = []
+    row = None
+    for line in sorted(lines, key=lambda l: (l.page, l.top, l.left)):
+        if row and line.page == row[0].page and line.top + line.height / 2 <= row[0].top + row[0].height:
+            row.append(line)
+        else:
+            row = [line]
+            rows.append(row)
+    for row in rows:
+        row.sort(key=lambda l: l.left)
+    return rows
+
+
+def _section_rows(rows, title):
+    """Rows after the row starting with ``title`` up to the next section."""
+    start = None
+    for i, row in enumerate(rows):
+        first = _key(row[0].text)
+        if start is None:
+            if first.startswith(title):
+                start = i + 1
+        elif first.startswith(SECTION_END) or (first.startswith("shareholder(s)") and title != "shareholder(s)"):
+            return rows[start:i]
+    return rows[start:] if start is not None else []
+
+
+def _header(row, columns):
+    """``[(left, key), ...]`` when ``row`` is the table's header row."""
+    cells = [(line.left, columns[_key(line.text)]) for line in row if _key(line.text) in columns]
+    return cells if len(cells) >= 3 and any(key == "ID" for _, key in cells) else None
+
+
+def _column(header, left):
+    key = None
+    for header_left, header_key in header:
+        if left + COLUMN_SLACK < header_left:
+            break
+        key = header_key
+    return key
+
+
+def table_records(lines, title, columns):
+    """
+    Records of the table under ``title`` as ``{column: [cell lines]}``, or
+    None when no header row with an ID column is found.
+    """
+    rows = _section_rows(group_rows(lines), title)
+    header = None
+    records = []
+    for row in rows:
+        if all(FOOTER_RE.match(line.text.strip()) for line in row):
+            continue
+        row_header = _header(row, columns)
+        if row_header:
+            header = header or row_header  # repeated on every page
+            continue
+        if header is None:
+            continue
+        cells = {}
+        for line in row:
+            if FOOTER_RE.match(line.text.strip()):
+                continue
+            key = _column(header, line.left)
+            if key:
+                cells.setdefault(key, []).append(line.text.strip())
+        if not cells:
+            continue
+        if ID_RE.match(" ".join(cells.get("ID", [])).strip()):
+            records.append(cells)
+        elif records:
+            for key, texts in cells.items():
+                records[-1].setdefault(key, []).extend(texts)
+    return records if header else None
+
+
+def _cell(record, key, sep=" "):
+    value = sep.join(text for text in record.get(key, []) if text)
+    return " ".join(value.split()) or "—"
+
+
+# ---------- section extractors ----------
+def officer_rows(lines):
+    """Officers / Authorised Representative(s) from LINE geometry, or None."""
+    records = table_records(lines, "officers/authorisedrepresentative(s)", OFFICER_COLUMNS)
+    if not records:
+        return None
+    officers = []
+    for record in records:
+        date = DATE_RE.search(_cell(record, "Date of Appointment"))
+        officers.append({
+            "Name": _cell(record, "Name"),
+            "ID": _cell(record, "ID"),
+            "Nationality / Citizenship": _cell(record, "Nationality / Citizenship"),
+            "Source of Address": _cell(record, "Source of Address"),
+            "Address": _cell(record, "Address", sep=", "),
+            "Position Held": _cell(record, "Position Held"),
+            "Date of Appointment": date.group(0) if date else "—",
+        })
+    return officers
+
+
+def shareholder_rows(lines):
+    """Shareholder(s) from LINE geometry, or None."""
+    records = table_records(lines, "shareholder(s)", SHAREHOLDER_COLUMNS)
+    if not records:
+        return None
+    shareholders = []
+    for record in records:
+        ordinary = _cell(record, "Ordinary (Number)")
+        currency = _cell(record, "Currency")
+        # A single LINE may span both columns: "Ordinary(Number) 10 Currency X"
+        spanning = CURRENCY_RE.search(ordinary)
+        if spanning:
+            ordinary = ordinary[:spanning.start()]
+            currency = currency if currency != "—" else spanning.group(1).strip() or "—"
+        number = NUMBER_RE.search(ordinary)
+        shareholders.append({
+            "Name": _cell(record, "Name"),
+            "ID": _cell(record, "ID"),
+            "Nationality / Citizenship / Place of Incorporation": _cell(
+                record, "Nationality / Citizenship / Place of Incorporation"
+            ),
+            "Source of Address": _cell(record, "Source of Address"),
+            "Address": _cell(record, "Address"),
+            "Ordinary (Number)": number.group(0) if number else "—",
+            "Currency": currency,
+        })
+    return shareholders
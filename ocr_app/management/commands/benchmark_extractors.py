@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ocr_app import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the regex entity extractors on synthetic ACRA profiles, "
+        "check them against golden outputs and guard against catastrophic backtracking."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            default="5,50,250",
+            help="Comma-separated officer/shareholder counts per synthetic profile.",
+        )
+        parser.add_argument("--docs", type=int, default=20, help="Profiles generated per scale.")
+        parser.add_argument("--pages", type=int, default=0, help="Pages per profile (default: scale / 10 + 1).")
+        parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best is reported).")
+        parser.add_argument("--worst-case-size", type=int, default=400, help="Records/lines in adversarial inputs.")
+        parser.add_argument("--budget", type=float, default=2.0, help="Seconds allowed per adversarial input.")
+        parser.add_argument("--skip-worst-case", action="store_true", help="Skip the backtracking check.")
+        parser.add_argument("--update-golden", action="store_true", help="Rewrite golden fixtures from current output.")
+
+    def handle(self, *args, **options):
+        failures = []
+
+        # ---------- golden outputs ----------
+        if options["update_golden"]:
+            for path in benchmarks.write_golden():
+                self.stdout.write(f"wrote {path}")
+        self.stdout.write(self.style.MIGRATE_HEADING("Golden outputs"))
+        for case, diffs in benchmarks.check_golden().items():
+            if diffs:
+                failures.append(f"golden {case}")
+                self.stdout.write(self.style.ERROR(f"  {case:<24} MISMATCH in {', '.join(diffs)}"))
+            else:
+                self.stdout.write(f"  {case:<24} ok")
+
+        # ---------- timings ----------
+        for scale in [int(s) for s in options["scales"].split(",") if s.strip()]:
+            pages = options["pages"] or scale // 10 + 1
+            texts = [
+                benchmarks.synthetic_profile(officers=scale, shareholders=scale, pages=pages, seed=seed)
+                for seed in range(options["docs"])
+            ]
+            avg_kb = sum(len(t) for t in texts) / len(texts) / 1024
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{scale} officers + {scale} shareholders, {pages} pages, "
+                f"{len(texts)} docs (~{avg_kb:.0f} KB each)"
+            ))
+            for name, result in benchmarks.time_extractors(texts, repeat=options["repeat"]).items():
+                self.stdout.write(
+                    f"  {name:<32} {result['per_doc_ms']:9.2f} ms/doc {result['docs_per_sec']:10.1f} docs/sec"
+                )
+
+        # ---------- catastrophic backtracking ----------
+        if not options["skip_worst_case"]:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"Worst-case inputs (size {options['worst_case_size']}, budget {options['budget']}s)"
+            ))
+            results = benchmarks.check_worst_case(options["worst_case_size"], options["budget"])
+            for case, seconds in results.items():
+                if seconds is None:
+                    failures.append(f"worst-case {case}")
+                    self.stdout.write(self.style.ERROR(f"  {case:<36} TIMEOUT"))
+                else:
+                    self.stdout.write(f"  {case:<36} {seconds * 1000:9.2f} ms")
+
+        if failures:
+            raise CommandError(f"Extractor benchmark failed: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("All extractor checks passed"))
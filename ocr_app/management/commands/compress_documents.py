@@ -0,0 +1,125 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import BinaryField
+from django.db.models.functions import Cast
+
+from ocr_app import compression
+from ocr_app.models import Document, OCRResult
+
+FIELDS = ("extracted_text", "entities")
+COMPARE_CODECS = [("plain", "", 0), ("zlib-1", "zlib", 1), ("zlib-6", "zlib", 6), ("zlib-9", "zlib", 9)]
+if compression.zstandard is not None:
+    COMPARE_CODECS += [("zstd-3", "zstd", 3), ("zstd-10", "zstd", 10), ("zstd-19", "zstd", 19)]
+
+
+def _raw_rows(model, queryset=None):
+    """(id, raw text blob, raw entities blob) without decoding the columns."""
+    queryset = model.objects.all() if queryset is None else queryset
+    return queryset.annotate(
+        raw_text=Cast("extracted_text", BinaryField()),
+        raw_entities=Cast("entities", BinaryField()),
+    ).order_by("id").values_list("id", "raw_text", "raw_entities")
+
+
+def _size(blob):
+    return len(blob) if blob is not None else 0
+
+
+def _current(blob, target):
+    """Whether ``blob`` is already stored the way ``target`` would store it."""
+    stored = compression.codec_of(blob)
+    return stored == target or (stored == "plain" and len(blob) - 1 < compression.MIN_BYTES)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite stored OCR text and entities with the current OCR_STORAGE_COMPRESSION "
+        "codec, or compare codecs (size / CPU) on a sample with --compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per bulk update.")
+        parser.add_argument("--dry-run", action="store_true", help="Report the savings without writing.")
+        parser.add_argument(
+            "--compare", type=int, default=0, metavar="N",
+            help="Compress the newest N documents with each codec and report sizes and timings.",
+        )
+
+    def handle(self, *args, **options):
+        if options["compare"]:
+            self.compare(options["compare"])
+            return
+        try:
+            codec = compression.codec()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        for model in (Document, OCRResult):
+            self.rewrite(model, codec, options["batch_size"], options["dry_run"])
+
+    def rewrite(self, model, codec, batch_size, dry_run):
+        target = codec or "plain"
+        started = time.perf_counter()
+        rows = rewritten = before = after = 0
+        batch = []
+
+        def flush():
+            if batch and not dry_run:
+                model.objects.bulk_update(batch, FIELDS)
+            batch.clear()
+
+        for pk, raw_text, raw_entities in _raw_rows(model).iterator(chunk_size=batch_size):
+            rows += 1
+            old = _size(raw_text) + _size(raw_entities)
+            before += old
+            if all(_current(raw, target) for raw in (raw_text, raw_entities) if raw is not None):
+                after += old
+                continue
+            field_text, field_entities = (model._meta.get_field(name) for name in FIELDS)
+            obj = model(pk=pk)
+            obj.extracted_text = None if raw_text is None else field_text.to_python(raw_text)
+            obj.entities = None if raw_entities is None else field_entities.to_python(raw_entities)
+            after += sum(
+                len(compression.compress(field.encode(value), codec))
+                for field, value in ((field_text, obj.extracted_text), (field_entities, obj.entities))
+                if value is not None
+            )
+            rewritten += 1
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+
+        seconds = time.perf_counter() - started
+        ratio = before / after if after else 1.0
+        verb = "Would rewrite" if dry_run else "Rewrote"
+        self.stdout.write(self.style.SUCCESS(
+            f"{model._meta.verbose_name_plural}: {verb} {rewritten} of {rows} row(s) as {target}, "
+            f"{before / 1e6:.1f} MB -> {after / 1e6:.1f} MB ({ratio:.1f}x, {seconds:.1f}s)"
+        ))
+
+    def compare(self, sample):
+        field_text, field_entities = (Document._meta.get_field(name) for name in FIELDS)
+        payloads = []
+        for doc in Document.objects.exclude(extracted_text__isnull=True).order_by("-id")[:sample]:
+            payloads.append(field_text.encode(doc.extracted_text))
+            if doc.entities is not None:
+                payloads.append(field_entities.encode(doc.entities))
+        if not payloads:
+            raise CommandError("No documents with OCR text to sample")
+
+        raw = sum(len(data) for data in payloads)
+        self.stdout.write(f"{sample} document(s), {len(payloads)} value(s), {raw / 1e6:.2f} MB uncompressed")
+        self.stdout.write(f"{'codec':<10}{'size MB':>10}{'ratio':>8}{'compress ms':>14}{'decompress ms':>16}")
+        for label, name, level in COMPARE_CODECS:
+            started = time.perf_counter()
+            blobs = [compression.compress(data, name, level) for data in payloads]
+            compress_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            for blob in blobs:
+                compression.decompress(blob)
+            decompress_ms = (time.perf_counter() - started) * 1000
+            size = sum(len(blob) for blob in blobs)
+            self.stdout.write(
+                f"{label:<10}{size / 1e6:>10.2f}{raw / size:>7.1f}x{compress_ms:>14.1f}{decompress_ms:>16.1f}"
+            )
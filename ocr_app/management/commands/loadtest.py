@@ -0,0 +1,192 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Max, Q
+from django.urls import reverse
+
+from ocr_app import scheduler
+from ocr_app.fake_aws import synthetic_pdf
+from ocr_app.metrics import _percentile, stage_stats
+from ocr_app.models import Document
+
+ENDPOINTS = {"api": "pdf_extraction_api", "async": "pdf_extraction_async_api"}
+SAMPLE_INTERVAL = 0.5  # seconds between queue / worker samples
+REPORT_STAGES = (
+    "upload_ms", "queue_ms", "textract_slot_ms", "textract_start_ms", "textract_wait_ms",
+    "textract_fetch_ms", "parse_ms", "save_ms",
+)
+
+
+def _multipart(name, filename, data, boundary):
+    return b"".join([
+        f"--{boundary}\r\n".encode(),
+        f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'.encode(),
+        b"Content-Type: application/pdf\r\n\r\n",
+        data,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ])
+
+
+def _request(url, data=None, headers=None, timeout=600):
+    """``(status, json body)`` of a GET / POST, also for 4xx / 5xx answers."""
+    req = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read() or b"{}")
+    except urllib.error.HTTPError as exc:
+        try:
+            return exc.code, json.loads(exc.read() or b"{}")
+        except ValueError:
+            return exc.code, {}
+
+
+def _latency_line(values):
+    if not values:
+        return "n/a"
+    values = sorted(values)
+    return " / ".join(f"{_percentile(values, pct):.0f}" for pct in (50, 90, 99)) + f" / {values[-1]:.0f}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent PDF uploads against a running server and report throughput, "
+        "latency percentiles and worker saturation. Run the server and ocr_worker "
+        "processes against the same database (with AWS_FAKE_SERVICES for offline runs)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the server.")
+        parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="api",
+                            help="api: /api/pdf-extract/ then poll status; async: /api/pdf-extract/async/.")
+        parser.add_argument("--requests", type=int, default=100, help="Number of uploads.")
+        parser.add_argument("--concurrency", type=int, default=10, help="Uploads in flight at once.")
+        parser.add_argument("--pages", type=int, default=3, help="Pages per generated PDF.")
+        parser.add_argument("--pdf", default=None, help="Upload this file instead of generated PDFs.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between status polls.")
+        parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for one document.")
+
+    def handle(self, *args, **options):
+        base_url = options["url"].rstrip("/")
+        if options["pdf"]:
+            with open(options["pdf"], "rb") as f:
+                template = f.read()
+        else:
+            template = None
+        url = base_url + reverse(ENDPOINTS[options["endpoint"]])
+
+        def payload():
+            if template is None:
+                return synthetic_pdf(options["pages"])
+            # A trailing comment keeps the file valid and defeats the OCR result cache
+            return template + f"\n%{uuid.uuid4().hex}\n".encode()
+
+        def one(index):
+            boundary = uuid.uuid4().hex
+            body = _multipart("file", f"loadtest-{index}.pdf", payload(), boundary)
+            started = time.perf_counter()
+            try:
+                code, data = _request(
+                    url, body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}, options["timeout"]
+                )
+            except OSError as exc:
+                return {"outcome": "error", "error": str(exc)}
+            accepted_ms = (time.perf_counter() - started) * 1000
+            result = {"accept_ms": accepted_ms, "id": data.get("id")}
+            if code == 202 and data.get("status_url"):
+                status_url = data["status_url"]
+                deadline = time.monotonic() + options["timeout"]
+                while data.get("status") not in ("done", "failed"):
+                    if time.monotonic() > deadline:
+                        return {**result, "outcome": "timeout"}
+                    time.sleep(options["poll_interval"])
+                    try:
+                        _, data = _request(status_url, timeout=options["timeout"])
+                    except OSError as exc:
+                        return {**result, "outcome": "error", "error": str(exc)}
+            elif code >= 400 and code != 502:
+                return {**result, "outcome": "error", "error": f"HTTP {code}: {data}"}
+            result["outcome"] = data.get("status", "error")
+            result["total_ms"] = (time.perf_counter() - started) * 1000
+            return result
+
+        first_id = Document.objects.aggregate(last=Max("id"))["last"] or 0
+        samples = []
+        stop = threading.Event()
+        sampler = threading.Thread(target=self.sample, args=(first_id, samples, stop), daemon=True)
+
+        self.stdout.write(
+            f"{options['requests']} upload(s) to {url}, {options['concurrency']} at a time"
+        )
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            with ThreadPoolExecutor(max_workers=options["concurrency"], thread_name_prefix="loadtest") as pool:
+                results = list(pool.map(one, range(options["requests"])))
+        finally:
+            stop.set()
+            sampler.join()
+        seconds = time.perf_counter() - started
+        self.report(results, samples, seconds, first_id)
+
+    def sample(self, first_id, samples, stop):
+        """Queue depth, busy workers and Textract slots, every SAMPLE_INTERVAL."""
+        while not stop.wait(SAMPLE_INTERVAL):
+            try:
+                counts = Document.objects.filter(id__gt=first_id).aggregate(
+                    queued=Count("id", filter=Q(status="queued")),
+                    processing=Count("id", filter=Q(status="processing")),
+                    workers=Count("locked_by", filter=Q(status="processing"), distinct=True),
+                )
+                slots = scheduler.stats()
+            except Exception as exc:
+                self.stderr.write(f"Load test sample failed: {exc}")
+                continue
+            samples.append({**counts, "running": slots["running"], "waiting": slots["waiting"]})
+
+    def report(self, results, samples, seconds, first_id):
+        outcomes = {}
+        for result in results:
+            outcomes[result["outcome"]] = outcomes.get(result["outcome"], 0) + 1
+        done = outcomes.get("done", 0)
+        errors = [result["error"] for result in results if result.get("error")]
+        if len(errors) == len(results):
+            raise CommandError(f"Every request failed, e.g. {errors[0]}")
+
+        summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results)} upload(s) in {seconds:.1f}s ({summary}): {done / seconds:.2f} docs/sec"
+        ))
+        for error in errors[:5]:
+            self.stdout.write(self.style.ERROR(f"  {error}"))
+        self.stdout.write("Latency ms (p50 / p90 / p99 / max):")
+        self.stdout.write(f"  accepted    {_latency_line([r['accept_ms'] for r in results if 'accept_ms' in r])}")
+        self.stdout.write(
+            f"  end to end  {_latency_line([r['total_ms'] for r in results if r['outcome'] == 'done'])}"
+        )
+
+        if samples:
+            busy = [s["processing"] for s in samples]
+            backlog = sum(1 for s in samples if s["queued"]) / len(samples)
+            self.stdout.write(
+                f"Workers: {max(busy)} document(s) in progress at peak on {max(s['workers'] for s in samples)} "
+                f"worker(s), {sum(busy) / len(busy):.1f} on average; queue peak {max(s['queued'] for s in samples)}, "
+                f"backlog during {backlog:.0%} of the run"
+            )
+            self.stdout.write(
+                f"Textract slots: {max(s['running'] for s in samples)} running at peak "
+                f"(limit {scheduler.stats()['max_concurrent_jobs'] or 'none'}), "
+                f"{max(s['waiting'] for s in samples)} waiting at peak"
+            )
+
+        stages = stage_stats(limit=len(results))
+        rows = [(key, stages[key]) for key in REPORT_STAGES if key in stages]
+        if rows and Document.objects.filter(id__gt=first_id).exists():
+            self.stdout.write("Stages ms (p50 / p95 / max):")
+            for key, values in rows:
+                self.stdout.write(f"  {key:<20}{values['p50']:>8.0f} / {values['p95']:.0f} / {values['max']:.0f}")
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ocr_app.jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = "Run a background OCR worker that processes queued documents through Textract."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.OCR_WORKER_CONCURRENCY,
+            help="Number of documents processed concurrently by this worker.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.OCR_WORKER_POLL_INTERVAL,
+            help="Seconds to wait between queue checks when idle.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is drained instead of waiting for new work.",
+        )
+
+    def handle(self, *args, **options):
+        run_worker(
+            concurrency=options["concurrency"],
+            poll_interval=options["poll_interval"],
+            once=options["once"],
+            log=self.stdout.write,
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ocr_app import cache
+
+
+class Command(BaseCommand):
+    help = "Evict expired, outdated and least recently used OCR result cache entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ttl-days", type=int, default=None, help="Override OCR_RESULT_CACHE_TTL_DAYS.")
+        parser.add_argument("--max-entries", type=int, default=None, help="Override OCR_RESULT_CACHE_MAX_ENTRIES.")
+
+    def handle(self, *args, **options):
+        deleted = cache.prune(ttl_days=options["ttl_days"], max_entries=options["max_entries"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {deleted} cached OCR result(s)"))
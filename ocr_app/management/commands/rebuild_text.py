@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ocr_app import raw_output
+from ocr_app.models import Document
+from ocr_app.pipeline import build_text, finish_document
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild extracted_text from the stored raw Textract output (no Textract "
+        "calls) and re-parse the documents whose text changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("ids", nargs="*", type=int, help="Document ids (default: every document with raw output).")
+        parser.add_argument("--batch", type=int, default=None, help="Only documents of this batch upload.")
+        parser.add_argument("--reparse", action="store_true", help="Re-parse even when the text is unchanged.")
+
+    def handle(self, *args, **options):
+        if not raw_output.enabled():
+            raise CommandError("TEXTRACT_RAW_STORE is not set to 'local' or 's3'")
+
+        docs = Document.objects.exclude(textract_output="").filter(status="done")
+        if options["ids"]:
+            docs = docs.filter(id__in=options["ids"])
+        if options["batch"]:
+            docs = docs.filter(batch_id=options["batch"])
+
+        started = time.perf_counter()
+        rebuilt = unchanged = missing = 0
+        for doc in docs.order_by("id").iterator(chunk_size=200):
+            try:
+                text = build_text(raw_output.iter_lines(doc.textract_output))
+            except (OSError, ValueError) as exc:
+                # Missing / unreadable file (S3 errors are raised as is)
+                self.stdout.write(self.style.ERROR(f"  document {doc.pk}: {exc}"))
+                missing += 1
+                continue
+            if text == doc.extracted_text and not options["reparse"]:
+                unchanged += 1
+                continue
+            lines = raw_output.layout_lines(doc.textract_output) if settings.OCR_LAYOUT_ROWS else None
+            finish_document(doc, text, lines)
+            rebuilt += 1
+
+        seconds = time.perf_counter() - started
+        total = rebuilt + unchanged
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rebuilt} document(s), {unchanged} unchanged, {missing} without readable output "
+            f"({seconds:.1f}s, {total / seconds if seconds else 0:.1f} docs/sec)"
+        ))
@@ -0,0 +1,77 @@
+import json
+import logging
+import math
+import time
+from contextlib import contextmanager
+
+from .models import Document
+
+
+# ===============================
+# Per-stage pipeline timings
+# ===============================
+# Every stage a document goes through (hashing, S3 upload, Textract start /
+# wait / fetch, parsing, DB save ...) is recorded in ``Document.timings``
+# as ``<stage>_ms`` next to counters such as upload bytes, pages and blocks,
+# and emitted as one JSON log line on the "ocr_app.metrics" logger.
+# ``stage_stats`` turns recent timings into p50/p95 per stage.
+
+logger = logging.getLogger("ocr_app.metrics")
+
+
+def record(doc, **values):
+    """Merge ``values`` into ``doc.timings`` and log them."""
+    doc.timings = {**(doc.timings or {}), **values}
+    logger.info(json.dumps({"event": "ocr_stage", "document": doc.pk, "file": doc.file_name, **values}))
+
+
+@contextmanager
+def timed(doc, stage):
+    """Record the wall time of the block as ``<stage>_ms`` on ``doc``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(doc, **{f"{stage}_ms": elapsed_ms(started)})
+
+
+def elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _flatten(timings, prefix=""):
+    for key, value in timings.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}{key}", value
+
+
+def _percentile(values, pct):
+    # Nearest-rank percentile of an already sorted list
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+def stage_stats(limit=1000, status=None):
+    """
+    p50 / p95 / max per recorded stage over the ``limit`` most recent
+    documents that have timings (optionally only with ``status``).
+    """
+    docs = Document.objects.exclude(timings__isnull=True)
+    if status:
+        docs = docs.filter(status=status)
+    samples = {}
+    for timings in docs.order_by("-id").values_list("timings", flat=True)[:limit]:
+        for key, value in _flatten(timings or {}):
+            samples.setdefault(key, []).append(value)
+
+    stats = {}
+    for key in sorted(samples):
+        values = sorted(samples[key])
+        stats[key] = {
+            "count": len(values),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "max": values[-1],
+        }
+    return stats
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.7 on 2026-10-17 03:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr_app', '0002_document_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='OCRResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('extractor_version', models.CharField(max_length=20)),
+                ('s3_key', models.CharField(max_length=500)),
+                ('extracted_text', models.TextField(blank=True, null=True)),
+                ('entities', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('content_hash', 'extractor_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-17 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr_app', '0004_document_page_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='ocr_backend',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+    ]
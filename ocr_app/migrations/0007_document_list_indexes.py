@@ -0,0 +1,21 @@
+# Generated by Django 5.0.7 on 2026-10-17 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr_app', '0006_batch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['-uploaded_at', '-id'], name='document_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['status', '-uploaded_at', '-id'], name='document_status_uploaded_idx'),
+        ),
+    ]
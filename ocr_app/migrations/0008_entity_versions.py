@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-17 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr_app', '0007_document_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='entity_versions',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ocrresult',
+            name='entity_versions',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.7 on 2026-10-17 04:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr_app', '0009_document_timings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Company',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('registration_no', models.CharField(max_length=50, unique=True)),
+                ('name', models.CharField(blank=True, db_index=True, default='', max_length=255)),
+                ('company_type', models.CharField(blank=True, default='', max_length=255)),
+                ('status', models.CharField(blank=True, default='', max_length=100)),
+                ('incorporation_date', models.CharField(blank=True, default='', max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('document', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ocr_app.document')),
+            ],
+            options={
+                'verbose_name_plural': 'companies',
+            },
+        ),
+        migrations.CreateModel(
+            name='Officer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=255)),
+                ('person_id', models.CharField(db_index=True, max_length=50)),
+                ('nationality', models.CharField(blank=True, default='', max_length=255)),
+                ('source_of_address', models.CharField(blank=True, default='', max_length=50)),
+                ('address', models.TextField(blank=True, default='')),
+                ('position', models.CharField(blank=True, default='', max_length=100)),
+                ('appointment_date', models.CharField(blank=True, default='', max_length=20)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='officers', to='ocr_app.company')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='officers', to='ocr_app.document')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Shareholder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=255)),
+                ('person_id', models.CharField(db_index=True, max_length=50)),
+                ('nationality', models.CharField(blank=True, default='', max_length=255)),
+                ('source_of_address', models.CharField(blank=True, default='', max_length=50)),
+                ('address', models.TextField(blank=True, default='')),
+                ('shares', models.BigIntegerField(blank=True, null=True)),
+                ('currency', models.CharField(blank=True, default='', max_length=255)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='shareholders', to='ocr_app.company')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shareholders', to='ocr_app.document')),
+            ],
+        ),
+    ]
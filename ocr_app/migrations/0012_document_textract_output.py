@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-17 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr_app', '0011_textract_scheduler'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='textract_output',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -0,0 +1,101 @@
+import ocr_app.compression
+from django.db import migrations
+
+# OCR text and entities move to compressed binary columns: new columns are
+# added, existing rows are copied over in batches (encoded with the current
+# OCR_STORAGE_COMPRESSION codec), then the old columns are dropped and the
+# new ones take their names.
+
+BATCH_SIZE = 500
+MODELS = ("Document", "OCRResult")
+
+
+def _copy(apps, source, target):
+    for model_name in MODELS:
+        model = apps.get_model("ocr_app", model_name)
+        rows = model.objects.only("id", *source).order_by("id").iterator(chunk_size=BATCH_SIZE)
+        batch = []
+        for row in rows:
+            for old, new in zip(source, target):
+                setattr(row, new, getattr(row, old))
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, target)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, target)
+
+
+def compress_rows(apps, schema_editor):
+    _copy(apps, ("extracted_text", "entities"), ("extracted_text_z", "entities_z"))
+
+
+def decompress_rows(apps, schema_editor):
+    _copy(apps, ("extracted_text_z", "entities_z"), ("extracted_text", "entities"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr_app', '0012_document_textract_output'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='extracted_text_z',
+            field=ocr_app.compression.CompressedTextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='entities_z',
+            field=ocr_app.compression.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ocrresult',
+            name='extracted_text_z',
+            field=ocr_app.compression.CompressedTextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ocrresult',
+            name='entities_z',
+            field=ocr_app.compression.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(compress_rows, decompress_rows),
+        migrations.RemoveField(
+            model_name='document',
+            name='extracted_text',
+        ),
+        migrations.RemoveField(
+            model_name='document',
+            name='entities',
+        ),
+        migrations.RemoveField(
+            model_name='ocrresult',
+            name='extracted_text',
+        ),
+        migrations.RemoveField(
+            model_name='ocrresult',
+            name='entities',
+        ),
+        migrations.RenameField(
+            model_name='document',
+            old_name='extracted_text_z',
+            new_name='extracted_text',
+        ),
+        migrations.RenameField(
+            model_name='document',
+            old_name='entities_z',
+            new_name='entities',
+        ),
+        migrations.RenameField(
+            model_name='ocrresult',
+            old_name='extracted_text_z',
+            new_name='extracted_text',
+        ),
+        migrations.RenameField(
+            model_name='ocrresult',
+            old_name='entities_z',
+            new_name='entities',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-17 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr_app', '0013_compressed_text_entities'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='textract_jobs',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
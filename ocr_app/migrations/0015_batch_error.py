@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-17 05:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr_app', '0014_document_textract_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batch',
+            name='error',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
@@ -1,12 +1,166 @@
 from django.db import models
+from django.utils import timezone
+
+from .compression import CompressedJSONField, CompressedTextField
+
+
+class Batch(models.Model):
+    """
+    A group of documents uploaded in one request (many files or a ZIP
+    archive). Progress is aggregated from the documents, see batches.py.
+    """
+    name = models.CharField(max_length=255, blank=True, default="")
+    source = models.CharField(max_length=20, default="files")  # files/zip
+    status = models.CharField(max_length=50, default="submitting")  # submitting/submitted/failed
+    total = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)  # why submission broke off
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name or f"Batch {self.pk}"
+
 
 class Document(models.Model):
     file_name = models.CharField(max_length=255)
     s3_key = models.CharField(max_length=500)  # thoda bada rakha, optional
     uploaded_at = models.DateTimeField(auto_now_add=True)
-    extracted_text = models.TextField(blank=True, null=True)
-    entities = models.JSONField(blank=True, null=True)  # JSON structured data
-    status = models.CharField(max_length=50, default="processing")  # uploaded/processing/done/failed
+    extracted_text = CompressedTextField(blank=True, null=True)  # see compression.py
+    entities = CompressedJSONField(blank=True, null=True)  # JSON structured data
+    entity_versions = models.JSONField(blank=True, null=True)  # section -> extractor version, see utils.SECTION_EXTRACTORS
+    status = models.CharField(max_length=50, default="queued")  # queued/processing/done/failed
+    content_hash = models.CharField(max_length=64, blank=True, default="", db_index=True)  # SHA-256 of the upload
+    page_count = models.PositiveIntegerField(blank=True, null=True)  # estimated at upload, see pdf.count_pages
+    ocr_backend = models.CharField(max_length=50, blank=True, default="")  # text_layer/textract_sync/textract_async
+    batch = models.ForeignKey(
+        Batch, blank=True, null=True, on_delete=models.SET_NULL, related_name="documents"
+    )
+
+    # Background job bookkeeping (see jobs.py)
+    stage = models.CharField(max_length=50, blank=True, default="")  # textract_start/textract_wait/parsing ...
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    locked_by = models.CharField(max_length=100, blank=True, default="")
+    locked_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    timings = models.JSONField(blank=True, null=True)  # per-stage ms + counters, see metrics.py
+    textract_output = models.CharField(max_length=255, blank=True, default="")  # raw responses key, see raw_output.py
+    textract_jobs = models.JSONField(blank=True, null=True)  # s3 key -> started job, see pipeline.remember_job
+
+    class Meta:
+        indexes = [
+            # Listing / dashboards: newest first, optionally by status (keyset pagination)
+            models.Index(fields=["-uploaded_at", "-id"], name="document_uploaded_idx"),
+            models.Index(fields=["status", "-uploaded_at", "-id"], name="document_status_uploaded_idx"),
+        ]
 
     def __str__(self):
         return self.file_name
+
+    def set_stage(self, stage):
+        """Record pipeline progress and refresh the worker lease."""
+        self.stage = stage
+        if self.locked_by:
+            self.locked_at = timezone.now()
+        self.save(update_fields=["stage", "locked_at", "updated_at"])
+
+
+class OCRResult(models.Model):
+    """
+    Persistent OCR result cache keyed by upload content hash and extractor
+    version, so duplicate uploads skip S3 and Textract entirely (see cache.py).
+    """
+    content_hash = models.CharField(max_length=64)
+    extractor_version = models.CharField(max_length=20)
+    s3_key = models.CharField(max_length=500)
+    extracted_text = CompressedTextField(blank=True, null=True)
+    entities = CompressedJSONField(blank=True, null=True)
+    entity_versions = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    hit_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("content_hash", "extractor_version")
+
+    def __str__(self):
+        return f"{self.content_hash[:12]}@{self.extractor_version}"
+
+
+# ===============================
+# Normalized filings (see companies.py)
+# ===============================
+class Company(models.Model):
+    """
+    One row per ACRA registration number, refreshed from the most recently
+    synced document of that company.
+    """
+    registration_no = models.CharField(max_length=50, unique=True)
+    name = models.CharField(max_length=255, blank=True, default="", db_index=True)
+    company_type = models.CharField(max_length=255, blank=True, default="")
+    status = models.CharField(max_length=100, blank=True, default="")
+    incorporation_date = models.CharField(max_length=20, blank=True, default="")
+    document = models.ForeignKey(Document, blank=True, null=True, on_delete=models.SET_NULL, related_name="+")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "companies"
+
+    def __str__(self):
+        return f"{self.name} ({self.registration_no})"
+
+
+class Officer(models.Model):
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name="officers")
+    company = models.ForeignKey(Company, blank=True, null=True, on_delete=models.SET_NULL, related_name="officers")
+    name = models.CharField(max_length=255, db_index=True)
+    person_id = models.CharField(max_length=50, db_index=True)  # NRIC / FIN / UEN as printed
+    nationality = models.CharField(max_length=255, blank=True, default="")
+    source_of_address = models.CharField(max_length=50, blank=True, default="")
+    address = models.TextField(blank=True, default="")
+    position = models.CharField(max_length=100, blank=True, default="")
+    appointment_date = models.CharField(max_length=20, blank=True, default="")
+
+    def __str__(self):
+        return f"{self.name} ({self.position})"
+
+
+class Shareholder(models.Model):
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name="shareholders")
+    company = models.ForeignKey(Company, blank=True, null=True, on_delete=models.SET_NULL, related_name="shareholders")
+    name = models.CharField(max_length=255, db_index=True)
+    person_id = models.CharField(max_length=50, db_index=True)
+    nationality = models.CharField(max_length=255, blank=True, default="")
+    source_of_address = models.CharField(max_length=50, blank=True, default="")
+    address = models.TextField(blank=True, default="")
+    shares = models.BigIntegerField(blank=True, null=True)  # Ordinary (Number)
+    currency = models.CharField(max_length=255, blank=True, default="")
+
+    def __str__(self):
+        return f"{self.name} ({self.shares})"
+
+
+# ===============================
+# Textract scheduling state (see scheduler.py)
+# ===============================
+class TextractSlot(models.Model):
+    """
+    A ticket for one async Textract job: "waiting" until the FIFO lets it
+    start, "running" while the job is in progress. Rows whose heartbeat
+    stops (crashed worker) expire after TEXTRACT_SLOT_LEASE_SECONDS.
+    """
+    holder = models.CharField(max_length=100)  # worker_name() of the process
+    state = models.CharField(max_length=20, default="waiting")  # waiting/running
+    created_at = models.DateTimeField(auto_now_add=True)
+    heartbeat_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["state", "id"], name="textract_slot_state_idx")]
+
+
+class RateBucket(models.Model):
+    """Token bucket shared by every worker process, one row per API."""
+    name = models.CharField(max_length=50, unique=True)
+    tokens = models.FloatField(default=0)
+    refilled_at = models.DateTimeField(default=timezone.now)
+    version = models.PositiveIntegerField(default=0)  # compare-and-swap guard
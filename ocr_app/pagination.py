@@ -0,0 +1,64 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+# ===============================
+# Keyset pagination
+# ===============================
+# Documents are listed newest first by (uploaded_at, id). The cursor carries
+# the last row's key, so every page is a plain index range scan no matter
+# how deep the client pages (unlike OFFSET, which rescans skipped rows).
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(doc):
+    raw = json.dumps([doc.uploaded_at.isoformat(), doc.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        uploaded_at, doc_id = json.loads(raw)
+        uploaded_at = parse_datetime(uploaded_at)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(f"Invalid cursor: {exc}")
+    if uploaded_at is None or not isinstance(doc_id, int):
+        raise InvalidCursor("Invalid cursor")
+    return uploaded_at, doc_id
+
+
+def page_size(value):
+    try:
+        size = int(value) if value else DEFAULT_PAGE_SIZE
+    except ValueError:
+        size = DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_page(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return ``(rows, next_cursor)`` for the page after ``cursor``.
+    ``next_cursor`` is None on the last page.
+    """
+    queryset = queryset.order_by("-uploaded_at", "-id")
+    if cursor:
+        uploaded_at, doc_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(uploaded_at__lt=uploaded_at) | Q(uploaded_at=uploaded_at, id__lt=doc_id)
+        )
+    # One extra row tells whether another page exists
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
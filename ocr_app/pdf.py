@@ -0,0 +1,38 @@
+import re
+
+# ===============================
+# Lightweight PDF inspection
+# ===============================
+# Only cheap byte-level heuristics live here; nothing in this module parses
+# the PDF object graph.
+
+SCAN_CHUNK_SIZE = 1024 * 1024
+
+PAGE_OBJECT_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+PAGES_COUNT_RE = re.compile(rb"/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b")
+
+
+def count_pages(fileobj):
+    """
+    Estimate the page count of a PDF by scanning its bytes for page objects
+    and the page tree ``/Count``. Returns None when neither is visible (e.g.
+    pages hidden inside compressed object streams). The file is rewound.
+    """
+    page_objects = 0
+    tree_count = 0
+    tail = b""
+    chunks = fileobj.chunks(SCAN_CHUNK_SIZE) if hasattr(fileobj, "chunks") else iter(
+        lambda: fileobj.read(SCAN_CHUNK_SIZE), b""
+    )
+    for chunk in chunks:
+        window = tail + chunk
+        # Matches ending inside the carried-over tail were already counted
+        # with the previous chunk
+        page_objects += sum(1 for m in PAGE_OBJECT_RE.finditer(window) if m.end() > len(tail))
+        for m in PAGES_COUNT_RE.finditer(window):
+            tree_count = max(tree_count, int(m.group(1) or m.group(2)))
+        tail = window[-256:]
+    fileobj.seek(0)
+
+    pages = max(page_objects, tree_count)
+    return pages or None
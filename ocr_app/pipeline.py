@@ -0,0 +1,556 @@
+import io
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from . import cache, companies, layout, raw_output, scheduler
+from .aws import get_client
+from .backends import PyPdfError, build_backends, sniff_content_type
+from .chunking import can_split, split_pdf
+from .jobs import claim_inline, enqueue
+from .metrics import elapsed_ms, record, timed
+from .models import Document
+from .pdf import count_pages
+from .poller import get_poller, notification_channel
+from .uploads import TRANSFER_CONFIG, complete_streamed, discard_streamed, new_s3_key
+from .utils import extract_entities, section_versions
+
+# ===============================
+# S3 Upload
+# ===============================
+def upload_to_s3(fileobj, s3_key, content_type="application/pdf"):
+    """
+    Uploads an incoming PDF to the configured bucket under ``s3_key``
+    (multipart and parallel above S3_MULTIPART_THRESHOLD).
+    """
+    get_client("s3").upload_fileobj(
+        fileobj,
+        settings.AWS_S3_BUCKET,
+        s3_key,
+        ExtraArgs={"ContentType": content_type},
+        Config=TRANSFER_CONFIG,
+    )
+
+
+# ===============================
+# Upload Intake
+# ===============================
+def submit_upload(upload, force=False, batch=None, inline=False):
+    """
+    Hashes an uploaded PDF and either answers it from the OCR result cache,
+    extracts it in-process with a local OCR backend (text-layer PDFs,
+    single-page documents), or uploads it to S3 and queues it for the workers.
+    Pass ``force=True`` to skip the cache and always run OCR again and
+    ``batch`` to attach the document to a batch upload.
+
+    Uploads streamed to S3 by ``uploads.S3StreamingUploadHandler`` arrive
+    hashed, and their multipart upload is completed only when the document
+    needs the object (aborted on a cache hit or local extraction).
+
+    With ``inline=True`` an upload that needs async Textract is stored and
+    claimed by this process instead of queued (see async_pipeline.py).
+
+    Returns ``(doc, cache_hit)``.
+    """
+    if getattr(upload, "s3_key", None):
+        file_name, s3_key = upload.s3_file_name, upload.s3_key
+    else:
+        file_name, s3_key = new_s3_key(upload.name)
+    timings = {"upload_bytes": upload.size}
+    content_hash = getattr(upload, "content_hash", None)  # hashed while it was received
+    if not content_hash:
+        started = time.perf_counter()
+        content_hash = cache.hash_upload(upload)
+        timings["hash_ms"] = elapsed_ms(started)
+    started = time.perf_counter()
+    content_type = sniff_content_type(upload)
+    page_count = count_pages(upload) if content_type == "application/pdf" else 1
+    doc = Document(file_name=file_name, content_hash=content_hash, page_count=page_count, batch=batch)
+    record(doc, inspect_ms=elapsed_ms(started), **timings)
+
+    with timed(doc, "cache_lookup"):
+        entry = None if force else cache.lookup(content_hash)
+    if entry is not None:
+        # The cached result points at the original object
+        discard_streamed(upload)
+        cache.apply(doc, entry)
+        doc.save()
+        companies.sync_documents([doc])
+        print(f"♻️ OCR cache hit for {file_name} ({content_hash[:12]})")
+        return doc, True
+
+    for backend in get_backends():
+        if not backend.accepts(upload, content_type, page_count):
+            continue
+        doc.ocr_backend = backend.name
+        if backend.is_async:
+            break
+        with timed(doc, backend.name):
+            extracted_text = backend.extract_text(upload)
+        if extracted_text is not None:
+            discard_streamed(upload)  # local results never read the S3 copy
+            finish_document(doc, extracted_text)
+            print(f"✅ {backend.name} extraction completed for: {file_name}")
+            return doc, False
+
+    doc.s3_key = s3_key
+    if complete_streamed(upload):
+        record(doc, upload_streamed=True)
+    else:
+        with timed(doc, "upload"):
+            upload_to_s3(upload, doc.s3_key, content_type)
+    if inline:
+        return claim_inline(doc), False
+    return enqueue(doc), False
+
+
+_backends = None
+_backends_pid = None
+
+
+def get_backends():
+    global _backends, _backends_pid
+    if _backends is None or _backends_pid != os.getpid():
+        _backends = build_backends(get_client("textract"))
+        _backends_pid = os.getpid()
+    return _backends
+
+
+def finish_document(doc, extracted_text, lines=None):
+    """
+    Parse structured entities from ``extracted_text`` (table sections from
+    LINE geometry ``lines`` when given, see layout.py), mark the document
+    done and remember the result in the OCR cache.
+    """
+    doc.extracted_text = extracted_text
+
+    # Parse structured entities (flattened)
+    if extracted_text.strip():
+        started = time.perf_counter()
+        section_ms = {}
+        entities = extract_entities(extracted_text, timings=section_ms, lines=lines)
+        record(doc, parse_ms=elapsed_ms(started), parse_sections_ms=section_ms, layout_lines=len(lines or ()))
+        # ✅ FIX — Save clean, single-level entity dict
+        doc.entities = entities
+        doc.entity_versions = section_versions()
+
+    doc.status = "done"
+    doc.stage = ""
+    started = time.perf_counter()
+    doc.save()
+    save_ms = elapsed_ms(started)
+    started = time.perf_counter()
+    cache.store(doc)
+    cache_store_ms = elapsed_ms(started)
+    started = time.perf_counter()
+    companies.sync_documents([doc])
+    record(doc, save_ms=save_ms, cache_store_ms=cache_store_ms, normalize_ms=elapsed_ms(started))
+    doc.save(update_fields=["timings"])
+    return doc
+
+
+# ===============================
+# Textract Result Streaming
+# ===============================
+TEXTRACT_PAGE_SIZE = 1000  # max Blocks per get_document_text_detection call
+
+
+def iter_textract_lines(job_id, stats=None, sinks=()):
+    """
+    Yield the LINE text of a finished Textract job, one result page at a
+    time. Each response (WORD blocks, geometry, relationships) is dropped
+    as soon as its lines are taken - after being handed to every sink in
+    ``sinks`` (``raw_output.RawOutputWriter``, ``layout.LineCollector``) -
+    so memory stays bounded by one page of results regardless of the
+    document length. ``stats`` (a dict) collects page, block, line and API
+    call counts.
+    """
+    next_token = None
+    while True:
+        args = {"JobId": job_id, "MaxResults": TEXTRACT_PAGE_SIZE}
+        if next_token:
+            args["NextToken"] = next_token
+        resp = scheduler.call("get", get_client("textract").get_document_text_detection, stats=stats, **args)
+        next_token = resp.get("NextToken")
+        lines = raw_output.response_lines(resp)
+        for sink in sinks:
+            sink.write(resp)
+        if stats is not None:
+            stats["pages"] = resp.get("DocumentMetadata", {}).get("Pages", stats.get("pages", 0))
+            stats["blocks"] = stats.get("blocks", 0) + len(resp["Blocks"])
+            stats["lines"] = stats.get("lines", 0) + len(lines)
+            stats["result_calls"] = stats.get("result_calls", 0) + 1
+        del resp
+        yield from lines
+        if not next_token:
+            break
+
+
+def build_text(lines):
+    """Join streamed lines with newlines without materializing a list."""
+    buf = io.StringIO()
+    for i, line in enumerate(lines):
+        if i:
+            buf.write("\n")
+        buf.write(line)
+    return buf.getvalue()
+
+
+# ===============================
+# Textract Jobs
+# ===============================
+SUCCESS_STATUSES = ("SUCCEEDED", "PARTIAL_SUCCESS")
+MISSING_OBJECT_ERRORS = ("InvalidS3ObjectException", "404", "NoSuchKey")
+SPLIT_SPOOL_BYTES = 10 * 1024 * 1024
+
+
+def textract_start_args(s3_key):
+    start_args = {"DocumentLocation": {'S3Object': {'Bucket': settings.AWS_S3_BUCKET, 'Name': s3_key}}}
+    channel = notification_channel()
+    if channel:
+        start_args["NotificationChannel"] = channel
+    return start_args
+
+
+# ---------- persisted job state ----------
+# Every started job is recorded in ``Document.textract_jobs`` (keyed by the
+# S3 key it reads, so chunk jobs are found again by their chunk key) with
+# its start time and, once known, terminal status. When a worker dies
+# mid-poll the retried or recovered document (see jobs.recover_orphans)
+# reattaches to the job, or goes straight to fetching its results, instead
+# of starting a new one. The record is cleared when the document finishes.
+_job_state_lock = threading.Lock()  # chunk threads share one document
+
+
+def remember_job(doc, s3_key, job_id):
+    with _job_state_lock:
+        doc.textract_jobs = {
+            **(doc.textract_jobs or {}),
+            s3_key: {"job_id": job_id, "started_at": timezone.now().isoformat(), "status": None},
+        }
+        doc.save(update_fields=["textract_jobs", "updated_at"])
+
+
+def job_finished(doc, s3_key, status_):
+    with _job_state_lock:
+        job = (doc.textract_jobs or {}).get(s3_key)
+        if job is None:
+            return
+        doc.textract_jobs = {**doc.textract_jobs, s3_key: {**job, "status": status_}}
+        doc.save(update_fields=["textract_jobs", "updated_at"])
+
+
+def resumable_job(doc, s3_key):
+    """
+    ``(job_id, status)`` of a recorded job for ``s3_key`` that can still be
+    reattached (status None while it was in progress), else ``(None, None)``.
+    Failed and expired jobs are started again.
+    """
+    job = (doc.textract_jobs or {}).get(s3_key) if doc is not None else None
+    if not job or (job["status"] and job["status"] not in SUCCESS_STATUSES):
+        return None, None
+    age = timezone.now() - datetime.fromisoformat(job["started_at"])
+    if age > timedelta(hours=settings.TEXTRACT_JOB_RESUME_HOURS):
+        return None, None
+    return job["job_id"], job["status"]
+
+
+def _keep_alive(touch_slot, heartbeat=None):
+    """Poller heartbeat that also renews the job's slot lease."""
+    def keep_alive():
+        touch_slot()
+        if heartbeat:
+            heartbeat()
+    return keep_alive
+
+
+def run_textract_job(textract, s3_key, page_count=None, heartbeat=None, started=None, timings=None, doc=None):
+    """
+    Wait for a Textract job slot (see scheduler.py), start text detection
+    for ``s3_key`` and wait for it on the shared poller. Returns
+    ``(job_id, status)``; slot wait, start and Textract wait times and
+    throttle retries are added to ``timings`` (a dict) when given.
+
+    With ``doc``, the job is recorded on the document and a job recorded
+    earlier for ``s3_key`` is reattached instead of started again.
+    """
+    timings = {} if timings is None else timings
+    job_id, status_ = resumable_job(doc, s3_key)
+    if job_id:
+        print(f"Reattaching to Textract job {job_id} ({status_ or 'in progress'})")
+        timings["textract_resumed"] = 1
+        if started:
+            started()
+        if status_ is None:
+            # Still running on Textract's side, so it counts against the
+            # concurrent job limit: hold a slot while waiting, like a new job
+            clock = time.perf_counter()
+            with scheduler.job_slot(heartbeat=heartbeat) as touch_slot:
+                timings["textract_slot_ms"] = elapsed_ms(clock)
+                clock = time.perf_counter()
+                status_ = get_poller(textract).wait(
+                    job_id, page_count=page_count, heartbeat=_keep_alive(touch_slot, heartbeat)
+                )
+                timings["textract_wait_ms"] = elapsed_ms(clock)
+            job_finished(doc, s3_key, status_)
+        return job_id, status_
+    start_args = textract_start_args(s3_key)
+
+    clock = time.perf_counter()
+    with scheduler.job_slot(heartbeat=heartbeat) as touch_slot:
+        timings["textract_slot_ms"] = elapsed_ms(clock)
+        clock = time.perf_counter()
+        start_job = scheduler.call("start", textract.start_document_text_detection, stats=timings, **start_args)
+        job_id = start_job["JobId"]
+        timings["textract_start_ms"] = elapsed_ms(clock)
+        print(f"Textract job started: {job_id}")
+        if doc is not None:
+            remember_job(doc, s3_key, job_id)
+        if started:
+            started()
+        clock = time.perf_counter()
+        status_ = get_poller(textract).wait(
+            job_id, page_count=page_count, heartbeat=_keep_alive(touch_slot, heartbeat)
+        )
+        timings["textract_wait_ms"] = elapsed_ms(clock)
+    if doc is not None:
+        job_finished(doc, s3_key, status_)
+    print(f"Textract status: {status_}")
+    return job_id, status_
+
+
+def textract_single(doc, textract):
+    """
+    One Textract job for the whole document; returns ``(text, lines)``
+    (``lines`` is LINE geometry when OCR_LAYOUT_ROWS is on) or
+    ``(None, None)``.
+    """
+    doc.set_stage("textract_start")
+    job_timings = {}
+    job_id, status_ = run_textract_job(
+        textract,
+        doc.s3_key,
+        page_count=doc.page_count,
+        heartbeat=lambda: doc.set_stage(doc.stage),  # textract_start while queued for a slot
+        started=lambda: doc.set_stage("textract_wait"),
+        timings=job_timings,
+        doc=doc,
+    )
+    record(doc, **job_timings)
+    if status_ not in SUCCESS_STATUSES:
+        return None, None
+    return fetch_textract_result(doc, job_id)
+
+
+def fetch_textract_result(doc, job_id):
+    """Stream the results of the finished job ``job_id`` of ``doc``."""
+    doc.set_stage("textract_fetch")
+    # Stream every result page, keeping only the LINE text (and geometry)
+    stats = {}
+    writer = raw_output.RawOutputWriter(job_id) if raw_output.enabled() else None
+    collector = layout.LineCollector() if settings.OCR_LAYOUT_ROWS else None
+    with timed(doc, "textract_fetch"):
+        text = build_text(iter_textract_lines(job_id, stats, [s for s in (writer, collector) if s]))
+    record(doc, **stats)
+    if writer is not None:
+        store_raw_output(doc, [writer])
+    return text, collector.lines if collector else None
+
+
+def store_raw_output(doc, writers):
+    """Keep the raw Textract responses of ``doc`` (see raw_output.py)."""
+    started = time.perf_counter()
+    key = raw_output.output_key(doc, next(writer.job_id for writer in writers if writer is not None))
+    try:
+        size = raw_output.save(key, writers)
+    except Exception as exc:
+        # Only a re-parse convenience; never fail the document over it
+        print(f"Could not store raw Textract output for {doc.file_name}: {exc}")
+        return
+    doc.textract_output = key
+    record(doc, raw_output_bytes=size, raw_store_ms=elapsed_ms(started))
+
+
+def should_split(doc):
+    min_pages = settings.TEXTRACT_SPLIT_MIN_PAGES
+    return bool(min_pages) and can_split() and (doc.page_count or 0) >= min_pages
+
+
+def textract_chunked(doc, textract):
+    """
+    Split the stored PDF into page-range chunks, run them as parallel
+    Textract jobs and stitch the LINE text (and geometry) back in page
+    order. Returns ``(text, lines)`` like ``textract_single``, or
+    ``(None, None)`` when any chunk fails.
+    """
+    s3 = get_client("s3")
+    bucket = settings.AWS_S3_BUCKET
+
+    doc.set_stage("splitting")
+    split_started = time.perf_counter()
+    chunk_keys = []
+    with tempfile.SpooledTemporaryFile(max_size=SPLIT_SPOOL_BYTES) as pdf:
+        s3.download_fileobj(bucket, doc.s3_key, pdf, Config=TRANSFER_CONFIG)
+        pdf.seek(0)
+        try:
+            for first, last, data in split_pdf(pdf, settings.TEXTRACT_SPLIT_CHUNK_PAGES):
+                key = f"{doc.s3_key}.chunks/{first:05d}-{last:05d}.pdf"
+                upload_to_s3(io.BytesIO(data), key)
+                chunk_keys.append((key, last - first + 1))
+        except PyPdfError as exc:
+            print(f"Could not split {doc.s3_key}, running it as one job: {exc}")
+            _delete_objects(chunk_keys)
+            return textract_single(doc, textract)
+
+    if len(chunk_keys) < 2:
+        # The byte-scan page estimate was too high; nothing to parallelize
+        _delete_objects(chunk_keys)
+        return textract_single(doc, textract)
+
+    total = len(chunk_keys)
+    record(doc, split_ms=elapsed_ms(split_started), chunks=total)
+    texts = [None] * total
+    chunk_stats = [{} for _ in range(total)]
+    writers = [None] * total
+    collectors = [None] * total
+    page_offsets = [0] * total
+    for index in range(1, total):
+        page_offsets[index] = page_offsets[index - 1] + chunk_keys[index - 1][1]
+    finished = []
+    stage_lock = threading.Lock()
+
+    def set_stage(stage):
+        # Chunk threads share ``doc``; keep its saves from interleaving
+        with stage_lock:
+            doc.set_stage(stage)
+
+    def run_chunk(index):
+        key, pages = chunk_keys[index]
+        try:
+            job_id, status_ = run_textract_job(
+                textract,
+                key,
+                page_count=pages,
+                heartbeat=lambda: set_stage(f"textract_chunks {len(finished)}/{total}"),
+                doc=doc,
+            )
+            if status_ not in SUCCESS_STATUSES:
+                return False
+            if raw_output.enabled():
+                writers[index] = raw_output.RawOutputWriter(job_id, chunk=index, page_offset=page_offsets[index])
+            if settings.OCR_LAYOUT_ROWS:
+                collectors[index] = layout.LineCollector(page_offset=page_offsets[index])
+            sinks = [sink for sink in (writers[index], collectors[index]) if sink]
+            texts[index] = build_text(iter_textract_lines(job_id, chunk_stats[index], sinks))
+            finished.append(index)
+            set_stage(f"textract_chunks {len(finished)}/{total}")
+            return True
+        finally:
+            # Chunk threads each hold their own connection
+            connection.close()
+
+    set_stage(f"textract_chunks 0/{total}")
+    textract_started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(
+            max_workers=min(total, settings.TEXTRACT_SPLIT_MAX_PARALLEL),
+            thread_name_prefix="textract-chunk",
+        ) as pool:
+            results = list(pool.map(run_chunk, range(total)))
+    finally:
+        _delete_objects(chunk_keys)
+
+    totals = {}
+    for stats in chunk_stats:
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+    record(doc, textract_ms=elapsed_ms(textract_started), **totals)
+    print(f"Textract chunks for {doc.s3_key}: {results.count(True)}/{total} succeeded")
+    if not all(results):
+        for writer in writers:
+            if writer is not None:
+                writer.close()
+        return None, None
+    if raw_output.enabled():
+        store_raw_output(doc, writers)
+    lines = [line for collector in collectors if collector for line in collector.lines] or None
+    return "\n".join(text for text in texts if text), lines
+
+
+def _delete_objects(chunk_keys):
+    keys = [key for key, _ in chunk_keys]
+    for i in range(0, len(keys), 1000):
+        get_client("s3").delete_objects(
+            Bucket=settings.AWS_S3_BUCKET,
+            Delete={"Objects": [{"Key": key} for key in keys[i:i + 1000]], "Quiet": True},
+        )
+
+
+# ===============================
+# PDF Processing Function
+# ===============================
+def process_pdf_s3(doc):
+    """
+    Runs Textract text detection on the uploaded PDF (stored in S3),
+    extracts text, and uses regex (utils.extract_entities)
+    to structure the extracted entities. PDFs of TEXTRACT_SPLIT_MIN_PAGES
+    or more are split into page chunks that run as parallel jobs.
+
+    Called by the background workers (see ``jobs.run_job``); progress is
+    reported through ``doc.stage`` so the status endpoint can show it.
+    """
+    textract = get_client("textract")
+    if doc.locked_at and doc.uploaded_at:
+        record(doc, queue_ms=round((doc.locked_at - doc.uploaded_at).total_seconds() * 1000, 1))
+
+    # Step 1: Run Textract (a missing object is reported by Textract / the
+    # download itself, so no separate head_object round trip)
+    try:
+        if should_split(doc):
+            extracted_text, lines = textract_chunked(doc, textract)
+        else:
+            extracted_text, lines = textract_single(doc, textract)
+    except ClientError as exc:
+        if not is_missing_object(exc):
+            raise
+        return fail_missing_object(doc)
+
+    # Step 2: Parse structured entities (flattened)
+    return complete_textract(doc, extracted_text, lines)
+
+
+def is_missing_object(exc):
+    return exc.response.get("Error", {}).get("Code") in MISSING_OBJECT_ERRORS
+
+
+def fail_missing_object(doc):
+    doc.status = "failed"
+    doc.stage = ""
+    doc.textract_jobs = None
+    doc.extracted_text = "S3 object not found."
+    doc.save()
+    return doc
+
+
+def complete_textract(doc, extracted_text, lines=None):
+    """Parse and finish ``doc``, or fail it when Textract gave no text."""
+    doc.textract_jobs = None  # saved below; a reprocess starts fresh jobs
+    if extracted_text is not None:
+        doc.set_stage("parsing")
+        finish_document(doc, extracted_text, lines)
+        print(f"✅ Textract + Regex parsing completed for: {doc.s3_key}")
+
+    else:
+        doc.status = "failed"
+        doc.stage = ""
+        doc.extracted_text = "Textract failed to process this document."
+        doc.save()
+        print(f"❌ Textract failed for {doc.s3_key}")
+
+    return doc
@@ -0,0 +1,324 @@
+import json
+import math
+import os
+import queue
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+
+from .aws import get_client
+from .scheduler import acquire_token, is_throttle_error
+
+
+# ===============================
+# Multiplexed Textract job poller
+# ===============================
+# One poller thread per process tracks every outstanding Textract JobId.
+# Worker threads register a job and block in ``wait()``; the poller checks
+# each job on its own exponential-backoff schedule (first check tuned to the
+# page count), backs off globally when Textract throttles, and - if a
+# completion notification source is configured - wakes waiters as soon as
+# the SNS/SQS message arrives instead of on the next poll. Polls draw from
+# the shared "get" rate bucket (see scheduler.py).
+
+TERMINAL_STATUSES = ("SUCCEEDED", "FAILED", "PARTIAL_SUCCESS")
+
+
+class _TrackedJob:
+    def __init__(self, job_id, first_delay):
+        self.job_id = job_id
+        self.delay = first_delay
+        self.next_poll_at = time.monotonic() + first_delay
+        self.status = None
+        self.polls = 0
+        self.done = threading.Event()
+        self.callback = None  # set by TextractPoller.watch
+
+    def finish(self, status):
+        self.status = status
+        self.done.set()
+        if self.callback is not None:
+            try:
+                self.callback(status)
+            except Exception as exc:
+                # e.g. the waiting event loop is gone; never kill the poller
+                print(f"Textract job callback failed for {self.job_id}: {exc}")
+
+
+class TextractPoller:
+    """
+    Polls ``get_document_text_detection`` for all registered jobs from a
+    single background thread.
+    """
+
+    def __init__(self, client, notifications=None, min_delay=None, max_delay=None,
+                 seconds_per_page=None, backoff=None):
+        self.client = client
+        self.notifications = notifications
+        self.min_delay = settings.TEXTRACT_POLL_MIN_DELAY if min_delay is None else min_delay
+        self.max_delay = settings.TEXTRACT_POLL_MAX_DELAY if max_delay is None else max_delay
+        self.seconds_per_page = settings.TEXTRACT_POLL_SECONDS_PER_PAGE if seconds_per_page is None else seconds_per_page
+        self.backoff = settings.TEXTRACT_POLL_BACKOFF if backoff is None else backoff
+
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._throttle_delay = 0.0
+        self._thread = None
+
+    # ---------- public API ----------
+    def wait(self, job_id, page_count=None, heartbeat=None, heartbeat_interval=60):
+        """
+        Block until ``job_id`` reaches a terminal status and return it.
+        ``heartbeat`` is called every ``heartbeat_interval`` seconds while
+        waiting (used to keep the worker lease fresh).
+        """
+        job = self._register(job_id, page_count)
+        try:
+            while not job.done.wait(heartbeat_interval):
+                if heartbeat:
+                    heartbeat()
+            return job.status
+        finally:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+
+    def watch(self, job_id, callback, page_count=None):
+        """
+        Non-blocking ``wait``: ``callback(status)`` is called from the
+        poller thread once ``job_id`` reaches a terminal status (used by
+        the async API to wait without holding a thread).
+        """
+        def finished(status_):
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            callback(status_)
+
+        self._register(job_id, page_count, callback=finished)
+
+    def forget(self, job_id):
+        """Stop tracking a watched job (e.g. its request was cancelled)."""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._jobs)
+
+    # ---------- scheduling ----------
+    def _first_delay(self, page_count):
+        # Textract rarely finishes faster than a few seconds plus a little
+        # per page, so polling earlier than that only burns API calls.
+        expected = self.min_delay + self.seconds_per_page * (page_count or 1)
+        return min(expected, self.max_delay)
+
+    def _next_delay(self, job):
+        job.delay = min(job.delay * self.backoff, self.max_delay)
+        # "Equal jitter": keep half the delay, randomize the other half so
+        # jobs started together do not poll in lockstep
+        return job.delay / 2 + random.uniform(0, job.delay / 2)
+
+    def _register(self, job_id, page_count, callback=None):
+        job = _TrackedJob(job_id, self._first_delay(page_count))
+        job.callback = callback
+        with self._lock:
+            self._jobs[job_id] = job
+        self._ensure_thread()
+        self._wakeup.set()
+        return job
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="textract-poller", daemon=True)
+                self._thread.start()
+
+    def _complete(self, job_id, status):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and not job.done.is_set():
+            job.finish(status)
+
+    # ---------- poller thread ----------
+    def _run(self):
+        while True:
+            with self._lock:
+                pending = [j for j in self._jobs.values() if not j.done.is_set()]
+            now = time.monotonic()
+            next_due = min((j.next_poll_at for j in pending), default=now + self.max_delay)
+            timeout = max(0.0, next_due - now)
+
+            if self.notifications is not None:
+                # Notifications normally arrive well before the next poll;
+                # cap the blocking receive so new registrations are noticed.
+                try:
+                    events = self.notifications.receive(min(timeout, 1.0), self._is_tracked)
+                except Exception as exc:
+                    print(f"Textract notification receive failed: {exc}")
+                    events = []
+                    self._wakeup.wait(min(timeout, 1.0))
+                for job_id, status in events:
+                    if status in TERMINAL_STATUSES:
+                        self._complete(job_id, status)
+            else:
+                self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+            now = time.monotonic()
+            for job in pending:
+                if job.done.is_set() or job.next_poll_at > now:
+                    continue
+                self._poll(job)
+
+    def _is_tracked(self, job_id):
+        with self._lock:
+            return job_id in self._jobs
+
+    def _poll(self, job):
+        try:
+            acquire_token("get")
+            resp = self.client.get_document_text_detection(JobId=job.job_id, MaxResults=1)
+        except ClientError as exc:
+            if is_throttle_error(exc):
+                self._throttled()
+                return
+            job.finish("FAILED")
+            print(f"Textract poll failed for {job.job_id}: {exc}")
+            return
+        except Exception as exc:
+            # Network hiccups must not kill the poller thread; try again later
+            job.next_poll_at = time.monotonic() + self._next_delay(job)
+            print(f"Textract poll error for {job.job_id}, retrying: {exc}")
+            return
+
+        self._throttle_delay = 0.0
+        job.polls += 1
+        status_ = resp["JobStatus"]
+        if status_ in TERMINAL_STATUSES:
+            job.finish(status_)
+        else:
+            job.next_poll_at = time.monotonic() + self._next_delay(job)
+
+    def _throttled(self):
+        # Push every pending poll back; grow the pause while throttling lasts
+        self._throttle_delay = min(max(self._throttle_delay * 2, self.min_delay), self.max_delay)
+        resume_at = time.monotonic() + self._throttle_delay + random.uniform(0, self.min_delay)
+        with self._lock:
+            for job in self._jobs.values():
+                job.next_poll_at = max(job.next_poll_at, resume_at)
+        print(f"Textract throttled, pausing polls for {self._throttle_delay:.1f}s")
+
+
+# ===============================
+# Completion notification sources
+# ===============================
+def parse_textract_notification(body):
+    """
+    Return ``(job_id, status)`` from a Textract completion message, which is
+    either the raw SNS payload or an SNS envelope delivered through SQS.
+    """
+    payload = json.loads(body)
+    if "Message" in payload and "JobId" not in payload:
+        payload = json.loads(payload["Message"])
+    return payload["JobId"], payload["Status"]
+
+
+class SQSNotificationSource:
+    """
+    Long-polls the SQS queue subscribed to TEXTRACT_SNS_TOPIC_ARN.
+    Messages for jobs tracked by another process are released immediately
+    so that process can pick them up.
+    """
+
+    MAX_RECEIVES = 10
+
+    def __init__(self, queue_url, client=None):
+        self.queue_url = queue_url
+        self.client = client or get_client("sqs")
+
+    def receive(self, timeout, is_tracked):
+        resp = self.client.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=10,
+            WaitTimeSeconds=min(math.ceil(timeout), 20),
+            AttributeNames=["ApproximateReceiveCount"],
+        )
+        events = []
+        for message in resp.get("Messages", []):
+            try:
+                job_id, status_ = parse_textract_notification(message["Body"])
+            except (ValueError, KeyError):
+                job_id, status_ = None, None
+
+            receives = int(message.get("Attributes", {}).get("ApproximateReceiveCount", 1))
+            if job_id is not None and is_tracked(job_id):
+                events.append((job_id, status_))
+            elif job_id is not None and receives < self.MAX_RECEIVES:
+                self.client.change_message_visibility(
+                    QueueUrl=self.queue_url,
+                    ReceiptHandle=message["ReceiptHandle"],
+                    VisibilityTimeout=0,
+                )
+                continue
+            self.client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=message["ReceiptHandle"])
+        return events
+
+
+class LocalNotificationSource:
+    """
+    In-process stand-in for SNS/SQS: anything that knows a job finished
+    (e.g. a fake Textract backend) calls ``publish``.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def publish(self, job_id, status):
+        self._queue.put((job_id, status))
+
+    def receive(self, timeout, is_tracked):
+        events = []
+        try:
+            events.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            while True:
+                events.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return [e for e in events if is_tracked(e[0])]
+
+
+# ===============================
+# Per-process singleton
+# ===============================
+_poller = None
+_poller_pid = None
+_poller_lock = threading.Lock()
+local_notifications = LocalNotificationSource()
+
+
+def notification_channel():
+    """``NotificationChannel`` argument for start_document_text_detection, or None."""
+    if settings.TEXTRACT_NOTIFICATIONS == "sqs" and settings.TEXTRACT_SNS_TOPIC_ARN:
+        return {"SNSTopicArn": settings.TEXTRACT_SNS_TOPIC_ARN, "RoleArn": settings.TEXTRACT_SNS_ROLE_ARN}
+    return None
+
+
+def get_poller(client):
+    """Return this process's poller, creating it after fork if needed."""
+    global _poller, _poller_pid
+    with _poller_lock:
+        if _poller is None or _poller_pid != os.getpid():
+            if settings.TEXTRACT_NOTIFICATIONS == "sqs" and settings.TEXTRACT_SQS_QUEUE_URL:
+                notifications = SQSNotificationSource(settings.TEXTRACT_SQS_QUEUE_URL)
+            elif settings.TEXTRACT_NOTIFICATIONS == "local":
+                notifications = local_notifications
+            else:
+                notifications = None
+            _poller = TextractPoller(client, notifications=notifications)
+            _poller_pid = os.getpid()
+        return _poller
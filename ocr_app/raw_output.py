@@ -0,0 +1,142 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+from django.conf import settings
+
+from .aws import get_client
+from .layout import lines_from_responses
+from .uploads import TRANSFER_CONFIG
+
+
+# ===============================
+# Raw Textract output store
+# ===============================
+# Textract responses are paid for once: with TEXTRACT_RAW_STORE set, every
+# result page of an async job (Blocks with geometry, relationships and
+# confidence) is written as one gzipped JSON line while it streams in, and
+# the file is kept on local disk or in S3 under the document's content
+# hash and job id (a forced reprocess keeps the earlier output).
+# ``iter_lines`` rebuilds the LINE text from it without calling Textract
+# (see the ``rebuild_text`` command).
+#
+# Each line is the response minus ResponseMetadata, plus ``JobId``,
+# ``Chunk`` and ``PageOffset`` (add it to a block's ``Page`` to get the
+# page number in the original PDF when it was split into chunks).
+
+SPOOL_BYTES = 10 * 1024 * 1024
+STORES = ("local", "s3")
+
+
+def enabled():
+    return settings.TEXTRACT_RAW_STORE in STORES
+
+
+def output_key(doc, job_id):
+    """Key of the output of job ``job_id`` (the first chunk's for split PDFs)."""
+    name = doc.content_hash or f"document-{doc.pk}"
+    return f"{settings.TEXTRACT_RAW_PREFIX}{name}/{job_id}.jsonl.gz"
+
+
+def response_lines(resp):
+    """The LINE texts of one ``get_document_text_detection`` response."""
+    return [b["Text"] for b in resp.get("Blocks", []) if b["BlockType"] == "LINE"]
+
+
+class RawOutputWriter:
+    """
+    Compresses the result pages of one Textract job into a spooled
+    temporary file; ``pipeline.iter_textract_lines`` feeds it as pages
+    arrive, so the responses never pile up in memory.
+    """
+
+    def __init__(self, job_id, chunk=0, page_offset=0):
+        self.job_id = job_id
+        self.chunk = chunk
+        self.page_offset = page_offset
+        self.file = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        self._gzip = gzip.GzipFile(fileobj=self.file, mode="wb", compresslevel=6)
+
+    def write(self, resp):
+        record = {key: value for key, value in resp.items() if key != "ResponseMetadata"}
+        record.update(JobId=self.job_id, Chunk=self.chunk, PageOffset=self.page_offset)
+        self._gzip.write(json.dumps(record, separators=(",", ":")).encode("utf-8"))
+        self._gzip.write(b"\n")
+
+    def finish(self):
+        """Flush the gzip member and rewind; returns the compressed file."""
+        self._gzip.close()
+        self.file.seek(0)
+        return self.file
+
+    def close(self):
+        self.file.close()
+
+
+def save(key, writers):
+    """
+    Store the finished ``writers`` (in chunk order) under ``key`` and return
+    the stored size in bytes. Concatenated gzip members form one valid
+    gzip stream, so the parts are joined without recompressing.
+    """
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as combined:
+            for writer in writers:
+                shutil.copyfileobj(writer.finish(), combined)
+            size = combined.tell()
+            combined.seek(0)
+            if settings.TEXTRACT_RAW_STORE == "s3":
+                get_client("s3").upload_fileobj(
+                    combined,
+                    settings.AWS_S3_BUCKET,
+                    key,
+                    ExtraArgs={"ContentType": "application/x-ndjson", "ContentEncoding": "gzip"},
+                    Config=TRANSFER_CONFIG,
+                )
+            else:
+                path = _local_path(key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Unique per writer, so concurrent saves never interleave
+                tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+                with open(tmp, "wb") as out:
+                    shutil.copyfileobj(combined, out)
+                os.replace(tmp, path)
+        return size
+    finally:
+        for writer in writers:
+            writer.close()
+
+
+def _local_path(key):
+    return os.path.join(settings.TEXTRACT_RAW_DIR, key)
+
+
+def _open(key):
+    """A readable binary file with the stored (compressed) output."""
+    if settings.TEXTRACT_RAW_STORE == "s3":
+        fileobj = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        get_client("s3").download_fileobj(settings.AWS_S3_BUCKET, key, fileobj, Config=TRANSFER_CONFIG)
+        fileobj.seek(0)
+        return fileobj
+    return open(_local_path(key), "rb")
+
+
+def iter_responses(key):
+    """Yield the stored Textract responses of ``key`` in page order."""
+    with _open(key) as fileobj, gzip.GzipFile(fileobj=fileobj, mode="rb") as lines:
+        for line in lines:
+            yield json.loads(line)
+
+
+def iter_lines(key):
+    """Yield the LINE text of ``key`` exactly as the pipeline joined it."""
+    for resp in iter_responses(key):
+        yield from response_lines(resp)
+
+
+def layout_lines(key):
+    """LINE geometry of ``key`` as ``layout.Line`` tuples."""
+    return lines_from_responses(iter_responses(key))
@@ -0,0 +1,139 @@
+import multiprocessing
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from . import raw_output
+
+from .companies import sync_documents
+from .models import Document
+from .utils import refresh_entities, stale_sections
+
+
+# ===============================
+# Stale-section re-extraction / bulk re-parsing
+# ===============================
+# Regex fixes only need the stored OCR text: documents whose
+# ``entity_versions`` lag behind utils.SECTION_EXTRACTORS get just their
+# stale sections re-run (``reextract_entities``), and a backfill re-parses
+# every section (``reparse_documents``). The parent streams (id, versions)
+# pairs and hands batches of ids to a process pool; each child loads its
+# batch's text, parses it and bulk-updates it, so parsing uses every core.
+# With OCR_LAYOUT_ROWS and a raw output store, table sections are re-parsed
+# from the stored LINE geometry instead.
+
+def iter_stale_batches(batch_size, chunk_size, sections=None, queryset=None):
+    """
+    Stream done documents and yield lists of ids that have stale sections
+    (or, with ``sections``, every document with text).
+    """
+    queryset = Document.objects.all() if queryset is None else queryset
+    rows = (
+        queryset.filter(status="done")
+        .exclude(extracted_text__isnull=True)
+        .order_by("id")
+        .values_list("id", "entity_versions")
+        .iterator(chunk_size=chunk_size)
+    )
+    batch = []
+    for doc_id, versions in rows:
+        if sections or stale_sections(versions):
+            batch.append(doc_id)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def reextract_batch(doc_ids, sections=None):
+    """
+    Re-run stale (or the given) sections for ``doc_ids`` and save them in
+    one bulk_update (normalized officer/shareholder rows are rebuilt too).
+    Returns ``(updated, skipped, failed_by_section)``.
+    """
+    docs = list(
+        Document.objects.filter(id__in=doc_ids).only(
+            "id", "extracted_text", "entities", "entity_versions", "textract_output"
+        )
+    )
+    use_layout = settings.OCR_LAYOUT_ROWS and raw_output.enabled()
+    now = timezone.now()
+    changed, skipped, failures = [], 0, {}
+    for doc in docs:
+        text = doc.extracted_text or ""
+        if not text.strip():
+            skipped += 1
+            continue
+        lines = stored_lines(doc) if use_layout else None
+        doc.entities, doc.entity_versions, failed = refresh_entities(
+            text, doc.entities, doc.entity_versions, sections=sections, lines=lines
+        )
+        for key in failed:
+            failures[key] = failures.get(key, 0) + 1
+        doc.updated_at = now  # bulk_update skips auto_now; ETags depend on it
+        changed.append(doc)
+    if changed:
+        Document.objects.bulk_update(changed, ["entities", "entity_versions", "updated_at"])
+        sync_documents(changed)
+    return len(changed), skipped, failures
+
+
+def stored_lines(doc):
+    """LINE geometry from the raw Textract output of ``doc``, or None."""
+    if not doc.textract_output:
+        return None
+    try:
+        return raw_output.layout_lines(doc.textract_output)
+    except Exception as exc:
+        print(f"Could not load raw Textract output of document {doc.pk}, using text: {exc}")
+        return None
+
+
+def _reextract_batch_task(args):
+    return reextract_batch(*args)
+
+
+def reextract_stale(processes=None, batch_size=200, chunk_size=2000, sections=None, queryset=None,
+                    log=print):
+    """
+    Bring every done document's entities up to the current section
+    versions (or re-run ``sections`` everywhere) using ``processes`` worker
+    processes. Returns a totals dict including throughput and per-section
+    failure counts.
+    """
+    processes = processes or os.cpu_count() or 1
+    totals = {"batches": 0, "updated": 0, "skipped": 0, "failed": {}, "seconds": 0.0, "docs_per_sec": 0.0}
+    started = time.perf_counter()
+
+    def add(result):
+        updated, skipped, failures = result
+        totals["batches"] += 1
+        totals["updated"] += updated
+        totals["skipped"] += skipped
+        for key, count in failures.items():
+            totals["failed"][key] = totals["failed"].get(key, 0) + count
+        totals["seconds"] = time.perf_counter() - started
+        totals["docs_per_sec"] = totals["updated"] / totals["seconds"] if totals["seconds"] else 0.0
+        log(
+            f"Batch {totals['batches']}: {totals['updated']} document(s) parsed so far "
+            f"({totals['docs_per_sec']:.1f} docs/sec)"
+        )
+
+    batches = (
+        (batch, sections) for batch in iter_stale_batches(batch_size, chunk_size, sections, queryset)
+    )
+    if processes == 1:
+        for args in batches:
+            add(_reextract_batch_task(args))
+        return totals
+
+    # Children must not share the parent's DB connection across the fork
+    connections.close_all()
+    with multiprocessing.get_context("fork").Pool(processes) as pool:
+        for result in pool.imap_unordered(_reextract_batch_task, batches):
+            add(result)
+    return totals
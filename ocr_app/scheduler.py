@@ -0,0 +1,263 @@
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import timedelta
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .aio import run_blocking
+from .jobs import worker_name
+from .models import RateBucket, TextractSlot
+
+
+# ===============================
+# Textract scheduler
+# ===============================
+# Every worker process shares two limits through the database:
+#
+# - TEXTRACT_MAX_CONCURRENT_JOBS async jobs may be in progress at once.
+#   Callers take a ticket (a TextractSlot row) and start their job when the
+#   tickets ahead of them plus the running ones leave room, so excess work
+#   waits first-come first-served instead of failing with LimitExceeded.
+# - Start / Get / Detect calls are paced by token buckets (RateBucket rows)
+#   refilled at TEXTRACT_*_TPS, updated with a compare-and-swap on
+#   ``version`` so it is safe without SELECT ... FOR UPDATE.
+#
+# Throttling errors that still get through are retried with capped,
+# jittered exponential backoff.
+
+THROTTLE_ERRORS = (
+    "ThrottlingException",
+    "ProvisionedThroughputExceededException",
+    "LimitExceededException",
+)
+
+RATE_SETTINGS = {
+    "start": "TEXTRACT_START_TPS",
+    "get": "TEXTRACT_GET_TPS",
+    "detect": "TEXTRACT_DETECT_TPS",
+}
+
+SLOT_POLL_INTERVAL = 1.0  # seconds between FIFO checks while waiting
+SLOT_HEARTBEAT_INTERVAL = 30  # seconds between ticket heartbeats
+
+
+def is_throttle_error(exc):
+    return isinstance(exc, ClientError) and exc.response.get("Error", {}).get("Code") in THROTTLE_ERRORS
+
+
+# ---------- token buckets ----------
+def _take_token(name, rate):
+    """
+    Take one token from bucket ``name``. Returns 0 on success, otherwise
+    the seconds until a token is due (None when another process won the
+    compare-and-swap and it is worth retrying straight away).
+    """
+    burst = max(1.0, rate)
+    now = timezone.now()
+    bucket, _ = RateBucket.objects.get_or_create(name=name, defaults={"tokens": burst, "refilled_at": now})
+    # Clamp: another host's clock may be slightly ahead of ours
+    elapsed = max(0.0, (now - bucket.refilled_at).total_seconds())
+    tokens = min(burst, bucket.tokens + elapsed * rate)
+    if tokens < 1:
+        return (1 - tokens) / rate
+    taken = RateBucket.objects.filter(pk=bucket.pk, version=bucket.version).update(
+        tokens=tokens - 1, refilled_at=now, version=F("version") + 1
+    )
+    return 0 if taken else None
+
+
+def acquire_token(name, timeout=None):
+    """
+    Block until bucket ``name`` allows one call (or ``timeout`` seconds
+    pass). Returns False on timeout. A rate of 0 means unlimited.
+    """
+    rate = getattr(settings, RATE_SETTINGS[name])
+    if not rate:
+        return True
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        wait = _take_token(name, rate)
+        if wait == 0:
+            return True
+        # Jitter so processes waiting on the same bucket do not stampede
+        wait = random.uniform(0, 0.05) if wait is None else wait + random.uniform(0, 1 / rate)
+        if deadline is not None and time.monotonic() + wait > deadline:
+            return False
+        time.sleep(wait)
+
+
+async def acquire_token_async(name):
+    """``acquire_token`` for async code: waits with asyncio.sleep."""
+    rate = getattr(settings, RATE_SETTINGS[name])
+    if not rate:
+        return
+    while True:
+        wait = await run_blocking(_take_token, name, rate)
+        if wait == 0:
+            return
+        await asyncio.sleep(random.uniform(0, 0.05) if wait is None else wait + random.uniform(0, 1 / rate))
+
+
+def backoff_delay(attempt):
+    """Equal-jitter exponential backoff for the ``attempt``-th retry (0-based)."""
+    cap = min(settings.TEXTRACT_THROTTLE_MAX_DELAY, settings.TEXTRACT_THROTTLE_BASE_DELAY * 2 ** attempt)
+    return random.uniform(cap / 2, cap)
+
+
+async def call_async(bucket, method, stats=None, **kwargs):
+    """``call`` for async code: the API call runs on the I/O pool."""
+    retries = settings.TEXTRACT_THROTTLE_RETRIES
+    for attempt in range(retries + 1):
+        await acquire_token_async(bucket)
+        try:
+            return await run_blocking(method, **kwargs)
+        except ClientError as exc:
+            if not is_throttle_error(exc) or attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"Textract {bucket} throttled ({exc.response['Error']['Code']}), retry {attempt + 1}/{retries}")
+        if stats is not None:
+            key = f"{bucket}_throttle_retries"
+            stats[key] = stats.get(key, 0) + 1
+        await asyncio.sleep(delay)
+
+
+def call(bucket, method, stats=None, **kwargs):
+    """
+    Call a Textract ``method`` paced by ``bucket``, retrying throttling
+    errors up to TEXTRACT_THROTTLE_RETRIES times. Retries are counted in
+    ``stats["<bucket>_throttle_retries"]`` when a dict is given.
+    """
+    retries = settings.TEXTRACT_THROTTLE_RETRIES
+    for attempt in range(retries + 1):
+        acquire_token(bucket)
+        try:
+            return method(**kwargs)
+        except ClientError as exc:
+            if not is_throttle_error(exc) or attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            code = exc.response["Error"]["Code"]
+            print(f"Textract {bucket} throttled ({code}), retry {attempt + 1}/{retries} in {delay:.1f}s")
+        if stats is not None:
+            key = f"{bucket}_throttle_retries"
+            stats[key] = stats.get(key, 0) + 1
+        time.sleep(delay)
+
+
+# ---------- concurrent job slots ----------
+_released = threading.Condition()
+
+
+def _live_slots():
+    lease = timedelta(seconds=settings.TEXTRACT_SLOT_LEASE_SECONDS)
+    return TextractSlot.objects.filter(heartbeat_at__gte=timezone.now() - lease)
+
+
+def _try_start(ticket, limit):
+    # One statement, so a ticket promoted meanwhile is counted exactly once
+    # (as running or as ahead of us)
+    busy = _live_slots().filter(Q(state="running") | Q(state="waiting", id__lt=ticket.pk)).count()
+    if busy >= limit:
+        return False
+    return TextractSlot.objects.filter(pk=ticket.pk, state="waiting").update(
+        state="running", heartbeat_at=timezone.now()
+    ) == 1
+
+
+def _touch(ticket):
+    TextractSlot.objects.filter(pk=ticket.pk).update(heartbeat_at=timezone.now())
+
+
+@contextmanager
+def job_slot(heartbeat=None):
+    """
+    Hold one of the TEXTRACT_MAX_CONCURRENT_JOBS slots for the block,
+    waiting in FIFO order for it. The block receives a ``touch`` callable
+    that keeps the slot's lease alive (call it while waiting on the job);
+    ``heartbeat`` is called periodically while queued.
+    """
+    limit = settings.TEXTRACT_MAX_CONCURRENT_JOBS
+    if not limit:
+        yield lambda: None
+        return
+
+    ticket = _new_ticket()
+    try:
+        last_touch = time.monotonic()
+        while not _try_start(ticket, limit):
+            with _released:
+                # Woken early when a job of this process ends
+                _released.wait(SLOT_POLL_INTERVAL + random.uniform(0, SLOT_POLL_INTERVAL))
+            if time.monotonic() - last_touch >= SLOT_HEARTBEAT_INTERVAL:
+                _touch(ticket)
+                if heartbeat:
+                    heartbeat()
+                last_touch = time.monotonic()
+        yield lambda: _touch(ticket)
+    finally:
+        ticket.delete()
+        with _released:
+            _released.notify_all()
+
+
+def _new_ticket():
+    lease = timedelta(seconds=settings.TEXTRACT_SLOT_LEASE_SECONDS)
+    TextractSlot.objects.filter(heartbeat_at__lt=timezone.now() - lease).delete()
+    return TextractSlot.objects.create(holder=worker_name())
+
+
+@asynccontextmanager
+async def job_slot_async(heartbeat=None):
+    """
+    ``job_slot`` for async code: the FIFO wait is an asyncio.sleep loop,
+    so queued requests hold no thread. ``heartbeat`` may be a coroutine
+    function.
+    """
+    limit = settings.TEXTRACT_MAX_CONCURRENT_JOBS
+    if not limit:
+        yield lambda: None
+        return
+
+    ticket = await run_blocking(_new_ticket)
+    try:
+        last_touch = time.monotonic()
+        while not await run_blocking(_try_start, ticket, limit):
+            await asyncio.sleep(SLOT_POLL_INTERVAL + random.uniform(0, SLOT_POLL_INTERVAL))
+            if time.monotonic() - last_touch >= SLOT_HEARTBEAT_INTERVAL:
+                await run_blocking(_touch, ticket)
+                if heartbeat:
+                    await heartbeat()
+                last_touch = time.monotonic()
+        yield lambda: _touch(ticket)
+    finally:
+        # Shielded: a cancelled request must still give its slot back
+        await asyncio.shield(run_blocking(ticket.delete))
+        with _released:
+            _released.notify_all()
+
+
+def stats():
+    """Current slot usage and bucket levels, for the metrics API."""
+    live = _live_slots()
+    now = timezone.now()
+    buckets = {}
+    for bucket in RateBucket.objects.all():
+        rate = getattr(settings, RATE_SETTINGS.get(bucket.name, ""), 0)
+        elapsed = max(0.0, (now - bucket.refilled_at).total_seconds())
+        buckets[bucket.name] = {
+            "tps": rate,
+            "tokens": round(min(max(1.0, rate), bucket.tokens + elapsed * rate), 2) if rate else None,
+        }
+    return {
+        "max_concurrent_jobs": settings.TEXTRACT_MAX_CONCURRENT_JOBS,
+        "running": live.filter(state="running").count(),
+        "waiting": live.filter(state="waiting").count(),
+        "buckets": buckets,
+    }
@@ -3,8 +3,10 @@ from .models import Document
 
 
 class DocumentSerializer(serializers.ModelSerializer):
-    # Explicitly define entities to safely serialize nested JSON data
-    entities = serializers.JSONField(required=False)
+    # Declared explicitly: both are stored compressed (see compression.py)
+    # and the model field decodes them to str / JSON data
+    extracted_text = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    entities = serializers.JSONField(required=False, allow_null=True)
 
     class Meta:
         model = Document
@@ -12,8 +14,39 @@ class DocumentSerializer(serializers.ModelSerializer):
             'id',
             'file_name',
             's3_key',
+            'content_hash',
             'status',
+            'ocr_backend',
+            'batch',
+            'stage',
+            'attempts',
+            'error',
             'extracted_text',
             'entities',
+            'entity_versions',
             'uploaded_at',
+            'updated_at',
+        ]
+
+
+class DocumentSummarySerializer(serializers.ModelSerializer):
+    """
+    Listing/status view of a document without the (unbounded) OCR text
+    and entities; the list API adds those only on ``?include=``.
+    """
+
+    class Meta:
+        model = Document
+        fields = [
+            'id',
+            'file_name',
+            'status',
+            'stage',
+            'ocr_backend',
+            'page_count',
+            'attempts',
+            'error',
+            'batch',
+            'uploaded_at',
+            'updated_at',
         ]
@@ -0,0 +1,248 @@
+import hashlib
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from boto3.s3.transfer import TransferConfig
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+from .aws import get_client
+
+
+# ===============================
+# S3 transfer settings
+# ===============================
+# One TransferConfig for every upload_fileobj call, and the same part size /
+# concurrency for uploads streamed straight from the request body.
+
+S3_MIN_PART_SIZE = 5 * 1024 * 1024  # S3 minimum for every part but the last
+
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+    multipart_chunksize=max(settings.S3_MULTIPART_CHUNKSIZE, S3_MIN_PART_SIZE),
+    max_concurrency=settings.S3_MAX_CONCURRENCY,
+)
+
+
+def new_s3_key(upload_name):
+    """Return ``(file_name, s3_key)`` for a new upload."""
+    file_name = f"{uuid.uuid4().hex}_{upload_name}"
+    return file_name, f"uploads/{file_name}"
+
+
+# ===============================
+# Multipart streaming upload
+# ===============================
+class MultipartUploadStream:
+    """
+    Write-only stream that sends data to S3 as multipart parts while it is
+    still arriving. At most ``concurrency`` parts are buffered/in flight at
+    once. Any S3 error aborts the multipart upload and marks the stream as
+    failed instead of raising, so the caller can fall back to a normal
+    upload of its local copy.
+    """
+
+    def __init__(self, client, bucket, key, content_type, part_size=None, concurrency=None):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size or settings.S3_MULTIPART_CHUNKSIZE, S3_MIN_PART_SIZE)
+        self.failed = False
+        self._part_error = None
+
+        self._buffer = bytearray()
+        self._futures = []
+        concurrency = concurrency or settings.S3_MAX_CONCURRENCY
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="s3-part")
+        try:
+            resp = client.create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)
+            self.upload_id = resp["UploadId"]
+        except Exception as exc:
+            print(f"Multipart upload could not be started for {key}: {exc}")
+            self.upload_id = None
+            self.failed = True
+
+    def write(self, data):
+        if self._part_error is not None and not self.failed:
+            print(f"Multipart upload failed for {self.key}: {self._part_error}")
+            self.abort()
+        if self.failed:
+            return
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._submit(part)
+
+    def _submit(self, data):
+        number = len(self._futures) + 1
+        self._slots.acquire()
+        future = self._pool.submit(self._upload_part, number, data)
+        future.add_done_callback(self._part_done)
+        self._futures.append(future)
+
+    def _part_done(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            self._part_error = future.exception()
+        self._slots.release()
+
+    def _upload_part(self, number, data):
+        resp = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=number,
+            Body=data,
+        )
+        return {"PartNumber": number, "ETag": resp["ETag"]}
+
+    def close(self):
+        """Upload the last part and complete the object. Returns True on success."""
+        if not self.failed:
+            # The last part may be short (or empty for an empty file)
+            if self._buffer or not self._futures:
+                self._submit(bytes(self._buffer))
+            self._buffer = bytearray()
+            try:
+                parts = [future.result() for future in self._futures]
+                self.client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self.upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+            except Exception as exc:
+                print(f"Multipart upload failed for {self.key}: {exc}")
+                self.abort()
+        self._pool.shutdown(wait=True)
+        return not self.failed
+
+    def abort(self):
+        self.failed = True
+        self._buffer = bytearray()
+        if self.upload_id is not None:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+            except Exception as exc:
+                print(f"Could not abort multipart upload for {self.key}: {exc}")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ===============================
+# Django upload handler
+# ===============================
+class S3StreamingUploadHandler(FileUploadHandler):
+    """
+    Streams large uploads to S3 while Django is still receiving the request
+    body, keeping a local temp copy for the local OCR backends and hashing
+    the bytes as they pass. The resulting file carries ``content_hash`` and
+    its still open ``s3_stream``: ``submit_upload`` completes the object only
+    when the document needs it (``complete_streamed``) and aborts it for
+    cache hits (``discard_streamed``), so a duplicate never becomes an S3
+    object. Requests below S3_STREAMING_UPLOAD_MIN_BYTES (or a failed
+    stream) fall back to the default handlers / a normal upload.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.activated = False
+        self.stream = None
+        self.digest = None
+        self.files = []  # every file handed out, see stream_uploads_to_s3
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.activated = content_length >= settings.S3_STREAMING_UPLOAD_MIN_BYTES
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        if not self.activated:
+            return
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+        self.s3_file_name, self.s3_key = new_s3_key(os.path.basename(self.file_name))
+        self.stream = MultipartUploadStream(
+            get_client("s3"), settings.AWS_S3_BUCKET, self.s3_key, self.content_type or "application/pdf"
+        )
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.stream is None:
+            return raw_data
+        self.file.write(raw_data)
+        self.digest.update(raw_data)
+        self.stream.write(raw_data)
+
+    def file_complete(self, file_size):
+        if self.stream is None:
+            return None
+        stream, self.stream = self.stream, None
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.content_hash = self.digest.hexdigest()
+        self.file.s3_key = self.s3_key
+        self.file.s3_file_name = self.s3_file_name
+        self.file.s3_stream = None if stream.failed else stream
+        if stream.failed:
+            stream.close()
+        self.files.append(self.file)
+        return self.file
+
+    def upload_interrupted(self):
+        if self.stream is not None:
+            self.stream.abort()
+            self.stream = None
+            temp_location = self.file.temporary_file_path()
+            try:
+                self.file.close()
+                os.remove(temp_location)
+            except FileNotFoundError:
+                pass
+
+
+def complete_streamed(upload):
+    """
+    Complete the S3 object of an upload streamed by S3StreamingUploadHandler.
+    Returns its key, or None when the upload was not streamed or streaming
+    failed (the caller uploads the local copy instead).
+    """
+    stream = getattr(upload, "s3_stream", None)
+    if stream is None:
+        return None
+    upload.s3_stream = None
+    return stream.key if stream.close() else None
+
+
+def discard_streamed(upload):
+    """Abort the multipart upload of a streamed upload that is not needed."""
+    stream = getattr(upload, "s3_stream", None)
+    if stream is not None:
+        upload.s3_stream = None
+        stream.abort()
+
+
+def stream_uploads_to_s3(view):
+    """
+    Install S3StreamingUploadHandler before the request body is parsed.
+    Must wrap a CSRF-exempt view (see Django's note on modifying
+    ``upload_handlers``): apply ``csrf_protect`` inside it where needed.
+
+    Streams the view did not complete or discard (an invalid form, a
+    rejected request, an error) are aborted once it returns, so no
+    unreferenced object is left in S3.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        handler = S3StreamingUploadHandler(request)
+        request.upload_handlers.insert(0, handler)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            for upload in handler.files:
+                discard_streamed(upload)
+    return wrapper
@@ -5,4 +5,15 @@ urlpatterns = [
     path('', views.upload_pdf, name='upload_pdf'),
     path('result/<int:pk>/', views.result_view, name='result'),
     path('api/pdf-extract/', views.pdf_extraction_api, name='pdf_extraction_api'),
+    path('api/pdf-extract/async/', views.pdf_extraction_async_api, name='pdf_extraction_async_api'),
+    path('api/documents/', views.document_list_api, name='document_list_api'),
+    path('api/documents/<int:pk>/', views.document_detail_api, name='document_detail_api'),
+    path('api/documents/<int:pk>/status/', views.document_status_api, name='document_status_api'),
+    path('api/documents/<int:pk>/reprocess/', views.document_reprocess_api, name='document_reprocess_api'),
+    path('api/batches/', views.batch_create_api, name='batch_create_api'),
+    path('api/batches/<int:pk>/', views.batch_detail_api, name='batch_detail_api'),
+    path('api/people/search/', views.people_search_api, name='people_search_api'),
+    path('api/companies/<str:registration_no>/', views.company_detail_api, name='company_detail_api'),
+    path('api/aws/pools/', views.aws_pool_stats_api, name='aws_pool_stats_api'),
+    path('api/metrics/stages/', views.stage_stats_api, name='stage_stats_api'),
 ]
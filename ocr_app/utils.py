@@ -1,70 +1,238 @@
+import hashlib
+import json
 import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from django.conf import settings
+
+from .layout import officer_rows, shareholder_rows
+
+# -------------------- PRECOMPILED PATTERNS --------------------
+# Everything is compiled once at import; extractors only ever run against
+# the slice of text that belongs to their section (see index_sections).
+FLAGS = re.I | re.S
+
+MULTI_SPACE_RE = re.compile(r"\s{2,}")
+
+# Section headers / boundaries, matched case-insensitively. A token that
+# extends another (e.g. "Shareholder(s)" vs "Shareholder") is reported
+# under both kinds, just like the original overlapping lookaheads.
+SECTION_TOKENS = {
+    "officers": b"officers",
+    "officers_header": b"officers/authorised representative(s)",
+    "shareholder": b"shareholder",
+    "shareholders_header": b"shareholder(s)",
+    "abbreviation": b"abbreviation",
+    "note": b"note",
+    "note_colon": b"note :",
+    "registrar": b"for registrar",
+    "registered_office": b"registered office address",
+    "capital": b"capital",
+}
+
+OFFICERS_END = ("shareholders_header", "abbreviation", "note", "registrar")
+ABBREVIATIONS_END = ("note", "registrar")
+CAPITAL_END = ("registered_office", "officers", "shareholder", "abbreviation", "note", "registrar")
+
+PARTICULARS_PATTERNS = {
+    "Registration No.": re.compile(r"Registration No\.\s*:\s*([A-Z0-9]+)", FLAGS),
+    "Company Name.": re.compile(r"Company Name\.\s*:\s*([A-Z0-9\s\.\-&]+)(?=\nFormer Name|Incorporation|$)", FLAGS),
+    "Former Name if any": re.compile(r"Former Name if any\s*:\s*(.*?)(?=Incorporation|Company Type)", FLAGS),
+    "Incorporation Date.": re.compile(r"Incorporation Date\.\s*:\s*(\d{2}/\d{2}/\d{4})", FLAGS),
+    "Company Type": re.compile(r"Company Type\s*:\s*(.*?)(?=Status)", FLAGS),
+    "Status": re.compile(r"Status\s*:\s*(.*?)(?=Status Date)", FLAGS),
+    "Status Date": re.compile(r"Status Date\s*:\s*(\d{2}/\d{2}/\d{4})", FLAGS),
+}
+ACTIVITIES_PATTERNS = {
+    "Activities (I)": re.compile(r"Activities\s*\(I\)\s*:\s*(.*?)Description", FLAGS),
+    "Description (I)": re.compile(r"Description\s*:\s*(.*?)Activities\s*\(II\)", FLAGS),
+    "Activities (II)": re.compile(r"Activities\s*\(II\)\s*:\s*(.*?)Description", FLAGS),
+    # 🔧 fix: extract only the final description line properly
+    "Description (II)": re.compile(r"Activities\s*\(II\).*?Description\s*:\s*(.*?)\s*(?:Capital|Issued|Share|Paid|$)", FLAGS),
+}
+REGISTERED_OFFICE_PATTERNS = {
+    "Address": re.compile(r"Registered Office Address\s*:\s*(.*?)Date of Address", FLAGS),
+    "Date of Address": re.compile(r"Date of Address\s*:\s*(\d{2}/\d{2}/\d{4})", FLAGS),
+    "Date of Last AGM": re.compile(r"Date of Last AGM\s*:\s*(.*?)Date of Last AR", FLAGS),
+    "Date of Last AR": re.compile(r"Date of Last AR\s*:\s*(.*?)FYE", FLAGS),
+    "FYE As At Date of Last AR": re.compile(r"FYE As At Date of Last AR\s*:\s*(.*?)(?:Audit Firms|Officers|$)", FLAGS),
+}
+
+OFFICER_SPLIT_RE = re.compile(r"(?=\n[A-Z][A-Z\s]+\nS\d{7}[A-Z])")
+OFFICER_NAME_RE = re.compile(r"\n([A-Z][A-Z\s]+)\nS\d{7}[A-Z]", FLAGS)
+OFFICER_ID_RE = re.compile(r"\n(S\d{7}[A-Z])", FLAGS)
+OFFICER_ADDRESS_RE = re.compile(
+    r"((?:\d{1,3}\s+[A-Z0-9\s]+(?:ROAD|DRIVE|AVENUE|STREET|PLACE|LANE|CRESCENT|WALK|LOOP)"
+    r"[\s\S]*?\(\d{6}\)))",
+    FLAGS,
+)
+OFFICER_ADDRESS_PREFIX_RE = re.compile(r"^\d{2,3}\s*")
+OFFICER_ROLE_WORD_RE = re.compile(r"\b(Director|Secretary)\b")
+OFFICER_LINE_BREAK_RE = re.compile(r"\s*\n\s*")
+OFFICER_POSITION_RE = re.compile(r"(Director|Secretary|Manager)", FLAGS)
+OFFICER_NATIONALITY_RE = re.compile(r"(INDIAN|SINGAPORE\s*CITIZEN|MALAYSIAN|CHINESE)", FLAGS)
+OFFICER_SOURCE_RE = re.compile(r"\b(ACRA|IRAS|MOM)\b", FLAGS)
+OFFICER_DATE_RE = re.compile(r"(\d{2}/\d{2}/\d{4})", FLAGS)
+
+PAGE_MARKER_RE = re.compile(r"Page\s*\d+\s*of\s*\d+")
+AUTHENTICATION_RE = re.compile(r"Authentication No\..*?(?=Shareholder\(s\)|$)", re.S)
+NEWLINES_RE = re.compile(r"\n+")
+BLANK_LINES_RE = re.compile(r"\n\s*\n")
+SHAREHOLDERS_END_RE = re.compile(r"Abbreviation|Note :|FOR REGISTRAR", re.I)
+SHAREHOLDER_RE = re.compile(
+    r"(?P<Name>[A-Z0-9\s\.\-&]+)\s*\n"
+    r"(?P<ID>[A-Z0-9]{8,})\s*\n"
+    r"(?P<Nationality>[A-Z\s]+)\s*\n"
+    r"(?P<Source>[A-Z]+)"
+    r"(?:.*?(?P<Address>\d{1,3}.*?\(\d{6}\)))?"
+    r".*?Ordinary\(Number\)\s*(?P<Ordinary>[\d,]+)\s*Currency\s*(?P<Currency>[A-Z,\s]+)",
+    re.S | re.I
+)
+# Every shareholder record ends in this tail; see extract_shareholders_section
+SHAREHOLDER_TAIL_RE = re.compile(r"Ordinary\(Number\)\s*[\d,]+\s*Currency\s*[A-Z,\s]+", re.I)
+# A record's Name runs (inside its character class) up to the newline that
+# precedes a whole-line ID; see shareholder_matches
+SHAREHOLDER_NAME_RUN_RE = re.compile(r"[A-Z0-9\s\.\-&]+", re.I)
+SHAREHOLDER_ID_BREAK_RE = re.compile(r"\n(?=[A-Z0-9]{8,}\s*\n)", re.I)
+
+ABBREVIATION_PAIR_RE = re.compile(r"([A-Z]{2,})\s*-\s*(.*?)(?=\n[A-Z]{2,}\s*-|$)", re.S)
+
+ISSUED_BLOCK_RE = re.compile(r"Issued Share Capital[\s\S]*?Paid-Up Capital", re.I)
+PAID_BLOCK_RE = re.compile(r"Paid-Up Capital[\s\S]*?(?=COMPANY HAS|Registered Office|Officers|$)", re.I)
+ISSUED_PATTERNS = {
+    "Issued Share Capital (AMOUNT)": re.compile(r"Issued Share Capital.*?\(AMOUNT\)\s*([\d,]+)", FLAGS),
+    "Issued Number of Shares": re.compile(r"Issued Share Capital[\s\S]*?Number of Shares.*?\n(\d{1,9})", FLAGS),
+    "Issued Currency": re.compile(r"Issued Share Capital[\s\S]*?Currency.*?\n([A-Z,\s]+DOLLARS)", FLAGS),
+    "Issued Share Type": re.compile(r"Issued Share Capital[\s\S]*?Share Type.*?\n([A-Z]+)", FLAGS),
+}
+PAID_PATTERNS = {
+    "Paid-Up Capital (AMOUNT)": re.compile(r"Paid-Up Capital.*?\(AMOUNT\)\s*([\d,]+)", FLAGS),
+    "Paid Currency": re.compile(r"Paid-Up Capital[\s\S]*?Currency.*?\n([A-Z,\s]+DOLLARS)", FLAGS),
+    "Paid Share Type": re.compile(r"Paid-Up Capital[\s\S]*?Share Type.*?\n([A-Z]+)", FLAGS),
+}
+TREASURY_PATTERNS = {
+    "Treasury Number Of Shares": re.compile(r"COMPANY HAS.*?Number Of Shares.*?\n([\d,]+|—)", FLAGS),
+    "Treasury Currency": re.compile(r"COMPANY HAS.*?Currency.*?\n([A-Z,\s]+DOLLARS|—)", FLAGS),
+}
+
 
 def clean_value(val):
     if not val:
         return "—"
     val = val.strip().replace("\n", " ").replace("  ", " ")
-    val = re.sub(r"\s{2,}", " ", val)
+    val = MULTI_SPACE_RE.sub(" ", val)
     return val.strip()
 
 def search(pattern, text, flags=re.I | re.S):
-    match = re.search(pattern, text, flags)
+    if isinstance(pattern, re.Pattern):
+        match = pattern.search(text)
+    else:
+        match = re.search(pattern, text, flags)
     return match.group(1).strip() if match and match.groups() else "—"
 
+def search_all(patterns, text):
+    return {label: search(pattern, text) for label, pattern in patterns.items()}
+
+
+# -------------------- SECTION INDEX --------------------
+class SectionIndex:
+    """
+    Positions of every section header/boundary token in ``text``, built
+    once per document so extractors never rescan the full text for their
+    own boundaries.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.first = {}      # kind -> (start, end) of its first occurrence
+        self.positions = {}  # kind -> [start, ...] in document order
+
+        # ASCII-only lowercase keeps offsets identical to ``text`` (non-ASCII
+        # characters become "?"), and bytes.find is far cheaper than a
+        # case-insensitive regex alternation tried at every position.
+        haystack = text.encode("ascii", "replace").lower()
+        for kind, token in SECTION_TOKENS.items():
+            positions = []
+            pos = haystack.find(token)
+            while pos != -1:
+                positions.append(pos)
+                pos = haystack.find(token, pos + len(token))
+            if positions:
+                self.positions[kind] = positions
+                self.first[kind] = (positions[0], positions[0] + len(token))
+
+    def next_boundary(self, after, kinds):
+        """Start of the first token of ``kinds`` at or after ``after``."""
+        end = len(self.text)
+        for kind in kinds:
+            positions = self.positions.get(kind, [])
+            i = bisect_left(positions, after)
+            if i < len(positions):
+                end = min(end, positions[i])
+        return end
+
+    def section(self, kind, end_kinds):
+        """Text between the first ``kind`` header and the next boundary, or None."""
+        if kind not in self.first:
+            return None
+        start = self.first[kind][1]
+        return self.text[start:self.next_boundary(start, end_kinds)]
+
+    def head(self):
+        """Everything before the Officers / Shareholder(s) listings."""
+        starts = [self.first[k][0] for k in ("officers_header", "shareholders_header") if k in self.first]
+        return self.text[:min(starts)] if starts else self.text
+
+
+def index_sections(text):
+    return SectionIndex(text)
+
 
 # -------------------- OFFICERS --------------------
-def extract_officers_section(text):
+def extract_officers_section(text, index=None):
     """Extract officer/authorized representative details with clean, comma-separated addresses."""
-    officers_section = re.search(
-        r"Officers/Authorised Representative\(s\)(.*?)(?=Shareholder\(s\)|Abbreviation|Note|FOR REGISTRAR|$)",
-        text,
-        re.S | re.I,
-    )
-    if not officers_section:
+    index = index or index_sections(text)
+    officers_text = index.section("officers_header", OFFICERS_END)
+    if officers_text is None:
         return []
 
-    officers_text = officers_section.group(1)
     officers = []
 
     # Split by officer name pattern
-    officer_blocks = re.split(r"(?=\n[A-Z][A-Z\s]+\nS\d{7}[A-Z])", officers_text)
+    officer_blocks = OFFICER_SPLIT_RE.split(officers_text)
 
     for block in officer_blocks:
-        name = search(r"\n([A-Z][A-Z\s]+)\nS\d{7}[A-Z]", block)
+        name = search(OFFICER_NAME_RE, block)
         if name == "—":
             continue
 
         # address pattern (street to postal code)
-        address_pattern = (
-            r"((?:\d{1,3}\s+[A-Z0-9\s]+(?:ROAD|DRIVE|AVENUE|STREET|PLACE|LANE|CRESCENT|WALK|LOOP)"
-            r"[\s\S]*?\(\d{6}\)))"
-        )
-        raw_address = search(address_pattern, block)
+        raw_address = search(OFFICER_ADDRESS_RE, block)
 
         # Clean and format address
         if raw_address != "—":
             # Remove stray role words or numeric prefixes (like 018 / 020)
-            raw_address = re.sub(r"^\d{2,3}\s*", "", raw_address.strip())
-            raw_address = re.sub(r"\b(Director|Secretary)\b", "", raw_address)
+            raw_address = OFFICER_ADDRESS_PREFIX_RE.sub("", raw_address.strip())
+            raw_address = OFFICER_ROLE_WORD_RE.sub("", raw_address)
             # Convert newlines and multiple spaces into commas
-            address = re.sub(r"\s*\n\s*", ", ", raw_address)
-            address = re.sub(r"\s{2,}", " ", address).strip()
+            address = OFFICER_LINE_BREAK_RE.sub(", ", raw_address)
+            address = MULTI_SPACE_RE.sub(" ", address).strip()
         else:
             address = "—"
 
-        position = search(r"(Director|Secretary|Manager)", block)
+        position = search(OFFICER_POSITION_RE, block)
 
         officers.append(
             {
                 "Name": name,
-                "ID": search(r"\n(S\d{7}[A-Z])", block),
-                "Nationality / Citizenship": search(
-                    r"(INDIAN|SINGAPORE\s*CITIZEN|MALAYSIAN|CHINESE)", block
-                ),
-                "Source of Address": search(r"\b(ACRA|IRAS|MOM)\b", block),
+                "ID": search(OFFICER_ID_RE, block),
+                "Nationality / Citizenship": search(OFFICER_NATIONALITY_RE, block),
+                "Source of Address": search(OFFICER_SOURCE_RE, block),
                 "Address": address,
                 "Position Held": position,
-                "Date of Appointment": search(r"(\d{2}/\d{2}/\d{4})", block),
+                "Date of Appointment": search(OFFICER_DATE_RE, block),
             }
         )
 
@@ -73,31 +241,58 @@ def extract_officers_section(text):
 
 
 # -------------------- SHAREHOLDERS --------------------
-def extract_shareholders_section(text):
+def shareholder_matches(section, endpos):
+    """
+    Same matches as ``SHAREHOLDER_RE.finditer(section, 0, endpos)``, but the
+    regex is only tried where a record can start: inside a run of Name
+    characters that reaches an ID line. Long runs of upper-case lines with
+    no ID in them otherwise make every start position backtrack over the
+    whole run.
+    """
+    id_breaks = [m.start() for m in SHAREHOLDER_ID_BREAK_RE.finditer(section, 0, endpos)]
+    pos = 0
+    for run in SHAREHOLDER_NAME_RUN_RE.finditer(section, 0, endpos):
+        start = max(run.start(), pos)
+        last = bisect_right(id_breaks, run.end() - 1) - 1
+        if last < 0 or id_breaks[last] < start:
+            continue
+        last_break = id_breaks[last]
+        pos = start
+        while pos <= last_break:
+            m = SHAREHOLDER_RE.match(section, pos, endpos)
+            if m:
+                yield m
+                pos = m.end()
+            else:
+                pos += 1
+
+
+def extract_shareholders_section(text, index=None):
     shareholders = []
-    text = re.sub(r"Page\s*\d+\s*of\s*\d+", "", text)
-    text = re.sub(r"Authentication No\..*?(?=Shareholder\(s\)|$)", "", text, flags=re.S)
-    text = re.sub(r"\n+", "\n", text).strip()
-
-    section_match = re.search(r"Shareholder\(s\)(.*?)(?=Abbreviation|Note :|FOR REGISTRAR|$)", text, re.S | re.I)
-    if not section_match:
+    index = index or index_sections(text)
+    if "shareholders_header" not in index.first:
         return shareholders
 
-    section = section_match.group(1)
-    section = re.sub(r"\n\s*\n", "\n", section)
+    # Clean-up only needs to touch the text after the header; the section
+    # end is searched after clean-up because footers can hide it.
+    rest = text[index.first["shareholders_header"][1]:]
+    rest = PAGE_MARKER_RE.sub("", rest)
+    rest = AUTHENTICATION_RE.sub("", rest)
+    rest = NEWLINES_RE.sub("\n", rest)
+
+    end = SHAREHOLDERS_END_RE.search(rest)
+    section = rest[:end.start()] if end else rest
+    section = BLANK_LINES_RE.sub("\n", section)
     section = section.replace("\n\n", "\n").strip()
 
-    pattern = re.compile(
-        r"(?P<Name>[A-Z0-9\s\.\-&]+)\s*\n"
-        r"(?P<ID>[A-Z0-9]{8,})\s*\n"
-        r"(?P<Nationality>[A-Z\s]+)\s*\n"
-        r"(?P<Source>[A-Z]+)"
-        r"(?:.*?(?P<Address>\d{1,3}.*?\(\d{6}\)))?"
-        r".*?Ordinary\(Number\)\s*(?P<Ordinary>[\d,]+)\s*Currency\s*(?P<Currency>[A-Z,\s]+)",
-        re.S | re.I
-    )
-
-    for m in pattern.finditer(section):
+    # No record can end after the last "Ordinary(Number) .. Currency .." tail,
+    # so cut the section there; otherwise every candidate start position
+    # behind it scans (and backtracks) to the end of the section.
+    tail_end = 0
+    for tail in SHAREHOLDER_TAIL_RE.finditer(section):
+        tail_end = tail.end()
+
+    for m in shareholder_matches(section, tail_end):
         shareholders.append({
             "Name": clean_value(m.group("Name")),
             "ID": clean_value(m.group("ID")),
@@ -123,67 +318,47 @@ def extract_shareholders_section(text):
 
 
 # -------------------- ABBREVIATIONS --------------------
-def extract_abbreviations_section(text):
+def extract_abbreviations_section(text, index=None):
     """Extract Abbreviation mappings like UL - Local Entity not registered with ACRA."""
     abbreviations = {}
-    abbr_section = re.search(r"Abbreviation(.*?)(?:Note|FOR REGISTRAR|$)", text, re.S | re.I)
-    if not abbr_section:
+    index = index or index_sections(text)
+    abbr_text = index.section("abbreviation", ABBREVIATIONS_END)
+    if abbr_text is None:
         return abbreviations
 
-    abbr_text = abbr_section.group(1)
-    pairs = re.findall(r"([A-Z]{2,})\s*-\s*(.*?)(?=\n[A-Z]{2,}\s*-|$)", abbr_text, re.S)
+    pairs = ABBREVIATION_PAIR_RE.findall(abbr_text)
 
     for key, value in pairs:
         abbreviations[key.strip()] = clean_value(value)
 
     return abbreviations
 
-def extract_capital_section(text):
+def extract_capital_section(text, index=None):
     """
     Extract capital-related information from ACRA PDFs accurately
     using multiline regex detection.
     """
-    capital_section = re.search(
-        r"Capital(.*?)(?=Registered Office Address|Officers|Shareholder|Abbreviation|Note|FOR REGISTRAR|$)",
-        text, re.S | re.I
-    )
-    if not capital_section:
+    index = index or index_sections(text)
+    section = index.section("capital", CAPITAL_END)
+    if section is None:
         return {}
 
-    section = capital_section.group(1)
-
     # Extract Issued Share Capital Block
-    issued_block = re.search(
-        r"Issued Share Capital[\s\S]*?Paid-Up Capital", section, re.I)
-    paid_block = re.search(
-        r"Paid-Up Capital[\s\S]*?(?=COMPANY HAS|Registered Office|Officers|$)", section, re.I)
+    issued_block = ISSUED_BLOCK_RE.search(section)
+    paid_block = PAID_BLOCK_RE.search(section)
 
     issued = {}
     paid = {}
     treasury = {}
 
     if issued_block:
-        ib = issued_block.group(0)
-        issued = {
-            "Issued Share Capital (AMOUNT)": search(r"Issued Share Capital.*?\(AMOUNT\)\s*([\d,]+)", ib),
-            "Issued Number of Shares": search(r"Issued Share Capital[\s\S]*?Number of Shares.*?\n(\d{1,9})", ib),
-            "Issued Currency": search(r"Issued Share Capital[\s\S]*?Currency.*?\n([A-Z,\s]+DOLLARS)", ib),
-            "Issued Share Type": search(r"Issued Share Capital[\s\S]*?Share Type.*?\n([A-Z]+)", ib)
-        }
+        issued = search_all(ISSUED_PATTERNS, issued_block.group(0))
 
     if paid_block:
-        pb = paid_block.group(0)
-        paid = {
-            "Paid-Up Capital (AMOUNT)": search(r"Paid-Up Capital.*?\(AMOUNT\)\s*([\d,]+)", pb),
-            "Paid Currency": search(r"Paid-Up Capital[\s\S]*?Currency.*?\n([A-Z,\s]+DOLLARS)", pb),
-            "Paid Share Type": search(r"Paid-Up Capital[\s\S]*?Share Type.*?\n([A-Z]+)", pb)
-        }
+        paid = search_all(PAID_PATTERNS, paid_block.group(0))
 
     # Treasury (may be missing sometimes)
-    treasury = {
-        "Treasury Number Of Shares": search(r"COMPANY HAS.*?Number Of Shares.*?\n([\d,]+|—)", section),
-        "Treasury Currency": search(r"COMPANY HAS.*?Currency.*?\n([A-Z,\s]+DOLLARS|—)", section)
-    }
+    treasury = search_all(TREASURY_PATTERNS, section)
 
     # Clean fallbacks
     for d in [issued, paid, treasury]:
@@ -195,34 +370,116 @@ def extract_capital_section(text):
 
 
 # -------------------- MAIN ENTITY EXTRACTION --------------------
-def extract_entities(text):
-    entities = {
-        "The Following Are The Brief Particulars of :": {
-            "Registration No.": search(r"Registration No\.\s*:\s*([A-Z0-9]+)", text),
-            "Company Name.": search(r"Company Name\.\s*:\s*([A-Z0-9\s\.\-&]+)(?=\nFormer Name|Incorporation|$)", text),
-            "Former Name if any": search(r"Former Name if any\s*:\s*(.*?)(?=Incorporation|Company Type)", text),
-            "Incorporation Date.": search(r"Incorporation Date\.\s*:\s*(\d{2}/\d{2}/\d{4})", text),
-            "Company Type": search(r"Company Type\s*:\s*(.*?)(?=Status)", text),
-            "Status": search(r"Status\s*:\s*(.*?)(?=Status Date)", text),
-            "Status Date": search(r"Status Date\s*:\s*(\d{2}/\d{2}/\d{4})", text),
-        },
-        "Principal Activities": {
-            "Activities (I)": search(r"Activities\s*\(I\)\s*:\s*(.*?)Description", text),
-            "Description (I)": search(r"Description\s*:\s*(.*?)Activities\s*\(II\)", text),
-            "Activities (II)": search(r"Activities\s*\(II\)\s*:\s*(.*?)Description", text),
-            # 🔧 fix: extract only the final description line properly
-            "Description (II)": search(r"Activities\s*\(II\).*?Description\s*:\s*(.*?)\s*(?:Capital|Issued|Share|Paid|$)", text),
-        },
-        "Capital": extract_capital_section(text),
-        "Registered Office Address": {
-            "Address": search(r"Registered Office Address\s*:\s*(.*?)Date of Address", text),
-            "Date of Address": search(r"Date of Address\s*:\s*(\d{2}/\d{2}/\d{4})", text),
-            "Date of Last AGM": search(r"Date of Last AGM\s*:\s*(.*?)Date of Last AR", text),
-            "Date of Last AR": search(r"Date of Last AR\s*:\s*(.*?)FYE", text),
-            "FYE As At Date of Last AR": search(r"FYE As At Date of Last AR\s*:\s*(.*?)(?:Audit Firms|Officers|$)", text),
-        },
-        "Officers / Authorised Representative(s)": extract_officers_section(text),
-        "Shareholder(s)": extract_shareholders_section(text),
-        "Abbreviation": extract_abbreviations_section(text),
-    }
+# -------------------- HEAD SECTIONS --------------------
+def extract_particulars_section(text, index=None):
+    index = index or index_sections(text)
+    return search_all(PARTICULARS_PATTERNS, index.head())
+
+
+def extract_activities_section(text, index=None):
+    index = index or index_sections(text)
+    return search_all(ACTIVITIES_PATTERNS, index.head())
+
+
+def extract_registered_office_section(text, index=None):
+    index = index or index_sections(text)
+    return search_all(REGISTERED_OFFICE_PATTERNS, index.head())
+
+
+# -------------------- EXTRACTOR REGISTRY --------------------
+# One entry per top-level key of extract_entities(). Bump a section's
+# version whenever a change alters its output: documents record the versions
+# that produced their entities (Document.entity_versions), and only stale
+# sections are re-run from the stored text (manage.py reextract_entities).
+# ``layout`` optionally rebuilds the section from LINE geometry (layout.py)
+# and falls back to ``extract`` by returning None. Such sections record
+# their version with a "+layout" suffix while OCR_LAYOUT_ROWS is on, so
+# results of the two modes never share cache entries or stored versions.
+SectionExtractor = namedtuple("SectionExtractor", ["version", "extract", "layout"], defaults=(None,))
+
+SECTION_EXTRACTORS = {
+    "The Following Are The Brief Particulars of :": SectionExtractor("1", extract_particulars_section),
+    "Principal Activities": SectionExtractor("1", extract_activities_section),
+    "Capital": SectionExtractor("1", extract_capital_section),
+    "Registered Office Address": SectionExtractor("1", extract_registered_office_section),
+    "Officers / Authorised Representative(s)": SectionExtractor("1", extract_officers_section, officer_rows),
+    "Shareholder(s)": SectionExtractor("2", extract_shareholders_section, shareholder_rows),
+    "Abbreviation": SectionExtractor("1", extract_abbreviations_section),
+}
+
+
+def extractor_version(extractor):
+    """Version recorded for a section under the current OCR_LAYOUT_ROWS mode."""
+    if extractor.layout is not None and settings.OCR_LAYOUT_ROWS:
+        return f"{extractor.version}+layout"
+    return extractor.version
+
+
+def section_versions():
+    return {key: extractor_version(extractor) for key, extractor in SECTION_EXTRACTORS.items()}
+
+
+# Whole-document fingerprint of the section versions; cached OCR results
+# are keyed on it, so bumping any section version invalidates them.
+EXTRACTOR_VERSION = "s" + hashlib.sha1(
+    json.dumps(section_versions(), sort_keys=True).encode()
+).hexdigest()[:12]
+
+
+def stale_sections(versions):
+    """Sections whose stored version differs from the registry (all if None)."""
+    versions = versions or {}
+    return [key for key, extractor in SECTION_EXTRACTORS.items() if versions.get(key) != extractor_version(extractor)]
+
+
+def run_extractor(extractor, text, index, lines=None):
+    """Run one section extractor, from geometry ``lines`` when it can."""
+    if lines and extractor.layout is not None:
+        records = extractor.layout(lines)
+        if records is not None:
+            return records
+    return extractor.extract(text, index)
+
+
+def refresh_entities(text, entities=None, versions=None, sections=None, lines=None):
+    """
+    Re-run the stale sections (or exactly ``sections``) of ``entities``
+    against ``text`` (and LINE geometry ``lines``, if known) and keep every
+    other section as stored.
+
+    Returns ``(entities, versions, failed)``; a section whose extractor
+    raises keeps its old value and version and is listed in ``failed``.
+    """
+    entities = dict(entities or {})
+    versions = dict(versions or {})
+    todo = stale_sections(versions) if sections is None else list(sections)
+    failed = []
+    if todo:
+        index = index_sections(text)
+        for key in todo:
+            extractor = SECTION_EXTRACTORS[key]
+            try:
+                entities[key] = run_extractor(extractor, text, index, lines)
+            except Exception:
+                failed.append(key)
+                continue
+            versions[key] = extractor_version(extractor)
+    return entities, versions, failed
+
+
+def extract_entities(text, timings=None, lines=None):
+    """
+    Run every registered section extractor over ``text``; table sections
+    use LINE geometry ``lines`` (layout.Line tuples) when given. Pass a
+    dict as ``timings`` to collect per-section wall time in milliseconds.
+    """
+    index = index_sections(text)
+    if timings is None:
+        return {key: run_extractor(extractor, text, index, lines) for key, extractor in SECTION_EXTRACTORS.items()}
+
+    entities = {}
+    for key, extractor in SECTION_EXTRACTORS.items():
+        started = time.perf_counter()
+        entities[key] = run_extractor(extractor, text, index, lines)
+        timings[key] = round((time.perf_counter() - started) * 1000, 3)
     return entities
@@ -1,12 +1,27 @@
-import time
-import uuid
-import boto3
-from django.conf import settings
+import os
+
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import condition, require_POST
+from .aio import run_blocking
+from .async_pipeline import extract_async
 from .forms import UploadPDFForm
-from .models import Document
-from .utils import extract_entities
-from .serializers import DocumentSerializer
+from .http_cache import cached_render, document_etag, document_last_modified, invalidate
+from .aws import pool_stats
+from .metrics import stage_stats
+from .scheduler import stats as scheduler_stats
+from .companies import normalize_id, normalize_name
+from .models import Batch, Company, Document, Officer, Shareholder
+from .batches import BatchError, batch_progress, detach_files, start_batch, zip_members
+from .jobs import enqueue
+from .pipeline import submit_upload
+from .pagination import InvalidCursor, keyset_page, page_size
+from .serializers import DocumentSerializer, DocumentSummarySerializer
+from .uploads import stream_uploads_to_s3
 
 # DRF imports
 from rest_framework.decorators import api_view, parser_classes
@@ -14,125 +29,27 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework import status
 
-# ===============================
-# AWS Clients Setup
-# ===============================
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    region_name=settings.AWS_REGION,
-)
-textract = boto3.client(
-    "textract",
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    region_name=settings.AWS_REGION,
-)
-
-# ===============================
-# PDF Processing Function
-# ===============================
-def process_pdf_s3(doc):
-    """
-    Runs Textract text detection on the uploaded PDF (stored in S3),
-    extracts text, and uses regex (utils.extract_entities)
-    to structure the extracted entities.
-    """
-    s3_key = doc.s3_key
-    bucket = settings.AWS_S3_BUCKET
-
-    # Step 1: Check if file exists in S3
-    try:
-        s3.head_object(Bucket=bucket, Key=s3_key)
-    except s3.exceptions.ClientError:
-        doc.status = "failed"
-        doc.extracted_text = "S3 object not found."
-        doc.save()
-        return doc
-
-    # Step 2: Start Textract job
-    start_job = textract.start_document_text_detection(
-        DocumentLocation={'S3Object': {'Bucket': bucket, 'Name': s3_key}}
-    )
-    job_id = start_job["JobId"]
-    print(f"Textract job started: {job_id}")
-
-    # Step 3: Poll Textract status
-    while True:
-        time.sleep(5)
-        resp = textract.get_document_text_detection(JobId=job_id)
-        status_ = resp["JobStatus"]
-        print(f"Textract status: {status_}")
-        if status_ in ["SUCCEEDED", "FAILED"]:
-            break
-
-    # Step 4: Process results
-    if status_ == "SUCCEEDED":
-        blocks = resp["Blocks"]
-        next_token = resp.get("NextToken")
-
-        # Paginate through all results
-        while next_token:
-            next_page = textract.get_document_text_detection(JobId=job_id, NextToken=next_token)
-            blocks.extend(next_page["Blocks"])
-            next_token = next_page.get("NextToken")
-
-        # Combine all detected lines
-        lines = [b["Text"] for b in blocks if b["BlockType"] == "LINE"]
-        extracted_text = "\n".join(lines)
-        doc.extracted_text = extracted_text
-
-        # Step 5: Parse structured entities (flattened)
-        if extracted_text.strip():
-            entities = extract_entities(extracted_text)
-            # ✅ FIX — Save clean, single-level entity dict
-            doc.entities = entities
-
-        doc.status = "done"
-        doc.save()
-        print(f"✅ Textract + Regex parsing completed for: {s3_key}")
-
-    else:
-        doc.status = "failed"
-        doc.extracted_text = "Textract failed to process this document."
-        doc.save()
-        print(f"❌ Textract failed for {s3_key}")
-
-    return doc
-
 
 # ===============================
 # 1️⃣ Web Upload View
 # ===============================
+@csrf_exempt
+@stream_uploads_to_s3
+@csrf_protect
 def upload_pdf(request):
     """
     Web-based upload view for OCR + Entity extraction.
-    Uploads file → S3 → Textract → utils regex parsing → Save to DB
+    Uploads file → S3 (large files are streamed while they arrive) → queue; a background worker runs Textract + regex parsing
+    while the result page shows progress. Duplicate uploads are answered
+    from the OCR result cache.
     """
     if request.method == "POST":
         form = UploadPDFForm(request.POST, request.FILES)
         if form.is_valid():
-            pdf = form.cleaned_data["pdf_file"]
-            file_name = f"{uuid.uuid4().hex}_{pdf.name}"
-            s3_key = f"uploads/{file_name}"
-
-            # Upload PDF to S3
-            s3.upload_fileobj(
-                pdf,
-                settings.AWS_S3_BUCKET,
-                s3_key,
-                ExtraArgs={"ContentType": "application/pdf"},
+            doc, _ = submit_upload(
+                form.cleaned_data["pdf_file"],
+                force=form.cleaned_data["force_reprocess"],
             )
-
-            # Save DB record
-            doc = Document.objects.create(
-                file_name=file_name, s3_key=s3_key, status="processing"
-            )
-
-            # Run Textract + regex parsing
-            process_pdf_s3(doc)
-
             return redirect("result", pk=doc.pk)
     else:
         form = UploadPDFForm()
@@ -143,57 +60,414 @@ def upload_pdf(request):
 # ===============================
 # 2️⃣ API Upload + Extraction Endpoint
 # ===============================
+@stream_uploads_to_s3
 @api_view(["POST"])
 @parser_classes([MultiPartParser, FormParser])
 def pdf_extraction_api(request):
     """
-    REST API endpoint: Upload PDF → S3 → Textract → regex parsing → return JSON
+    REST API endpoint: Upload PDF → S3 → queue.
+    Returns 202 immediately; poll ``status_url`` until the document is done.
+    Documents finished during the request (a byte-identical PDF seen before,
+    or one handled by a local OCR backend) are answered with 200 and the
+    full result. ``force=true`` bypasses the OCR result cache.
     """
     if "file" not in request.FILES:
         return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-    pdf = request.FILES["file"]
-    file_name = f"{uuid.uuid4().hex}_{pdf.name}"
-    s3_key = f"uploads/{file_name}"
+    force = _is_true(request.data.get("force", ""))
+    doc, cache_hit = submit_upload(request.FILES["file"], force=force)
+
+    if doc.status == "done":
+        return Response(_extraction_result(doc, cache_hit), status=status.HTTP_200_OK)
+    return Response(_extraction_accepted(request, doc), status=status.HTTP_202_ACCEPTED)
+
+
+@csrf_exempt
+@require_POST
+async def pdf_extraction_async_api(request):
+    """
+    Async (ASGI) variant of ``pdf_extraction_api``: Upload PDF → S3 →
+    Textract → entities within the request, with the job awaited rather
+    than blocking a thread (see async_pipeline.py). Answers 200 with the
+    result, 502 when Textract fails, or 202 with ``status_url`` when the
+    document was handed to the workers (long PDFs, unexpected errors).
+    """
+    upload = await run_blocking(lambda: request.FILES.get("file"))
+    if upload is None:
+        return JsonResponse({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+    force = _is_true(request.POST.get("force", ""))
+    doc, cache_hit = await run_blocking(submit_upload, upload, force=force, inline=True)
+    if doc.status == "processing":
+        doc = await extract_async(doc)
+
+    if doc.status == "done":
+        return JsonResponse(_extraction_result(doc, cache_hit), status=status.HTTP_200_OK)
+    if doc.status == "failed":
+        response_data = {"id": doc.id, "file_name": doc.file_name, "status": doc.status,
+                         "error": doc.error or doc.extracted_text}
+        return JsonResponse(response_data, status=status.HTTP_502_BAD_GATEWAY)
+    return JsonResponse(_extraction_accepted(request, doc), status=status.HTTP_202_ACCEPTED)
+
+
+def _is_true(value):
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def _extraction_result(doc, cache_hit):
+    return {
+        "id": doc.id,
+        "file_name": doc.file_name,
+        "s3_key": doc.s3_key,
+        "status": doc.status,
+        "cached": cache_hit,
+        "ocr_backend": doc.ocr_backend,
+        "extracted_text": doc.extracted_text,
+        "entities": doc.entities,
+        "uploaded_at": doc.uploaded_at,
+    }
+
+
+def _extraction_accepted(request, doc):
+    return {
+        "id": doc.id,
+        "file_name": doc.file_name,
+        "s3_key": doc.s3_key,
+        "status": doc.status,
+        "status_url": request.build_absolute_uri(reverse("document_status_api", args=[doc.id])),
+        "uploaded_at": doc.uploaded_at,
+    }
+
+
+# ===============================
+# 3️⃣ Status + Result API
+# ===============================
+# Document views send ETag / Last-Modified and answer 304 while the
+# document is unchanged (see http_cache.py); no-cache makes clients
+# revalidate instead of guessing a freshness lifetime.
+document_conditional = condition(etag_func=document_etag, last_modified_func=document_last_modified)
+
+
+@cache_control(no_cache=True)
+@document_conditional
+@api_view(["GET"])
+def document_status_api(request, pk):
+    """
+    Lightweight progress check for a queued/processing document.
+    """
+    doc = get_object_or_404(
+        Document.objects.only("id", "status", "stage", "attempts", "error", "uploaded_at", "updated_at"),
+        pk=pk,
+    )
+    response_data = {
+        "id": doc.id,
+        "status": doc.status,
+        "stage": doc.stage,
+        "attempts": doc.attempts,
+        "error": doc.error,
+        "uploaded_at": doc.uploaded_at,
+        "updated_at": doc.updated_at,
+    }
+    if doc.status == "done":
+        response_data["result_url"] = request.build_absolute_uri(reverse("document_detail_api", args=[doc.id]))
+    return Response(response_data)
+
+
+# Opt-in heavy fields for the list API: ?include=text,entities
+LIST_INCLUDES = {"text": "extracted_text", "entities": "entities"}
+
+
+@api_view(["GET"])
+def document_list_api(request):
+    """
+    Paginated document listing (newest first) for dashboards.
+    Only summary columns are loaded; OCR text and entities are deferred
+    unless requested with ``?include=text`` / ``?include=entities``.
+    Filter with ``?status=`` and ``?batch=``; page with ``?limit=`` and the
+    ``next`` URL (keyset cursor).
+    """
+    include = [part.strip() for part in request.query_params.get("include", "").split(",") if part.strip()]
+    unknown = [part for part in include if part not in LIST_INCLUDES]
+    if unknown:
+        return Response(
+            {"error": f"Unknown include: {', '.join(unknown)} (allowed: {', '.join(LIST_INCLUDES)})"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    extra_fields = [LIST_INCLUDES[part] for part in include]
+
+    docs = Document.objects.only(*DocumentSummarySerializer.Meta.fields, *extra_fields)
+    if request.query_params.get("status"):
+        docs = docs.filter(status=request.query_params["status"])
+    if request.query_params.get("batch"):
+        docs = docs.filter(batch_id=request.query_params["batch"])
+
+    try:
+        rows, next_cursor = keyset_page(
+            docs,
+            cursor=request.query_params.get("cursor"),
+            limit=page_size(request.query_params.get("limit")),
+        )
+    except InvalidCursor as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = DocumentSummarySerializer(rows, many=True).data
+    for doc, item in zip(rows, results):
+        for field in extra_fields:
+            item[field] = getattr(doc, field)
+        item["status_url"] = request.build_absolute_uri(reverse("document_status_api", args=[doc.id]))
+
+    next_url = None
+    if next_cursor:
+        params = request.query_params.copy()
+        params["cursor"] = next_cursor
+        next_url = f"{request.build_absolute_uri(request.path)}?{params.urlencode()}"
+    return Response({"results": results, "next": next_url})
+
+
+@cache_control(no_cache=True)
+@document_conditional
+@api_view(["GET"])
+def document_detail_api(request, pk):
+    """
+    Full document including extracted text and entities (cached once done).
+    """
+    return Response(cached_render(
+        "json", request, pk, lambda: DocumentSerializer(get_object_or_404(Document, pk=pk)).data
+    ))
+
+
+@api_view(["POST"])
+def document_reprocess_api(request, pk):
+    """
+    Force a fresh Textract run for an existing document, bypassing the
+    OCR result cache (the new result replaces the cached one).
+    """
+    doc = get_object_or_404(Document, pk=pk)
+    if not doc.s3_key:
+        return Response({"error": "Document has no stored PDF"}, status=status.HTTP_409_CONFLICT)
+    if doc.status in ("queued", "processing"):
+        return Response({"error": "Document is already being processed"}, status=status.HTTP_409_CONFLICT)
+
+    doc.attempts = 0
+    doc.textract_jobs = None  # a fresh run, not the recorded jobs
+    enqueue(doc)
+    invalidate(doc.pk)
+    response_data = {
+        "id": doc.id,
+        "status": doc.status,
+        "status_url": request.build_absolute_uri(reverse("document_status_api", args=[doc.id])),
+    }
+    return Response(response_data, status=status.HTTP_202_ACCEPTED)
+
+
+# ===============================
+# 4️⃣ Batch Upload API
+# ===============================
+@api_view(["POST"])
+@parser_classes([MultiPartParser, FormParser])
+def batch_create_api(request):
+    """
+    Submit many documents in one request: repeat the ``files`` field, or
+    send a single ZIP as ``archive``. The 202 is returned once the batch
+    exists; its files are stored and queued in the background (at most
+    OCR_BATCH_CONCURRENCY at a time). Follow ``status_url`` for aggregate
+    progress and per-document results.
+    """
+    files = request.FILES.getlist("files")
+    archive = request.FILES.get("archive")
+    if not files and archive is None:
+        return Response({"error": "Provide 'files' or a ZIP 'archive'"}, status=status.HTTP_400_BAD_REQUEST)
+
+    if archive is not None:
+        try:
+            uploads = zip_members(archive)
+        except BatchError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        closing = detach_files(request.FILES, "archive")
+    else:
+        uploads = closing = detach_files(request.FILES, "files")
+
+    force = _is_true(request.data.get("force", ""))
+    batch = Batch.objects.create(
+        name=request.data.get("name", "") or (archive.name if archive is not None else ""),
+        source="zip" if archive is not None else "files",
+    )
+    start_batch(batch, uploads, force=force, closing=closing)
+
+    response_data = {
+        "id": batch.id,
+        "name": batch.name,
+        "progress": batch_progress(batch),
+        "status_url": request.build_absolute_uri(reverse("batch_detail_api", args=[batch.id])),
+        "created_at": batch.created_at,
+    }
+    return Response(response_data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["GET"])
+def batch_detail_api(request, pk):
+    """
+    Aggregate progress of a batch plus per-document status and entities
+    (the extracted text is left to each document's ``result_url``).
+    """
+    batch = get_object_or_404(Batch, pk=pk)
+    docs = batch.documents.order_by("id").values(
+        "id", "file_name", "status", "stage", "ocr_backend", "error", "entities", "updated_at"
+    )
+    documents = []
+    for doc in docs:
+        doc["result_url"] = request.build_absolute_uri(reverse("document_detail_api", args=[doc["id"]]))
+        documents.append(doc)
+
+    response_data = {
+        "id": batch.id,
+        "name": batch.name,
+        "source": batch.source,
+        "progress": batch_progress(batch),
+        "error": batch.error,
+        "created_at": batch.created_at,
+        "documents": documents,
+    }
+    return Response(response_data)
+
 
-    # Upload to S3
-    s3.upload_fileobj(
-        pdf,
-        settings.AWS_S3_BUCKET,
-        s3_key,
-        ExtraArgs={"ContentType": "application/pdf"},
+# ===============================
+# 5️⃣ Company / Officer / Shareholder Search
+# ===============================
+SEARCH_MAX_RESULTS = 500
+
+
+def _person_results(request, model, role, filters, limit):
+    rows = (
+        model.objects.filter(**filters)
+        .select_related("company")
+        .order_by("-document_id", "id")[:limit]
     )
+    results = []
+    for row in rows:
+        item = {
+            "role": role,
+            "name": row.name,
+            "id": row.person_id,
+            "company": {
+                "registration_no": row.company.registration_no,
+                "name": row.company.name,
+            } if row.company else None,
+            "document_id": row.document_id,
+            "document_url": request.build_absolute_uri(reverse("document_detail_api", args=[row.document_id])),
+        }
+        if role == "officer":
+            item.update(position=row.position, appointment_date=row.appointment_date)
+        else:
+            item.update(shares=row.shares, currency=row.currency)
+        results.append(item)
+    return results
 
-    # Create Document record
-    doc = Document.objects.create(file_name=file_name, s3_key=s3_key, status="processing")
 
-    # Process PDF (Textract + utils)
-    processed_doc = process_pdf_s3(doc)
+@api_view(["GET"])
+def people_search_api(request):
+    """
+    Cross-document lookup of officers and shareholders from the indexed
+    tables: ``?id=`` (exact NRIC/FIN/UEN), ``?name=`` (exact) or
+    ``?name_prefix=``; narrow with ``?role=officer|shareholder`` and
+    ``?registration_no=``.
+    """
+    params = request.query_params
+    filters = {}
+    if params.get("id"):
+        filters["person_id"] = normalize_id(params["id"])
+    if params.get("name"):
+        filters["name"] = normalize_name(params["name"])
+    elif params.get("name_prefix"):
+        filters["name__startswith"] = normalize_name(params["name_prefix"])
+    if not filters:
+        return Response({"error": "Provide 'id', 'name' or 'name_prefix'"}, status=status.HTTP_400_BAD_REQUEST)
+    if params.get("registration_no"):
+        filters["company__registration_no"] = normalize_id(params["registration_no"])
+
+    role = params.get("role", "")
+    if role not in ("", "officer", "shareholder"):
+        return Response({"error": "role must be 'officer' or 'shareholder'"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = max(1, min(int(params.get("limit", 100)), SEARCH_MAX_RESULTS))
+    except ValueError:
+        return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = []
+    if role in ("", "officer"):
+        results += _person_results(request, Officer, "officer", filters, limit)
+    if role in ("", "shareholder"):
+        results += _person_results(request, Shareholder, "shareholder", filters, limit)
+    return Response({"count": len(results), "results": results})
 
-    # ✅ Flatten entities in response (avoid nested)
-    data = processed_doc.entities
-    if isinstance(data, dict) and "entities" in data:
-        data = data["entities"]
 
+@api_view(["GET"])
+def company_detail_api(request, registration_no):
+    """
+    A company with the officers and shareholders of its latest filing.
+    """
+    company = get_object_or_404(Company, registration_no=normalize_id(registration_no))
+    officers = Officer.objects.filter(company=company, document_id=company.document_id).order_by("id")
+    shareholders = Shareholder.objects.filter(company=company, document_id=company.document_id).order_by("id")
     response_data = {
-        "id": processed_doc.id,
-        "file_name": processed_doc.file_name,
-        "s3_key": processed_doc.s3_key,
-        "status": processed_doc.status,
-        "extracted_text": processed_doc.extracted_text,
-        "entities": data,  # ✅ single-level
-        "uploaded_at": processed_doc.uploaded_at,
+        "registration_no": company.registration_no,
+        "name": company.name,
+        "company_type": company.company_type,
+        "status": company.status,
+        "incorporation_date": company.incorporation_date,
+        "document_id": company.document_id,
+        "updated_at": company.updated_at,
+        "officers": list(officers.values(
+            "name", "person_id", "nationality", "position", "appointment_date", "address",
+        )),
+        "shareholders": list(shareholders.values(
+            "name", "person_id", "nationality", "shares", "currency", "address",
+        )),
     }
+    return Response(response_data)
+
+
+# ===============================
+# 6️⃣ Metrics: AWS Client Pools + Pipeline Stages
+# ===============================
+@api_view(["GET"])
+def aws_pool_stats_api(request):
+    """
+    Connection pool utilization of this process's AWS clients, plus the
+    shared Textract job slots and rate buckets.
+    """
+    return Response({"pid": os.getpid(), "clients": pool_stats(), "textract_scheduler": scheduler_stats()})
 
-    return Response(response_data, status=status.HTTP_200_OK)
+
+@api_view(["GET"])
+def stage_stats_api(request):
+    """
+    p50 / p95 / max of every recorded pipeline stage (ms) and counter over
+    the most recent documents (``?limit=``, default 1000; ``?status=``).
+    """
+    try:
+        limit = max(1, min(int(request.query_params.get("limit", 1000)), 10000))
+    except ValueError:
+        return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        "limit": limit,
+        "stages": stage_stats(limit=limit, status=request.query_params.get("status")),
+    })
 
 
 # ===============================
-# 3️⃣ Result View
+# 7️⃣ Result View
 # ===============================
+@cache_control(no_cache=True)
+@document_conditional
 def result_view(request, pk):
     """
-    Displays extraction result after upload.
+    Displays extraction result after upload (auto-refreshes until done).
+    The page of a done document is rendered once and then served from
+    the cache until it changes.
     """
-    doc = get_object_or_404(Document, pk=pk)
-    return render(request, "result.html", {"doc": doc})
+    html = cached_render(
+        "html", request, pk,
+        lambda: render_to_string("result.html", {"doc": get_object_or_404(Document, pk=pk)}, request),
+    )
+    return HttpResponse(html)